@@ -8,25 +8,57 @@ Author: Uttam Kumar
 
 from flask import (
     Flask, render_template, request, jsonify, 
-    send_file, redirect, url_for, flash, session
+    send_file, send_from_directory, redirect, url_for, flash, session, g
 )
+from flask.signals import before_render_template, template_rendered
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_cors import CORS
+from flask_caching import Cache
+from werkzeug.http import generate_etag, is_resource_modified
+from werkzeug.utils import secure_filename
 import os
+import glob
+import hmac
 import json
+import time
+import atexit
+import mimetypes
 from datetime import datetime
 from functools import wraps
 
 from config import Config
-from utils import sanitize_input, validate_email, log_error
-from visitor_tracker import track_visitor, get_visitor_stats
+from utils import sanitize_input, validate_email, log_error, atomic_write_json, json_cache
+from visitor_tracker import (
+    track_visitor, get_visitor_stats, get_stats_version,
+    iter_visitors, iter_visitors_csv, iter_visitors_ndjson
+)
+from contact_store import ContactJournal, CONTACT_STATUSES, CONTACTS_PER_PAGE
+from sqlite_store import SqliteContactStore, sqlite_path_from_uri
+from compression import Compressor
+from mailer import SMTPPool, ContactMailer, QUEUED
+import ratelimit_store  # noqa: F401 - registers the sqlite:// limiter storage
+from fastpath import FastPathMiddleware, FastPathSessionInterface, ASSET, request_class
+from search_index import SearchIndex, template_text
+from profiler import RequestProfiler
+from instrumentation import (
+    metrics, REQUESTS_TOTAL, REQUEST_SECONDS, CACHE_HITS, CACHE_MISSES, RATELIMIT_REJECTIONS
+)
+from assets import (
+    IMAGES_DIST, image_url, image_srcset, responsive_image,
+    asset_url, bundle_entry, precompressed_variant
+)
 
 # ==================== APP INITIALIZATION ====================
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
+# Asset requests skip sessions, rate limits and tracking; /healthz is
+# answered before Flask (see fastpath.py)
+app.wsgi_app = FastPathMiddleware(app.wsgi_app, static_url_path=app.static_url_path)
+app.session_interface = FastPathSessionInterface()
+
 # Enable CORS
 CORS(app)
 
@@ -37,6 +69,31 @@ limiter = Limiter(
     default_limits=["200 per day", "50 per hour"]
 )
 
+
+@limiter.request_filter
+def is_asset_request():
+    """Static files, favicon, manifest, robots.txt and sitemap are not limited"""
+    return request_class(request.environ) == ASSET
+
+
+# Page Cache (backend and TTLs from Config)
+cache = Cache(app)
+
+# Response compression (settings from Config)
+compressor = Compressor(
+    levels=Config.COMPRESS_LEVELS,
+    min_size=Config.COMPRESS_MIN_SIZE,
+    cache_bytes=Config.COMPRESS_CACHE_BYTES
+)
+
+# Optimized image helpers (see assets.py)
+app.jinja_env.globals.update(
+    asset_url=asset_url,
+    image_url=image_url,
+    image_srcset=image_srcset,
+    responsive_image=responsive_image
+)
+
 # ==================== CONSTANTS ====================
 
 DATA_DIR = "data"
@@ -44,6 +101,184 @@ CONTACTS_FILE = os.path.join(DATA_DIR, "contacts.json")
 VISITORS_FILE = os.path.join(DATA_DIR, "visitors.json")
 RESUME_FILE = "resume/your_resume.pdf"
 
+# Site content (rendered by the pages and indexed for /search)
+PROJECTS = [
+    {
+        "id": 1,
+        "title": "TheGranito Portfolio",
+        "description": "Professional portfolio website with PWA support, admin dashboard, and analytics",
+        "tech": ["Python", "Flask", "JavaScript", "Bootstrap", "PWA"],
+        "github": "https://github.com/uttamkumar95446-bot/TheGranito",
+        "live": "https://thegranito.onrender.com",
+        "image": "project1.jpg",
+        "featured": True
+    },
+    {
+        "id": 2,
+        "title": "E-Commerce Platform",
+        "description": "Full-stack e-commerce solution with payment integration",
+        "tech": ["Python", "Flask", "SQLite", "Stripe API"],
+        "github": "#",
+        "live": "#",
+        "image": "project2.jpg",
+        "featured": False
+    },
+    {
+        "id": 3,
+        "title": "Blog CMS",
+        "description": "Content management system for blogs with Markdown support",
+        "tech": ["Flask", "SQLAlchemy", "Markdown", "TinyMCE"],
+        "github": "#",
+        "live": "#",
+        "image": "project3.jpg",
+        "featured": False
+    }
+]
+
+BLOG_POSTS = [
+    {
+        "id": 1,
+        "title": "My Journey in Web Development",
+        "excerpt": "Starting my journey as a web developer and the lessons learned along the way...",
+        "content": "Full blog post content here...",
+        "author": "Uttam Kumar",
+        "date": "2024-01-15",
+        "tags": ["Web Development", "Career", "Learning"],
+        "image": "blog1.jpg"
+    },
+    {
+        "id": 2,
+        "title": "Building Progressive Web Apps with Flask",
+        "excerpt": "A comprehensive guide to creating PWAs using Python Flask framework...",
+        "content": "Full blog post content here...",
+        "author": "Uttam Kumar",
+        "date": "2024-01-20",
+        "tags": ["PWA", "Flask", "Tutorial"],
+        "image": "blog2.jpg"
+    }
+]
+
+# Rendered pages only change on deploy: newest mtime of the app and its
+# templates (identical in every worker)
+DEPLOY_TIME = datetime.utcfromtimestamp(int(max(
+    os.path.getmtime(path)
+    for path in [os.path.abspath(__file__)] + glob.glob(os.path.join(app.root_path, 'templates', '*'))
+)))
+
+# Contact submissions (SQLite or data/contacts.json plus its journal, see
+# Config.STORAGE_BACKEND)
+if Config.STORAGE_BACKEND == 'sqlite':
+    contact_store = SqliteContactStore(sqlite_path_from_uri(Config.SQLALCHEMY_DATABASE_URI))
+else:
+    contact_store = ContactJournal(
+        CONTACTS_FILE,
+        fsync=Config.CONTACT_JOURNAL_FSYNC,
+        compact_bytes=Config.CONTACT_JOURNAL_COMPACT_BYTES
+    )
+
+# Background notification emails for new contacts (None = disabled)
+if Config.MAIL_SERVER and Config.MAIL_NOTIFY_RECIPIENT:
+    mailer = ContactMailer(
+        SMTPPool(
+            Config.MAIL_SERVER,
+            port=Config.MAIL_PORT,
+            username=Config.MAIL_USERNAME,
+            password=Config.MAIL_PASSWORD,
+            use_tls=Config.MAIL_USE_TLS
+        ),
+        contact_store,
+        sender=Config.MAIL_DEFAULT_SENDER or Config.MAIL_NOTIFY_RECIPIENT,
+        recipient=Config.MAIL_NOTIFY_RECIPIENT,
+        max_attempts=Config.MAIL_MAX_ATTEMPTS,
+        batch_size=Config.MAIL_BATCH_SIZE,
+        flush_interval=Config.MAIL_FLUSH_INTERVAL
+    )
+    # Send what is queued, then QUIT the pooled connections on exit
+    atexit.register(mailer.stop)
+else:
+    mailer = None
+
+# ==================== SITE SEARCH ====================
+
+# Page templates whose visible text is searchable, and where they are served
+SEARCH_PAGES = {
+    'index.html': '/',
+    'about.html': '/about',
+    'projects.html': '/projects',
+    'blog.html': '/blog',
+    'contact.html': '/contact'
+}
+
+_page_texts = {}  # template -> (mtime, title, text)
+
+
+def _page_text(template):
+    """Title and text of a page template, re-read only when it changed"""
+    path = os.path.join(app.root_path, 'templates', template)
+    mtime = os.path.getmtime(path)
+    cached = _page_texts.get(template)
+    if cached is None or cached[0] != mtime:
+        with open(path, 'r', encoding='utf-8') as f:
+            cached = (mtime, *template_text(f.read()))
+        _page_texts[template] = cached
+    return cached[1], cached[2]
+
+
+def search_documents():
+    """Every searchable document: projects, blog posts and page text"""
+    documents = [
+        {
+            'id': f"project-{project['id']}",
+            'type': 'project',
+            'url': f"/projects#project-{project['id']}",
+            'title': project['title'],
+            'excerpt': project['description'],
+            'tags': project['tech']
+        }
+        for project in PROJECTS
+    ]
+    documents += [
+        {
+            'id': f"post-{post['id']}",
+            'type': 'post',
+            'url': f"/blog#post-{post['id']}",
+            'title': post['title'],
+            'excerpt': post['excerpt'],
+            'content': post['content'],
+            'tags': post['tags']
+        }
+        for post in BLOG_POSTS
+    ]
+    for template, url in SEARCH_PAGES.items():
+        try:
+            title, text = _page_text(template)
+        except OSError as e:
+            log_error(f"Error indexing {template}: {e}")
+            continue
+        documents.append({
+            'id': f"page-{template}",
+            'type': 'page',
+            'url': url,
+            'title': title.split(' - ')[0] or template,
+            'content': text
+        })
+    return documents
+
+
+# Built once here; refresh_search_index() re-indexes whatever changed since
+search_index = SearchIndex(search_documents(), cache_size=Config.SEARCH_SUGGEST_CACHE_SIZE)
+_search_checked = time.monotonic()
+
+
+def refresh_search_index():
+    """Re-index changed content, at most every SEARCH_REFRESH_INTERVAL seconds"""
+    global _search_checked
+    now = time.monotonic()
+    if now - _search_checked < Config.SEARCH_REFRESH_INTERVAL:
+        return
+    _search_checked = now
+    search_index.update(search_documents())
+
 # ==================== HELPER FUNCTIONS ====================
 def get_stats():
     try:
@@ -76,8 +311,7 @@ def load_json_file(filepath, default=None):
         return default
     
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return json_cache.load(filepath)
     except json.JSONDecodeError as e:
         log_error(f"JSON decode error in {filepath}: {e}")
         return default
@@ -89,15 +323,124 @@ def load_json_file(filepath, default=None):
 def save_json_file(filepath, data):
     """Save data to JSON file"""
     try:
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        atomic_write_json(filepath, data, indent=2)
         return True
     except Exception as e:
         log_error(f"Error saving to {filepath}: {e}")
         return False
 
 
+def page_cache_key(vary_admin=True, vary_year=True):
+    """
+    Cache key for the current page
+    
+    Args:
+        vary_admin (bool): Separate entries for admin sessions (``is_admin``
+            is injected into every template)
+        vary_year (bool): Separate entries per ``current_year``
+    
+    Returns:
+        str: Cache key
+    """
+    key = f"page:{request.path}"
+    if vary_admin:
+        key += f"/admin={int(bool(session.get('is_admin')))}"
+    if vary_year:
+        key += f"/year={datetime.now().year}"
+    return key
+
+
+def cached_page(vary_admin=True, vary_year=True):
+    """
+    Decorator caching a view's response between deploys
+    
+    The lifetime comes from ``Config.PAGE_CACHE_TIMEOUTS`` for the view's
+    endpoint name, falling back to ``CACHE_DEFAULT_TIMEOUT``. Hits and
+    misses are counted as ``cache="page"``.
+    """
+    def decorator(f):
+        @wraps(f)
+        def render(*args, **kwargs):
+            g.page_cache_miss = True
+            return f(*args, **kwargs)
+        
+        cached = cache.cached(
+            timeout=Config.PAGE_CACHE_TIMEOUTS.get(f.__name__),
+            make_cache_key=lambda *args, **kwargs: page_cache_key(vary_admin, vary_year)
+        )(render)
+        
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            g.page_cache_miss = False
+            response = cached(*args, **kwargs)
+            metrics.inc(CACHE_MISSES if g.page_cache_miss else CACHE_HITS, cache='page')
+            return response
+        return decorated_function
+    return decorator
+
+
+def version_validator(vary_admin=True, vary_year=True, stats=False):
+    """
+    Build a validator deriving a page's ETag and Last-Modified from versions
+    
+    Args:
+        vary_admin (bool): Page differs for admin sessions
+        vary_year (bool): Page depends on ``current_year``
+        stats (bool): Page shows visitor statistics (adds the visitor
+            store's version token)
+    
+    Returns:
+        callable: Returns (etag, last_modified), or (None, None) if unknown
+    """
+    def validator():
+        version = f"{page_cache_key(vary_admin, vary_year)}@{DEPLOY_TIME.isoformat()}"
+        last_modified = DEPLOY_TIME
+        
+        if stats:
+            token, stats_modified = get_stats_version()
+            if token is None:
+                return None, None
+            version += f"/{token}"
+            if stats_modified:
+                last_modified = max(last_modified, stats_modified)
+        
+        return generate_etag(version.encode('utf-8')), last_modified
+    return validator
+
+
+def conditional(validator):
+    """
+    Decorator answering conditional GETs before the view runs
+    
+    ``If-None-Match``/``If-Modified-Since`` matching the validator get an
+    empty 304 without rendering anything; other responses carry the ETag
+    and Last-Modified so the browser can revalidate next time.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return f(*args, **kwargs)
+            
+            etag, last_modified = validator()
+            if etag is None:
+                return f(*args, **kwargs)
+            
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = app.response_class(status=304)
+            else:
+                response = app.make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag, weak=True)
+            response.last_modified = last_modified
+            response.cache_control.no_cache = True  # always revalidate
+            return response
+        return decorated_function
+    return decorator
+
+
 def require_admin(f):
     """Decorator for admin-only routes"""
     @wraps(f)
@@ -108,22 +451,150 @@ def require_admin(f):
     return decorated_function
 
 
+# ==================== INSTRUMENTATION ====================
+
+# Latency per endpoint and named spans (see instrumentation.py), exported
+# at /metrics. The timer starts in the first before_request hook and stops
+# in the last after_request hook, so both include the other hooks.
+
+# Methods counted by name (anything else is 'other', so clients cannot
+# create new series)
+METRICS_METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+
+@app.before_request
+def start_request_timer():
+    """Start timing the request"""
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Count the request and record its latency (runs after compression)"""
+    endpoint = request.endpoint or 'unmatched'
+    method = request.method if request.method in METRICS_METHODS else 'other'
+    metrics.inc(REQUESTS_TOTAL, endpoint=endpoint, method=method, status=response.status_code)
+    
+    # Unset when an earlier before_request hook (the limiter) answered
+    started = g.pop('request_started', None)
+    if started is not None:
+        metrics.histogram(REQUEST_SECONDS, endpoint=endpoint).observe(time.perf_counter() - started)
+    metrics.maybe_write_snapshot()
+    return response
+
+
+@before_render_template.connect_via(app)
+def start_render_timer(sender, template, context, **extra):
+    """Start timing a template render"""
+    g.setdefault('render_started', []).append(time.perf_counter())
+
+
+@template_rendered.connect_via(app)
+def record_render_time(sender, template, context, **extra):
+    """Record a template render as the 'render' span"""
+    metrics.observe_span('render', time.perf_counter() - g.render_started.pop())
+
+
+@metrics.collect
+def cache_counters():
+    """Hits and misses the JSON, compression and suggestion caches count"""
+    for name, hits, misses in (
+        ('json', json_cache.hits, json_cache.misses),
+        ('compression', compressor.hits, compressor.misses),
+        ('search', search_index.cache_hits, search_index.cache_misses)
+    ):
+        yield CACHE_HITS, {'cache': name}, hits
+        yield CACHE_MISSES, {'cache': name}, misses
+
+
+def metrics_authorized():
+    """An admin session, or the METRICS_TOKEN bearer token (for scrapers)"""
+    if session.get('is_admin'):
+        return True
+    token = Config.METRICS_TOKEN
+    return bool(token) and hmac.compare_digest(
+        request.headers.get('Authorization', ''), f"Bearer {token}"
+    )
+
+
+# ==================== PROFILING ====================
+
+# Opt-in stack sampling of live requests (see profiler.py); off unless
+# PROFILE_SAMPLE_RATE or the dashboard sets a rate, or a request sends
+# X-Profile
+profiler = RequestProfiler(
+    Config.PROFILE_DIR,
+    default_rate=Config.PROFILE_SAMPLE_RATE,
+    token=Config.PROFILE_TOKEN,
+    interval=Config.PROFILE_INTERVAL
+)
+
+
+@app.before_request
+def start_profiling():
+    """Sample this request's stacks if it was picked or asked for it"""
+    if is_asset_request():
+        return
+    header = request.headers.get('X-Profile')
+    if profiler.wanted(header, is_admin=bool(header) and session.get('is_admin', False)):
+        profiler.begin(request.endpoint or 'unmatched')
+        g.profiling = True
+
+
+@app.teardown_request
+def stop_profiling(exc):
+    """Stop sampling once the response is complete"""
+    if g.pop('profiling', False):
+        profiler.end()
+
+
 # ==================== BEFORE REQUEST ====================
 
 @app.before_request
 def before_request():
     """Track visitors before each request"""
+    if is_asset_request():
+        return
     if request.endpoint == 'home':
         ip = request.remote_addr or "127.0.0.1"
         user_agent = request.headers.get("User-Agent", "Unknown")
         track_visitor(ip, user_agent)
 
 
+# ==================== AFTER REQUEST ====================
+
+# after_request hooks run in reverse order of registration: compression is
+# registered first (after the metrics hook) so it sees the final body and ETag
+
+@app.after_request
+def compress_response(response):
+    """Compress text responses; cached pages reuse their compressed body"""
+    if not Config.COMPRESS_ENABLED:
+        return response
+    
+    cache_key = None
+    if request.endpoint in Config.PAGE_CACHE_TIMEOUTS and 'ETag' in response.headers:
+        cache_key = f"{request.endpoint}:{response.headers['ETag']}"
+    return compressor.compress_response(response, request.accept_encodings, cache_key)
+
+
+@app.after_request
+def add_etag(response):
+    """Give other successful GET responses a content-hash ETag (304 on match)"""
+    if (request.method in ('GET', 'HEAD') and response.status_code == 200
+            and not response.direct_passthrough and not response.is_streamed
+            and 'ETag' not in response.headers):
+        response.add_etag()
+        response.make_conditional(request)
+    return response
+
+
 # ==================== ERROR HANDLERS ====================
 
 @app.errorhandler(404)
 def not_found_error(error):
-    """Handle 404 errors"""
+    """Handle 404 errors (a plain one for missing assets)"""
+    if is_asset_request():
+        return "Not Found", 404
     return render_template('404.html'), 404
 
 
@@ -137,6 +608,7 @@ def internal_error(error):
 @app.errorhandler(429)
 def ratelimit_handler(e):
     """Handle rate limit errors"""
+    metrics.inc(RATELIMIT_REJECTIONS, endpoint=request.endpoint or 'unmatched')
     return jsonify(error="Rate limit exceeded. Please try again later."), 429
 
 
@@ -144,9 +616,10 @@ def ratelimit_handler(e):
 
 @app.route("/favicon.ico")
 def favicon():
-    """Serve favicon"""
+    """Serve favicon (the optimized build when present)"""
+    optimized = os.path.join(IMAGES_DIST, "favicon.ico")
     return send_file(
-        os.path.join(app.root_path, "static/images/favicon.ico"),
+        optimized if os.path.exists(optimized) else os.path.join(app.root_path, "static/images/favicon.ico"),
         mimetype="image/x-icon"
     )
 
@@ -163,18 +636,52 @@ def manifest():
 @app.route("/robots.txt")
 def robots():
     """Serve robots.txt for SEO"""
-    return send_file("static/robots.txt", mimetype="text/plain")
+    return send_file(os.path.join(app.static_folder, "robots.txt"), mimetype="text/plain")
 
 
 @app.route("/sitemap.xml")
 def sitemap():
     """Serve sitemap for SEO"""
-    return send_file("static/sitemap.xml", mimetype="application/xml")
+    return send_file(os.path.join(app.static_folder, "sitemap.xml"), mimetype="application/xml")
+
+
+# ==================== STATIC FILES ====================
+
+# Fingerprinted bundle files never change under the same name
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def static_file(filename):
+    """
+    Serve static files; fingerprinted bundle files (see assets.py) are sent
+    precompressed by Accept-Encoding and cached as immutable
+    """
+    entry = bundle_entry(filename)
+    if entry is None:
+        return app.send_static_file(filename)
+    
+    encoding, path = precompressed_variant(entry, request.accept_encodings)
+    response = send_from_directory(
+        app.static_folder, path,
+        mimetype=mimetypes.guess_type(filename)[0]
+    )
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    response.cache_control.max_age = IMMUTABLE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+
+app.view_functions['static'] = static_file
 
 
 # ==================== MAIN PAGES ====================
 
 @app.route("/", methods=["GET", "HEAD"])
+@conditional(version_validator(stats=True))
 def home():
     """Homepage"""
     stats = get_visitor_stats()
@@ -186,77 +693,27 @@ def home():
 
 
 @app.route("/about")
+@conditional(version_validator())
+@cached_page()
 def about():
     """About page"""
     return render_template("about.html")
 
 
 @app.route("/projects")
+@conditional(version_validator())
+@cached_page()
 def projects():
     """Projects showcase page"""
-    projects_data = [
-        {
-            "id": 1,
-            "title": "TheGranito Portfolio",
-            "description": "Professional portfolio website with PWA support, admin dashboard, and analytics",
-            "tech": ["Python", "Flask", "JavaScript", "Bootstrap", "PWA"],
-            "github": "https://github.com/uttamkumar95446-bot/TheGranito",
-            "live": "https://thegranito.onrender.com",
-            "image": "project1.jpg",
-            "featured": True
-        },
-        {
-            "id": 2,
-            "title": "E-Commerce Platform",
-            "description": "Full-stack e-commerce solution with payment integration",
-            "tech": ["Python", "Flask", "SQLite", "Stripe API"],
-            "github": "#",
-            "live": "#",
-            "image": "project2.jpg",
-            "featured": False
-        },
-        {
-            "id": 3,
-            "title": "Blog CMS",
-            "description": "Content management system for blogs with Markdown support",
-            "tech": ["Flask", "SQLAlchemy", "Markdown", "TinyMCE"],
-            "github": "#",
-            "live": "#",
-            "image": "project3.jpg",
-            "featured": False
-        }
-    ]
-    
-    return render_template("projects.html", projects=projects_data)
+    return render_template("projects.html", projects=PROJECTS)
 
 
 @app.route("/blog")
+@conditional(version_validator())
+@cached_page()
 def blog():
     """Blog page"""
-    blog_posts = [
-        {
-            "id": 1,
-            "title": "My Journey in Web Development",
-            "excerpt": "Starting my journey as a web developer and the lessons learned along the way...",
-            "content": "Full blog post content here...",
-            "author": "Uttam Kumar",
-            "date": "2024-01-15",
-            "tags": ["Web Development", "Career", "Learning"],
-            "image": "blog1.jpg"
-        },
-        {
-            "id": 2,
-            "title": "Building Progressive Web Apps with Flask",
-            "excerpt": "A comprehensive guide to creating PWAs using Python Flask framework...",
-            "content": "Full blog post content here...",
-            "author": "Uttam Kumar",
-            "date": "2024-01-20",
-            "tags": ["PWA", "Flask", "Tutorial"],
-            "image": "blog2.jpg"
-        }
-    ]
-    
-    return render_template("blog.html", posts=blog_posts)
+    return render_template("blog.html", posts=BLOG_POSTS)
 
 
 @app.route("/contact", methods=["GET", "POST"])
@@ -289,9 +746,14 @@ def contact():
                 "status": "new"
             }
             
-            contacts = load_json_file(CONTACTS_FILE)
-            contacts.append(contact_data)
-            save_json_file(CONTACTS_FILE, contacts)
+            if mailer is not None:
+                contact_data["delivery"] = QUEUED
+            
+            contact_store.append(contact_data)
+            
+            # Sent by a background worker, never inline
+            if mailer is not None:
+                mailer.notify(contact_data)
             
             return jsonify(success=True, message="Message sent successfully!")
             
@@ -303,6 +765,8 @@ def contact():
 
 
 @app.route("/offline")
+@conditional(version_validator())
+@cached_page()
 def offline():
     """Offline page for PWA"""
     return render_template("offline.html")
@@ -339,36 +803,161 @@ def admin_logout():
 @app.route("/admin")
 @require_admin
 def admin():
-    """Admin dashboard"""
-    contacts = load_json_file(CONTACTS_FILE)
+    """Admin dashboard with a paginated, filterable contacts inbox"""
+    status = request.args.get('status') or None
+    if status not in CONTACT_STATUSES:
+        status = None
+    email = request.args.get('email', '').strip() or None
+    page = max(request.args.get('page', 1, type=int), 1)
+    offset = (page - 1) * CONTACTS_PER_PAGE
+    
+    contacts, total = contact_store.query(
+        status=status,
+        email=email,
+        offset=offset,
+        limit=CONTACTS_PER_PAGE
+    )
     stats = get_visitor_stats()
     
     return render_template(
         "admin.html",
         contacts=contacts,
-        stats=stats
+        stats=stats,
+        status_counts=contact_store.status_counts(),
+        statuses=CONTACT_STATUSES,
+        status=status,
+        email=email or '',
+        page=page,
+        offset=offset,
+        pages=max((total + CONTACTS_PER_PAGE - 1) // CONTACTS_PER_PAGE, 1),
+        total=total,
+        profile=profiler.summary(),
+        profile_rate=profiler.rate,
+        updated=datetime.utcnow()
     )
 
 
-@app.route("/admin/contacts/delete/<int:index>", methods=["POST"])
+@app.route("/admin/profiler", methods=["POST"])
 @require_admin
-def delete_contact(index):
+def admin_profiler():
+    """Set the profiled share of requests (percent) or clear the profiles"""
+    if request.form.get('action') == 'clear':
+        profiler.clear()
+    else:
+        try:
+            profiler.set_rate(float(request.form.get('rate', 0)) / 100)
+        except ValueError:
+            return jsonify(success=False, error="rate must be a number"), 400
+    return redirect(url_for('admin', _anchor='profiler'))
+
+
+@app.route("/admin/profiler/stacks")
+@require_admin
+def admin_profiler_stacks():
+    """
+    Download collapsed stacks (flamegraph.pl, speedscope, inferno)
+    
+    Query parameter ``view`` limits the profile to one endpoint;
+    otherwise every stack is rooted at its endpoint's name.
+    """
+    endpoint = request.args.get('view') or None
+    response = app.response_class(profiler.collapsed(endpoint), mimetype='text/plain')
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename="profile-{secure_filename(endpoint or "all")}-{datetime.utcnow():%Y%m%d-%H%M}.txt"'
+    )
+    response.cache_control.no_store = True
+    return response
+
+
+@app.route("/admin/contacts/<contact_id>/delete", methods=["POST"])
+@require_admin
+def delete_contact(contact_id):
     """Delete a contact"""
     try:
-        contacts = load_json_file(CONTACTS_FILE)
-        if 0 <= index < len(contacts):
-            contacts.pop(index)
-            save_json_file(CONTACTS_FILE, contacts)
+        if contact_store.delete(contact_id):
             return jsonify(success=True)
-        return jsonify(success=False, error="Invalid index"), 400
+        return jsonify(success=False, error="Contact not found"), 404
     except Exception as e:
         log_error(f"Delete contact error: {e}")
         return jsonify(success=False, error=str(e)), 500
 
 
+@app.route("/admin/contacts/<contact_id>/status", methods=["POST"])
+@require_admin
+def update_contact_status(contact_id):
+    """Move a contact to another inbox state"""
+    status = request.form.get('status') or (request.get_json(silent=True) or {}).get('status')
+    if status not in CONTACT_STATUSES:
+        return jsonify(success=False, error="Invalid status"), 400
+    
+    try:
+        if contact_store.update(contact_id, status=status):
+            return jsonify(success=True)
+        return jsonify(success=False, error="Contact not found"), 404
+    except Exception as e:
+        log_error(f"Update contact error: {e}")
+        return jsonify(success=False, error=str(e)), 500
+
+
+# Streaming visitor export formats: (encoder, mimetype)
+EXPORT_FORMATS = {
+    'csv': (iter_visitors_csv, 'text/csv'),
+    'ndjson': (iter_visitors_ndjson, 'application/x-ndjson')
+}
+
+
+@app.route("/admin/visitors/export")
+@require_admin
+def export_visitors():
+    """
+    Stream the visitor history as CSV or NDJSON
+    
+    Query parameters: ``format`` (csv or ndjson), ``start``/``end`` (ISO
+    dates, inclusive) and ``page``. Rows are read from the store and sent
+    one at a time, so memory use does not grow with the history.
+    """
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify(error=f"Unsupported format: {fmt}"), 400
+    
+    try:
+        start, end = (
+            datetime.fromisoformat(request.args[name]).date() if request.args.get(name) else None
+            for name in ('start', 'end')
+        )
+    except ValueError:
+        return jsonify(error="start and end must be ISO dates (YYYY-MM-DD)"), 400
+    
+    encode, mimetype = EXPORT_FORMATS[fmt]
+    rows = encode(iter_visitors(start=start, end=end, page=request.args.get('page') or None))
+    
+    response = app.response_class(rows, mimetype=mimetype)
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename="visitors-{datetime.utcnow():%Y%m%d}.{fmt}"'
+    )
+    response.cache_control.no_store = True
+    return response
+
+
+@app.route("/metrics")
+@limiter.limit("10 per minute", exempt_when=metrics_authorized)
+def metrics_endpoint():
+    """Prometheus metrics of every worker (admin session or bearer token)"""
+    if not metrics_authorized():
+        response = jsonify(error="Unauthorized")
+        response.status_code = 401
+        response.headers['WWW-Authenticate'] = 'Bearer'
+        return response
+    
+    response = app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+    response.cache_control.no_store = True
+    return response
+
+
 # ==================== API ROUTES ====================
 
 @app.route("/api/stats")
+@conditional(version_validator(vary_admin=False, vary_year=False, stats=True))
 def api_stats():
     """Get visitor statistics"""
     stats = get_visitor_stats()
@@ -376,6 +965,8 @@ def api_stats():
 
 
 @app.route("/api/skills")
+@conditional(version_validator(vary_admin=False, vary_year=False))
+@cached_page(vary_admin=False, vary_year=False)
 def api_skills():
     """Get skills data"""
     skills = {
@@ -398,6 +989,24 @@ def api_skills():
     return jsonify(skills)
 
 
+@app.route("/api/search")
+def api_search():
+    """Typeahead suggestions, with lookup time and cache status in headers"""
+    query = request.args.get('q', '')[:Config.SEARCH_MAX_QUERY]
+
+    started = time.perf_counter()
+    refresh_search_index()
+    suggestions, cached = search_index.suggest(query, limit=Config.SEARCH_SUGGEST_LIMIT)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    response = jsonify(query=query, **suggestions)
+    response.headers['Server-Timing'] = f'search;dur={elapsed:.3f};desc="{"hit" if cached else "miss"}"'
+    response.headers['X-Search-Cache'] = 'HIT' if cached else 'MISS'
+    response.cache_control.public = True
+    response.cache_control.max_age = Config.SEARCH_API_MAX_AGE
+    return response
+
+
 @app.route("/download-resume")
 def download_resume():
     """Download resume"""
@@ -411,10 +1020,13 @@ def download_resume():
 
 @app.route("/search")
 def search():
-    """Search functionality"""
-    query = request.args.get('q', '')
-    # Implement search logic here
-    return render_template("search.html", query=query, results=[])
+    """Search projects, blog posts and pages"""
+    query = request.args.get('q', '').strip()[:Config.SEARCH_MAX_QUERY]
+    results = []
+    if query:
+        refresh_search_index()
+        results = search_index.search(query, limit=Config.SEARCH_RESULTS_LIMIT)
+    return render_template("search.html", query=query, results=results)
 
 
 @app.route("/share")
@@ -0,0 +1,580 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - ASSET PIPELINE
+Version: 2.0
+==========================================
+"""
+
+import os
+import sys
+import gzip
+import shutil
+import hashlib
+import logging
+
+from markupsafe import Markup, escape
+
+from utils import json_cache, atomic_write_json
+
+try:
+    from PIL import Image
+except ImportError:  # build time only - templates fall back to the originals
+    Image = None
+
+try:
+    import pillow_avif  # noqa: F401 - registers the AVIF encoder with Pillow
+except ImportError:
+    pass
+
+try:
+    import rcssmin
+    import rjsmin
+except ImportError:  # bundles are fingerprinted and compressed but not minified
+    rcssmin = rjsmin = None
+
+try:
+    import brotli
+except ImportError:  # only .gz siblings are written
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# File paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+IMAGES_DIR = os.path.join(STATIC_DIR, "images")
+IMAGES_DIST = os.path.join(IMAGES_DIR, "dist")
+IMAGE_MANIFEST = os.path.join(IMAGES_DIST, "manifest.json")
+BUNDLE_DIST = os.path.join(STATIC_DIR, "dist")
+BUNDLE_MANIFEST = os.path.join(BUNDLE_DIST, "manifest.json")
+
+KB = 1024
+
+# Source image -> widths to produce, output formats (preferred first; the
+# last one is the fallback every browser understands) and the size budget
+# each produced file must stay under
+IMAGE_SPECS = {
+    'favicon.ico': {'widths': [16, 32, 48], 'formats': ['ico'], 'budget': 16 * KB},
+    'favicon-16x16.png': {'widths': [16], 'formats': ['png'], 'budget': 2 * KB},
+    'favicon-32x32.png': {'widths': [32], 'formats': ['png'], 'budget': 4 * KB},
+    'apple-touch-icon.png': {'widths': [180], 'formats': ['png'], 'budget': 16 * KB},
+    'icon-192x192.png': {'widths': [192], 'formats': ['png'], 'budget': 16 * KB},
+    'icon-512x512.png': {'widths': [512], 'formats': ['png'], 'budget': 64 * KB},
+    'logo.png': {'widths': [128, 256, 512], 'formats': ['avif', 'webp', 'png'], 'budget': 64 * KB},
+    'logo-white.png': {'widths': [128, 256, 512], 'formats': ['avif', 'webp', 'png'], 'budget': 64 * KB},
+    'profile.jpg': {'widths': [320, 640], 'formats': ['avif', 'webp', 'jpeg'], 'budget': 64 * KB},
+    'social-preview.png': {'widths': [1024], 'formats': ['webp', 'jpeg'], 'budget': 128 * KB},
+}
+
+# Encoder settings per output format
+SAVE_OPTIONS = {
+    'avif': {'quality': 55},
+    'webp': {'quality': 80, 'method': 6},
+    'png': {'optimize': True},
+    'jpeg': {'quality': 82, 'optimize': True, 'progressive': True},
+    'ico': {},
+}
+
+# Stylesheets and scripts (relative to static/) served under content-hashed
+# names; sw.js keeps its stable URL because a service worker's URL is its
+# identity
+BUNDLE_FILES = ['css/style.css', 'js/script.js']
+
+# Precompressed siblings written next to each bundle file, preferred first
+# (Content-Encoding, file extension)
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+EXTENSIONS = {'jpeg': 'jpg'}
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'png': 'image/png', 'jpeg': 'image/jpeg'}
+
+
+# ==================== IMAGE BUILD ====================
+
+def _can_encode(fmt):
+    """Check whether Pillow can write a format (AVIF needs a plugin)"""
+    Image.init()  # encoders register lazily
+    return fmt.upper() in Image.SAVE
+
+
+def _prepare(image, fmt):
+    """Convert an image to a mode the target format can store"""
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.convert('RGBA').getchannel('A'))
+        return background
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    if fmt == 'png':
+        # 256-colour palette (like pngquant): a fraction of the size of
+        # truecolour, with alpha kept
+        return image.quantize(256, method=Image.Quantize.FASTOCTREE)
+    return image
+
+
+def build_images(specs=None, source_dir=IMAGES_DIR, output_dir=IMAGES_DIST):
+    """
+    Produce resized, recompressed variants of every declared image
+
+    Args:
+        specs (dict): Image specs (defaults to IMAGE_SPECS)
+        source_dir (str): Directory holding the original images
+        output_dir (str): Directory the variants and manifest are written to
+
+    Returns:
+        dict: Manifest (source name -> dimensions, budget and variants)
+    """
+    if Image is None:
+        raise RuntimeError("Pillow is required to build images: pip install Pillow")
+
+    specs = specs or IMAGE_SPECS
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {}
+
+    for name, spec in specs.items():
+        source_path = os.path.join(source_dir, name)
+        if not os.path.exists(source_path):
+            logger.warning(f"Skipping missing image {name}")
+            continue
+
+        stem = os.path.splitext(name)[0]
+        source = Image.open(source_path)
+        source.load()
+
+        variants = []
+        for fmt in spec['formats']:
+            if not _can_encode(fmt):
+                logger.warning(f"Skipping {fmt} variants of {name}: no encoder installed")
+                continue
+
+            if fmt == 'ico':
+                # One file holding every size
+                path = os.path.join(output_dir, f"{stem}.ico")
+                _prepare(source, fmt).save(path, sizes=[(w, w) for w in spec['widths']])
+                variants.append(_variant(path, fmt, max(spec['widths']), max(spec['widths'])))
+                continue
+
+            for width in spec['widths']:
+                # Never upscale; a smaller source is used at its own size
+                width = min(width, source.width)
+                height = round(source.height * width / source.width)
+                path = os.path.join(output_dir, f"{stem}-{width}.{EXTENSIONS.get(fmt, fmt)}")
+
+                resized = source.resize((width, height), Image.LANCZOS)
+                _prepare(resized, fmt).save(path, fmt.upper(), **SAVE_OPTIONS[fmt])
+                variants.append(_variant(path, fmt, width, height))
+
+        largest = max(variants, key=lambda v: v['width']) if variants else None
+        manifest[name] = {
+            'width': largest['width'] if largest else source.width,
+            'height': largest['height'] if largest else source.height,
+            'original_bytes': os.path.getsize(source_path),
+            'budget': spec['budget'],
+            'fallback': spec['formats'][-1],
+            'variants': variants
+        }
+
+    atomic_write_json(os.path.join(output_dir, "manifest.json"), manifest, indent=2)
+    return manifest
+
+
+def _variant(path, fmt, width, height):
+    """Manifest entry for a written variant"""
+    return {
+        'file': os.path.relpath(path, STATIC_DIR).replace(os.sep, '/'),
+        'format': fmt,
+        'width': width,
+        'height': height,
+        'bytes': os.path.getsize(path)
+    }
+
+
+def check_budgets(manifest, static_dir=STATIC_DIR):
+    """
+    Find variants larger than their image's size budget
+
+    Sizes are read from disk, so edits made after the build are caught.
+
+    Args:
+        manifest (dict): Image manifest
+        static_dir (str): Directory the variant paths are relative to
+
+    Returns:
+        list: (file, bytes, budget) for every variant over budget
+    """
+    failures = []
+    for entry in manifest.values():
+        for variant in entry['variants']:
+            path = os.path.join(static_dir, variant['file'])
+            size = os.path.getsize(path) if os.path.exists(path) else variant['bytes']
+            if size > entry['budget']:
+                failures.append((variant['file'], size, entry['budget']))
+    return failures
+
+
+def format_report(manifest):
+    """
+    Summarise the bytes saved per image
+
+    "Fallback" is the largest variant in the format every browser accepts;
+    "best" is the smallest file a modern browser picks at that width.
+
+    Args:
+        manifest (dict): Image manifest
+
+    Returns:
+        str: Printable table
+    """
+    lines = [f"{'image':<22}{'original':>12}{'fallback':>12}{'best':>12}{'saved':>12}"]
+    total_original = total_best = 0
+
+    for name, entry in manifest.items():
+        largest = [v for v in entry['variants'] if v['width'] == entry['width']]
+        if not largest:
+            continue
+        fallback = next((v for v in largest if v['format'] == entry['fallback']), largest[-1])
+        best = min(largest, key=lambda v: v['bytes'])
+
+        total_original += entry['original_bytes']
+        total_best += best['bytes']
+        lines.append(
+            f"{name:<22}{entry['original_bytes']:>12,}{fallback['bytes']:>12,}"
+            f"{best['bytes']:>12,}{entry['original_bytes'] - best['bytes']:>12,}"
+        )
+
+    lines.append(f"{'total':<22}{total_original:>12,}{'':>12}{total_best:>12,}"
+                 f"{total_original - total_best:>12,}")
+    return '\n'.join(lines)
+
+
+# ==================== TEMPLATE HELPERS ====================
+
+def load_image_manifest():
+    """
+    Load the image manifest (cached until the file changes)
+
+    Returns:
+        dict: Manifest, or an empty dict if the pipeline has not been run
+    """
+    try:
+        if os.path.exists(IMAGE_MANIFEST):
+            return json_cache.load(IMAGE_MANIFEST)
+    except Exception as e:
+        logger.error(f"Error loading image manifest: {e}")
+    return {}
+
+
+def _static_url(filename):
+    from flask import url_for
+    return url_for('static', filename=filename)
+
+
+def image_url(name, width=None):
+    """
+    URL of an image in its fallback format
+
+    Args:
+        name (str): Source image name in static/images
+        width (int): Smallest acceptable width (default: largest variant)
+
+    Returns:
+        str: Variant URL, or the original image if no variant exists
+    """
+    entry = load_image_manifest().get(name)
+    if entry:
+        variants = sorted((v for v in entry['variants'] if v['format'] == entry['fallback']),
+                          key=lambda v: v['width'])
+        if variants:
+            chosen = next((v for v in variants if width and v['width'] >= width), variants[-1])
+            return _static_url(chosen['file'])
+    return _static_url(f"images/{name}")
+
+
+def image_srcset(name, fmt=None):
+    """
+    ``srcset`` value listing every width of an image in one format
+
+    Args:
+        name (str): Source image name in static/images
+        fmt (str): Output format (default: the fallback format)
+
+    Returns:
+        str: e.g. "/static/images/dist/logo-128.png 128w, ..." or "" if unknown
+    """
+    entry = load_image_manifest().get(name)
+    if not entry:
+        return ""
+    fmt = fmt or entry['fallback']
+    return ', '.join(f"{_static_url(v['file'])} {v['width']}w"
+                     for v in sorted(entry['variants'], key=lambda v: v['width'])
+                     if v['format'] == fmt)
+
+
+def responsive_image(name, alt="", sizes="100vw", **attrs):
+    """
+    Render a ``<picture>`` offering every format and width of an image
+
+    Falls back to a plain ``<img>`` of the original when the pipeline has
+    not been run.
+
+    Args:
+        name (str): Source image name in static/images
+        alt (str): Alternative text
+        sizes (str): ``sizes`` attribute (rendered width of the image)
+        **attrs: Extra ``<img>`` attributes (class, style, loading, ...)
+
+    Returns:
+        Markup: HTML
+    """
+    entry = load_image_manifest().get(name)
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    extra = ''.join(f' {escape(key)}="{escape(value)}"' for key, value in attrs.items())
+
+    if not entry or not entry['variants']:
+        return Markup(f'<img src="{escape(_static_url("images/" + name))}" alt="{escape(alt)}"{extra}>')
+
+    sources = ''.join(
+        f'<source type="{MIME_TYPES[fmt]}" srcset="{escape(image_srcset(name, fmt))}" sizes="{escape(sizes)}">'
+        for fmt in dict.fromkeys(v['format'] for v in entry['variants'])
+        if fmt != entry['fallback'] and fmt in MIME_TYPES
+    )
+    return Markup(
+        f'<picture>{sources}'
+        f'<img src="{escape(image_url(name))}" srcset="{escape(image_srcset(name))}" '
+        f'sizes="{escape(sizes)}" width="{entry["width"]}" height="{entry["height"]}" '
+        f'alt="{escape(alt)}"{extra}></picture>'
+    )
+
+
+# ==================== STATIC BUNDLE ====================
+
+def _digest(data):
+    """Short content hash used in fingerprinted names"""
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def minify(source, extension):
+    """
+    Minify CSS or JavaScript source
+
+    Args:
+        source (str): File contents
+        extension (str): '.css' or '.js'
+
+    Returns:
+        str: Minified source (unchanged if no minifier is installed)
+    """
+    if rcssmin is None:
+        return source
+    if extension == '.css':
+        return rcssmin.cssmin(source)
+    if extension == '.js':
+        return rjsmin.jsmin(source)
+    return source
+
+
+def build_bundle(files=None, static_dir=STATIC_DIR, output_dir=BUNDLE_DIST):
+    """
+    Minify stylesheets and scripts into fingerprinted, precompressed files
+
+    ``css/style.css`` becomes ``dist/css/style.<hash>.css`` plus ``.gz``
+    and ``.br`` siblings. The output directory is rebuilt from scratch.
+
+    Args:
+        files (list): Source files relative to static_dir (defaults to BUNDLE_FILES)
+        static_dir (str): Static folder
+        output_dir (str): Directory the bundle and manifest are written to
+
+    Returns:
+        dict: Manifest (source name -> fingerprinted file and sizes)
+    """
+    if rcssmin is None:
+        logger.warning("rcssmin/rjsmin not installed; bundling without minifying")
+    if brotli is None:
+        logger.warning("Brotli not installed; writing .gz siblings only")
+
+    files = files or BUNDLE_FILES
+    shutil.rmtree(output_dir, ignore_errors=True)
+    manifest = {}
+
+    for name in files:
+        with open(os.path.join(static_dir, name), 'rb') as f:
+            source = f.read()
+
+        root, extension = os.path.splitext(name)
+        minified = minify(source.decode('utf-8'), extension).encode('utf-8')
+        fingerprinted = f"{root}.{_digest(minified)}{extension}"
+        path = os.path.join(output_dir, fingerprinted)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(path, 'wb') as f:
+            f.write(minified)
+
+        entry = {
+            'file': os.path.relpath(path, static_dir).replace(os.sep, '/'),
+            'source_hash': _digest(source),
+            'bytes': len(source),
+            'minified_bytes': len(minified),
+            'encodings': {}
+        }
+
+        compressed = {'gzip': gzip.compress(minified, 9, mtime=0)}
+        if brotli is not None:
+            compressed['br'] = brotli.compress(minified, quality=11)
+
+        for encoding, extension in PRECOMPRESSED:
+            data = compressed.get(encoding)
+            if data is not None and len(data) < len(minified):
+                with open(path + extension, 'wb') as f:
+                    f.write(data)
+                entry['encodings'][encoding] = len(data)
+
+        manifest[name] = entry
+
+    atomic_write_json(os.path.join(output_dir, "manifest.json"), manifest, indent=2)
+    return manifest
+
+
+def check_bundle(manifest, static_dir=STATIC_DIR):
+    """
+    Find bundle entries whose source changed since the last build
+
+    Args:
+        manifest (dict): Bundle manifest
+        static_dir (str): Static folder
+
+    Returns:
+        list: Source names that need a rebuild
+    """
+    stale = []
+    for name, entry in manifest.items():
+        try:
+            with open(os.path.join(static_dir, name), 'rb') as f:
+                if _digest(f.read()) != entry['source_hash']:
+                    stale.append(name)
+        except OSError:
+            stale.append(name)
+    return stale
+
+
+def format_bundle_report(manifest):
+    """
+    Summarise bundle sizes per file
+
+    Args:
+        manifest (dict): Bundle manifest
+
+    Returns:
+        str: Printable table
+    """
+    lines = [f"{'file':<22}{'source':>10}{'minified':>10}{'gzip':>10}{'br':>10}"]
+    for name, entry in manifest.items():
+        compressed = [f"{entry['encodings'][encoding]:,}" if encoding in entry['encodings'] else '-'
+                      for encoding in ('gzip', 'br')]
+        lines.append(f"{name:<22}{entry['bytes']:>10,}{entry['minified_bytes']:>10,}"
+                     f"{compressed[0]:>10}{compressed[1]:>10}")
+    return '\n'.join(lines)
+
+
+def load_bundle_manifest():
+    """
+    Load the bundle manifest (cached until the file changes)
+
+    Returns:
+        dict: Manifest, or an empty dict if the bundle has not been built
+    """
+    try:
+        if os.path.exists(BUNDLE_MANIFEST):
+            return json_cache.load(BUNDLE_MANIFEST)
+    except Exception as e:
+        logger.error(f"Error loading bundle manifest: {e}")
+    return {}
+
+
+def asset_url(filename):
+    """
+    ``url_for('static', filename=...)`` resolving to the fingerprinted build
+
+    Debug mode and unbuilt files use the source file so edits show up
+    without a rebuild.
+
+    Args:
+        filename (str): Source file relative to static/
+
+    Returns:
+        str: URL
+    """
+    from flask import current_app
+
+    entry = None if current_app.debug else load_bundle_manifest().get(filename)
+    return _static_url(entry['file'] if entry else filename)
+
+
+def bundle_entry(filename):
+    """
+    Manifest entry of a fingerprinted file
+
+    Args:
+        filename (str): Path relative to static/ (e.g. dist/css/style.<hash>.css)
+
+    Returns:
+        dict: Entry, or None if the file is not part of the bundle
+    """
+    if not filename.startswith('dist/'):
+        return None
+    for entry in load_bundle_manifest().values():
+        if entry['file'] == filename:
+            return entry
+    return None
+
+
+def precompressed_variant(entry, accept_encodings):
+    """
+    Pick the precompressed sibling a client accepts
+
+    Args:
+        entry (dict): Bundle manifest entry
+        accept_encodings: The request's parsed ``Accept-Encoding``
+
+    Returns:
+        tuple: (Content-Encoding or None, file relative to static/)
+    """
+    for encoding, extension in PRECOMPRESSED:
+        if encoding in entry['encodings'] and accept_encodings.quality(encoding) > 0:
+            return encoding, entry['file'] + extension
+    return None, entry['file']
+
+
+# ==================== COMMAND LINE ====================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build optimized images and the static bundle")
+    parser.add_argument('--check', action='store_true',
+                        help="only verify image budgets and that the bundle is up to date")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.check:
+        manifest = load_image_manifest()
+        bundle = load_bundle_manifest()
+        if not manifest or not bundle:
+            sys.exit("No asset manifests found; run python assets.py first")
+    else:
+        manifest = build_images()
+        print(format_report(manifest))
+        bundle = build_bundle()
+        print()
+        print(format_bundle_report(bundle))
+
+    failures = check_budgets(manifest)
+    for file, size, budget in failures:
+        print(f"OVER BUDGET: {file} is {size:,} bytes (budget {budget:,})")
+
+    stale = check_bundle(bundle)
+    for name in stale:
+        print(f"STALE BUNDLE: {name} changed since the last build")
+
+    sys.exit(1 if failures or stale else 0)
@@ -0,0 +1,94 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - COMPRESSION BENCHMARK
+==========================================
+
+Renders the heaviest pages and JSON responses once, then measures the CPU
+time per response and the bytes saved for gzip and brotli at each level,
+plus a cache hit of the compressed-body cache for comparison.
+
+Usage:
+    python benchmarks/bench_compression.py [--repeat 50]
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from compression import Compressor, compress, brotli  # noqa: E402
+
+PAGES = ['/blog', '/contact', '/', '/api/skills']
+LEVELS = {
+    'gzip': [1, 4, 6, 9],
+    'br': [1, 4, 5, 6, 9, 11],
+}
+
+
+def render_bodies():
+    """Uncompressed body of every page in PAGES"""
+    workdir = tempfile.mkdtemp(prefix="granito-bench-")
+    os.chdir(workdir)
+    logging.disable(logging.WARNING)
+
+    try:
+        import app as portfolio  # noqa: E402
+
+        portfolio.limiter.enabled = False
+        portfolio.Config.COMPRESS_ENABLED = False
+        client = portfolio.app.test_client()
+        return {path: client.get(path).get_data() for path in PAGES}
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def cost(data, encoding, level, repeat):
+    """Average compression time in microseconds and the compressed size"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        compressed = compress(data, encoding, level)
+    return (time.perf_counter() - started) / repeat * 1e6, len(compressed)
+
+
+def cache_hit_cost(data, repeat):
+    """Average time in microseconds to fetch a compressed body from the cache"""
+    compressor = Compressor()
+    encoding = 'br' if brotli is not None else 'gzip'
+    compressor._compressed(data, encoding, 'bench')
+    started = time.perf_counter()
+    for _ in range(repeat):
+        compressor._compressed(data, encoding, 'bench')
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--repeat', type=int, default=50, help="Compressions per page and level")
+    args = parser.parse_args()
+
+    bodies = render_bodies()
+    encodings = [encoding for encoding in LEVELS if encoding != 'br' or brotli is not None]
+    if brotli is None:
+        print("Brotli not installed; measuring gzip only\n")
+
+    for path, data in bodies.items():
+        print(f"{path} ({len(data):,} bytes)")
+        print(f"  {'encoding':<10}{'level':>6}{'bytes':>10}{'saved':>9}{'us/resp':>10}{'KB saved/ms':>13}")
+        for encoding in encodings:
+            for level in LEVELS[encoding]:
+                micros, size = cost(data, encoding, level, args.repeat)
+                saved = len(data) - size
+                print(f"  {encoding:<10}{level:>6}{size:>10,}{saved / len(data):>9.1%}"
+                      f"{micros:>10.0f}{saved / 1024 / (micros / 1000):>13.1f}")
+        print(f"  {'cache hit':<16}{'':>19}{cache_hit_cost(data, args.repeat * 10):>10.1f}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - CONTACT JOURNAL BENCHMARK
+==========================================
+
+Compares the cost of saving one contact submission with the old full-list
+read-modify-write of contacts.json against a ContactJournal commit, for
+growing inbox sizes. With --crash it instead kills writer processes in the
+middle of commits and compactions and checks that every acknowledged
+contact, status change and deletion survived.
+
+Usage:
+    python benchmarks/bench_contact_journal.py [--sizes 100 10000 100000]
+    python benchmarks/bench_contact_journal.py --crash [--rounds 20]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import signal
+import shutil
+import logging
+import argparse
+import tempfile
+import multiprocessing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import contact_store  # noqa: E402
+from contact_store import ContactJournal  # noqa: E402
+from utils import atomic_write_json, file_lock  # noqa: E402
+
+CONTACTS_FILE = "data/contacts.json"
+
+
+def make_contact(i):
+    return {
+        "name": f"Sender {i}",
+        "email": f"sender{i % 100}@example.com",
+        "subject": "General Inquiry",
+        "message": "Hello! I would like to talk about a project. " * 4,
+        "timestamp": f"2024-01-01T00:00:{i % 60:02d}",
+        "status": "new"
+    }
+
+
+# ==================== COMMIT COST ====================
+
+def old_append(path, contact):
+    """Pre-journal save: load the whole list, append, rewrite it"""
+    with file_lock(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            contacts = json.load(f)
+        contacts.append(contact)
+        atomic_write_json(path, contacts, indent=2)
+
+
+def bench_commits(sizes, count):
+    print(f"{'inbox':>8}{'rewrite ms':>12}{'journal ms':>12}{'speedup':>9}")
+    for size in sizes:
+        seed = [dict(make_contact(i), id=f"seed{i}") for i in range(size)]
+
+        atomic_write_json(CONTACTS_FILE, seed, indent=2)
+        started = time.perf_counter()
+        for i in range(count):
+            old_append(CONTACTS_FILE, make_contact(i))
+        rewrite = (time.perf_counter() - started) / count * 1000
+
+        atomic_write_json(CONTACTS_FILE, seed, indent=2)
+        journal = ContactJournal(CONTACTS_FILE, compact_bytes=float('inf'))
+        if os.path.exists(journal.journal_path):
+            os.remove(journal.journal_path)
+        started = time.perf_counter()
+        for i in range(count):
+            journal.append(make_contact(i))
+        commit = (time.perf_counter() - started) / count * 1000
+
+        print(f"{size:>8}{rewrite:>12.2f}{commit:>12.2f}{rewrite / commit:>8.0f}x")
+
+
+# ==================== FAULT INJECTION ====================
+
+def _kill_self():
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def crash_writer(mode, conn, seed):
+    """Commit contacts until killed, acknowledging each committed ID"""
+    random.seed(seed)
+    journal = ContactJournal(CONTACTS_FILE, compact_bytes=4096)
+    crash_after = random.randint(1, 40)
+    commits = 0
+
+    if mode == 'torn':
+        # Write part of an entry, then die before the newline
+        real_write = ContactJournal._write
+
+        def torn_write(f, data):
+            if commits == crash_after:
+                real_write(f, data[:random.randint(1, len(data) - 1)])
+                f.flush()
+                _kill_self()
+            real_write(f, data)
+        journal._write = torn_write
+
+    elif mode in ('compact-before-rename', 'compact-after-rename'):
+        # Die inside compaction, before or after the new snapshot lands
+        real_atomic_write = contact_store.atomic_write_json
+
+        def dying_atomic_write(path, data, **kwargs):
+            if mode == 'compact-before-rename':
+                with open(f"{path}.partial.tmp", 'w', encoding='utf-8') as f:
+                    f.write(json.dumps(data)[:100])
+                _kill_self()
+            real_atomic_write(path, data, **kwargs)
+            _kill_self()
+        contact_store.atomic_write_json = dying_atomic_write
+
+    while True:
+        contact = make_contact(commits)
+        if journal.append(contact):
+            conn.send(('add', contact['id']))
+        commits += 1
+
+
+def expected_state(acks, base):
+    """
+    Contacts that must exist after the crash: id -> status
+
+    A commit that hit the disk just before the kill may be present without
+    an acknowledgement; that is fine, only acknowledged ones must be.
+    """
+    state = dict(base)
+    for op, contact_id in acks:
+        if op == 'add':
+            state[contact_id] = 'new'
+    return state
+
+
+def crash_round(mode, seed):
+    """Seed a store, crash a writer, then verify nothing acknowledged was lost"""
+    shutil.rmtree("data", ignore_errors=True)
+    os.makedirs("data")
+
+    # Prior contacts: some read, some deleted (tombstones), some compacted
+    journal = ContactJournal(CONTACTS_FILE, compact_bytes=4096)
+    base, deleted = {}, set()
+    for i in range(30):
+        contact = make_contact(1000 + i)
+        journal.append(contact)
+        base[contact['id']] = 'new'
+    for contact_id in list(base)[:10]:
+        journal.update(contact_id, status='read')
+        base[contact_id] = 'read'
+    for contact_id in list(base)[10:15]:
+        journal.delete(contact_id)
+        del base[contact_id]
+        deleted.add(contact_id)
+
+    parent, child = multiprocessing.Pipe(duplex=False)
+    proc = multiprocessing.Process(target=crash_writer, args=(mode, child, seed))
+    proc.start()
+    child.close()
+
+    if mode == 'kill':
+        time.sleep(random.uniform(0.005, 0.05))
+        os.kill(proc.pid, signal.SIGKILL)
+    proc.join()
+
+    acks = []
+    while parent.poll():
+        try:
+            acks.append(parent.recv())
+        except EOFError:
+            break
+
+    expected = expected_state(acks, base)
+    recovered = ContactJournal(CONTACTS_FILE, compact_bytes=4096)
+    found = {contact['id']: contact.get('status') for contact in recovered.load()}
+
+    lost = [i for i in expected if i not in found]
+    wrong = [i for i in expected if i in found and found[i] != expected[i]]
+    resurrected = [i for i in found if i in deleted]
+
+    # The store must keep working after recovery
+    probe = make_contact(9999)
+    recovered.append(probe)
+    usable = probe['id'] in {c['id'] for c in ContactJournal(CONTACTS_FILE).load()}
+
+    return len(acks), lost, wrong, resurrected, usable
+
+
+def run_crash_tests(rounds):
+    modes = ['kill', 'torn', 'compact-before-rename', 'compact-after-rename']
+    print(f"{'mode':<24}{'rounds':>7}{'acked':>8}{'lost':>6}{'wrong':>7}{'extra':>7}{'usable':>8}")
+
+    failed = False
+    for mode in modes:
+        acked = lost = wrong = extra = 0
+        usable = True
+        for seed in range(rounds):
+            acks, round_lost, round_wrong, round_extra, round_usable = crash_round(mode, seed)
+            acked += acks
+            lost += len(round_lost)
+            wrong += len(round_wrong)
+            extra += len(round_extra)
+            usable = usable and round_usable
+        print(f"{mode:<24}{rounds:>7}{acked:>8}{lost:>6}{wrong:>7}{extra:>7}{str(usable):>8}")
+        failed = failed or lost or wrong or extra or not usable
+
+    if failed:
+        print("FAILED: committed changes were lost or the store is unusable")
+        sys.exit(1)
+    print("OK: no committed changes lost")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10000, 100000],
+                        help="Inbox sizes to measure commits at")
+    parser.add_argument('--commits', type=int, default=20, help="Commits per size")
+    parser.add_argument('--crash', action='store_true', help="Run the fault-injection checks")
+    parser.add_argument('--rounds', type=int, default=20, help="Crashes per fault mode")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="granito-bench-")
+    os.chdir(workdir)
+    os.makedirs("data")
+    logging.disable(logging.WARNING)
+
+    try:
+        if args.crash:
+            run_crash_tests(args.rounds)
+        else:
+            bench_commits(args.sizes, args.commits)
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    multiprocessing.set_start_method('fork')
+    main()
@@ -0,0 +1,86 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - ASSET FAST PATH BENCHMARK
+==========================================
+
+Requests per second (single thread, in-process WSGI) for the files a page
+load pulls in, with the fast path off (every request rate-limited, with a
+session and tracking hooks, as before) and on, plus /healthz. Also counts
+how many of 60 favicon requests from one client (a service worker
+revalidating it, say) get a 429 under the site's "50 per hour" default
+limit either way.
+
+Usage:
+    python benchmarks/bench_fastpath.py [--requests 2000]
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PATHS = ['/favicon.ico', '/robots.txt', '/sitemap.xml', '/static/js/script.js']
+
+
+def requests_per_second(client, path, count):
+    """Throughput from `count` distinct client addresses (none hits a limit)"""
+    started = time.perf_counter()
+    for i in range(count):
+        response = client.get(path, environ_base={'REMOTE_ADDR': f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"})
+        response.close()
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--requests', type=int, default=2000, help="Requests per path and mode")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="granito-bench-")
+    os.chdir(workdir)
+    os.makedirs("data")
+    logging.disable(logging.WARNING)
+    warnings.simplefilter('ignore')
+
+    try:
+        os.environ['RATELIMIT_STORAGE_URI'] = 'sqlite:///data/ratelimits.db'
+        import app as portfolio
+
+        app = portfolio.app
+        fast_wsgi = app.wsgi_app
+        slow_wsgi = fast_wsgi.app  # the app without FastPathMiddleware
+        client = app.test_client()
+        client.set_cookie('session', 'not-a-valid-session')  # every browser sends one
+
+        print(f"{'path':<24}{'before req/s':>14}{'after req/s':>13}{'speedup':>9}")
+        for path in PATHS:
+            portfolio.limiter.reset()
+            app.wsgi_app = slow_wsgi
+            before = requests_per_second(client, path, args.requests)
+            app.wsgi_app = fast_wsgi
+            after = requests_per_second(client, path, args.requests)
+            print(f"{path:<24}{before:>14.0f}{after:>13.0f}{after / before:>8.1f}x")
+
+        health = requests_per_second(client, '/healthz', args.requests)
+        print(f"{'/healthz':<24}{'-':>14}{health:>13.0f}")
+
+        # Budget: one client against the "50 per hour" default
+        for label, wsgi in (("before", slow_wsgi), ("after", fast_wsgi)):
+            portfolio.limiter.reset()
+            app.wsgi_app = wsgi
+            statuses = [client.get('/favicon.ico').status_code for _ in range(60)]
+            print(f"60 favicon requests, {label}: {statuses.count(429)} rejected with 429")
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - LOGGING BENCHMARK
+==========================================
+
+Time a log call costs the request thread with the old synchronous
+FileHandler and with the queued JSON pipeline (log_queue.py), then checks
+rotation across processes: several forked workers log concurrently into
+one small, size-rotated file and every line must arrive exactly once, as
+valid JSON, with no file far over the size limit. Finally counts what a
+burst of "Invalid visitor record" warnings writes with sampling on.
+
+Usage:
+    python benchmarks/bench_logging.py [--records 20000] [--workers 4]
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import statistics
+import multiprocessing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from log_queue import (  # noqa: E402
+    TEXT_FORMAT, JsonFormatter, SamplingFilter, SharedRotatingFileHandler, QueuedLogging,
+    setup_logging
+)
+
+logger = logging.getLogger("bench")
+
+
+def per_call_us(count):
+    """Request-thread latency of logger.info in microseconds"""
+    latencies = []
+    for i in range(count):
+        started = time.perf_counter()
+        logger.info(f"Request: GET /blog from 10.0.0.{i & 255}")
+        latencies.append((time.perf_counter() - started) * 1e6)
+    return latencies
+
+
+# ==================== REQUEST THREAD COST ====================
+
+def stalling(handler, every=100, stall=0.002):
+    """Make one write in `every` wait `stall` seconds, like a busy disk"""
+    emit = handler.emit
+    writes = [0]
+
+    def slow_emit(record):
+        writes[0] += 1
+        if writes[0] % every == 0:
+            time.sleep(stall)
+        emit(record)
+    handler.emit = slow_emit
+    return handler
+
+
+def report(label, latencies):
+    print(f"{label:<34}{statistics.mean(latencies):>9.1f}"
+          f"{statistics.quantiles(latencies, n=100)[-1]:>9.1f}{max(latencies):>9.0f}")
+
+
+def bench_latency(count):
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    print(f"{'handler':<34}{'mean us':>9}{'p99 us':>9}{'max us':>9}")
+
+    for disk, wrap in (("", lambda handler: handler), (", busy disk", stalling)):
+        sync = wrap(logging.FileHandler("sync.log"))
+        sync.setFormatter(logging.Formatter(TEXT_FORMAT))
+        root.handlers[:] = [sync]
+        report(f"FileHandler{disk} (before)", per_call_us(count))
+        sync.close()
+
+        shared = SharedRotatingFileHandler("queued.log", max_bytes=1 << 30)
+        shared.setFormatter(JsonFormatter())
+        logs = QueuedLogging([wrap(shared)], queue_size=count).start()
+        latencies = per_call_us(count)
+        started = time.perf_counter()
+        logs.stop()
+        drain = time.perf_counter() - started
+        report(f"queued JSON{disk} (after)", latencies)
+        shared.close()
+
+    with open("queued.log", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 2 * count, f"{len(lines)} of {2 * count} queued lines written"
+    print(f"  the writer thread drained the busy-disk backlog in {drain * 1000:.0f} ms")
+    print(f"  last line: {lines[-1]}")
+
+
+# ==================== ROTATION ACROSS PROCESSES ====================
+
+def log_worker(logs, worker, count, barrier):
+    """One forked 'gunicorn worker' logging as fast as it can"""
+    barrier.wait()
+    for i in range(count):
+        logger.info(f"line {i}", extra={'worker': worker, 'seq': i})
+        if i % 500 == 0:
+            time.sleep(0.001)  # let the workers interleave
+    logs.stop()  # multiprocessing children skip atexit
+
+
+def check_rotation(workers, count):
+    max_bytes = 64 * 1024
+    logs = setup_logging("shared/app.log", max_bytes=max_bytes, backup_count=10_000,
+                         rotate_interval=0, queue_size=count, console=False)
+
+    barrier = multiprocessing.Barrier(workers)
+    procs = [multiprocessing.Process(target=log_worker, args=(logs, w, count, barrier)) for w in range(workers)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    logs.stop()
+
+    files = glob.glob("shared/app.log*")
+    files = [f for f in files if not f.endswith(".lock")]
+    seen, bad, oversized = set(), 0, 0
+    for path in files:
+        if os.path.getsize(path) > max_bytes:
+            oversized += 1
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    bad += 1
+                    continue
+                seen.add((entry['worker'], entry['seq']))
+
+    expected = workers * count
+    print(f"\n{workers} workers x {count} lines, rotated at {max_bytes // 1024} KB: "
+          f"{len(files)} files, {len(seen)} of {expected} lines, {bad} corrupt, "
+          f"{oversized} over the limit")
+    if len(seen) != expected or bad or oversized:
+        print("FAILED: lines were lost, corrupted or a file outgrew the limit")
+        sys.exit(1)
+    print("OK: rotation is safe across processes")
+
+
+# ==================== SAMPLING ====================
+
+def check_sampling(count):
+    shared = SharedRotatingFileHandler("sampled.log")
+    shared.setFormatter(JsonFormatter())
+    logs = QueuedLogging([shared], filters=[SamplingFilter(["Invalid visitor record"])]).start()
+
+    started = time.perf_counter()
+    for i in range(count):
+        logging.getLogger("visitor_aggregates").warning(f"Invalid visitor record: bad date {i!r}")
+    elapsed = (time.perf_counter() - started) / count * 1e6
+    logs.stop()
+
+    with open("sampled.log", encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+    suppressed = sum(entry.get('suppressed', 0) for entry in entries)
+    print(f"\n{count} 'Invalid visitor record' warnings: {len(entries)} written, "
+          f"{suppressed} reported as suppressed, {elapsed:.1f} us per call")
+    shared.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--records', type=int, default=20000, help="Log calls per measurement")
+    parser.add_argument('--workers', type=int, default=4, help="Processes in the rotation check")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="granito-bench-")
+    os.chdir(workdir)
+    try:
+        bench_latency(args.records)
+        check_sampling(args.records * 5)
+        check_rotation(args.workers, args.records)
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    multiprocessing.set_start_method('fork')
+    main()
@@ -0,0 +1,170 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - CONTACT MAILER BENCHMARK
+==========================================
+
+Runs the contact form against a local SMTP stand-in (aiosmtpd) that takes
+--smtp-delay to accept each message, and reports POST latency with
+notifications off and on, how many SMTP connections the
+notifications needed, and whether every contact ended up with the expected
+delivery status - including retries after temporary (4xx) failures and
+giving up on permanent (5xx) ones.
+
+Usage:
+    pip install aiosmtpd
+    python benchmarks/bench_mailer.py [--contacts 200]
+"""
+
+import os
+import sys
+import asyncio
+import time
+import shutil
+import socket
+import logging
+import argparse
+import tempfile
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from aiosmtpd.controller import Controller  # noqa: E402
+
+
+class StandIn:
+    """aiosmtpd handler recording messages, with scripted failures"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.messages = []
+        self.sessions = set()
+        self.replies = []  # replies to use before accepting ('451 ...', '550 ...')
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(id(session))
+        await asyncio.sleep(self.delay)
+        if self.replies:
+            return self.replies.pop(0)
+        self.messages.append(envelope.content)
+        return '250 OK'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def post_contacts(client, count, tag):
+    """POST `count` contacts and return per-request latencies in ms"""
+    latencies = []
+    for i in range(count):
+        started = time.perf_counter()
+        response = client.post('/contact', data={
+            'name': f'{tag} {i}',
+            'email': f'{tag.lower()}{i}@example.com',
+            'subject': 'Benchmark',
+            'message': 'Hello from the mailer benchmark'
+        })
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.get_data(as_text=True)
+    return latencies
+
+
+def wait_for(predicate, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def deliveries(store, tag):
+    """Delivery state per contact posted with `tag`"""
+    return [c.get('delivery') for c in store.load() if c.get('name', '').startswith(tag)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--contacts', type=int, default=200, help="Contacts to post per run")
+    parser.add_argument('--smtp-delay', type=float, default=0.02,
+                        help="Seconds the stand-in takes to accept each message")
+    args = parser.parse_args()
+
+    handler = StandIn(args.smtp_delay)
+    port = free_port()
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+
+    os.environ.update({
+        'MAIL_SERVER': '127.0.0.1',
+        'MAIL_PORT': str(port),
+        'MAIL_USE_TLS': 'false',
+        'MAIL_NOTIFY_RECIPIENT': 'owner@example.com',
+        'STORAGE_BACKEND': 'json'
+    })
+
+    workdir = tempfile.mkdtemp(prefix="granito-bench-")
+    os.chdir(workdir)
+    logging.disable(logging.ERROR)
+
+    failed = False
+    try:
+        import app as portfolio  # noqa: E402
+
+        portfolio.limiter.enabled = False
+        mailer = portfolio.mailer
+        mailer.backoff = 0.05
+        client = portfolio.app.test_client()
+
+        # POST latency without and with notifications
+        portfolio.mailer = None
+        baseline = post_contacts(client, args.contacts, 'Off')
+        portfolio.mailer = mailer
+        notified = post_contacts(client, args.contacts, 'On')
+
+        delivered = wait_for(lambda: all(d == 'sent' for d in deliveries(mailer.store, 'On')),
+                             timeout=30 + args.contacts * args.smtp_delay)
+        print(f"{'':<16}{'mean ms':>9}{'p95 ms':>9}")
+        for label, latencies in (('notify off', baseline), ('notify on', notified)):
+            p95 = statistics.quantiles(latencies, n=20)[-1]
+            print(f"{label:<16}{statistics.mean(latencies):>9.2f}{p95:>9.2f}")
+        print(f"\n{args.contacts} notifications: {len(handler.messages)} received, "
+              f"{mailer.pool.opened} SMTP connection(s), {len(handler.sessions)} session(s)")
+        failed = failed or not delivered or len(handler.messages) != args.contacts
+
+        # Temporary failures are retried, permanent ones recorded as failed,
+        # both on the pooled connection
+        opened = mailer.pool.opened
+        handler.replies = ['451 Try again later', '451 Try again later']
+        post_contacts(client, 1, 'Retry')
+        ok_retry = wait_for(lambda: deliveries(mailer.store, 'Retry') == ['sent'])
+        retry = [c for c in mailer.store.load() if c.get('name', '').startswith('Retry')][0]
+        print(f"after 2x 451: delivery={retry.get('delivery')} attempts={retry.get('delivery_attempts')}")
+
+        handler.replies = ['550 Mailbox unavailable']
+        post_contacts(client, 1, 'Reject')
+        ok_reject = wait_for(lambda: deliveries(mailer.store, 'Reject') == ['failed'])
+        reject = [c for c in mailer.store.load() if c.get('name', '').startswith('Reject')][0]
+        print(f"after 550: delivery={reject.get('delivery')} attempts={reject.get('delivery_attempts')} "
+              f"error={reject.get('delivery_error')!r}")
+        print(f"new SMTP connections for the rejected replies: {mailer.pool.opened - opened}")
+        failed = failed or not ok_retry or retry.get('delivery_attempts') != 3 or not ok_reject
+        failed = failed or mailer.pool.opened != opened
+
+        mailer.stop()
+    finally:
+        controller.stop()
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if failed:
+        print("FAILED: notifications were lost or delivery status is wrong")
+        sys.exit(1)
+    print("OK: every notification delivered or recorded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - INSTRUMENTATION BENCHMARK
+==========================================
+
+Cost of the instrumentation primitives (a span, a counter increment, a
+timed call) and of the per-request hooks on a cached page, then checks
+/metrics across processes: forked workers serve requests and exit, and
+the merged export must count every one of them exactly once, in valid
+Prometheus text format, on every scrape.
+
+Usage:
+    python benchmarks/bench_metrics.py [--iterations 200000] [--workers 3]
+"""
+
+import os
+import re
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import warnings
+import statistics
+import multiprocessing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from instrumentation import Metrics, REQUESTS_TOTAL  # noqa: E402
+
+SAMPLE_LINE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[^}]*\})? -?[0-9.e+-]+$')
+
+
+def per_call_ns(fn, iterations):
+    """Mean ns per call, minus the loop's own cost"""
+    def loop(body):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            body()
+        return time.perf_counter() - started
+
+    empty = min(loop(lambda: None) for _ in range(3))
+    return (min(loop(fn) for _ in range(3)) - empty) / iterations * 1e9
+
+
+# ==================== PRIMITIVES ====================
+
+def bench_primitives(iterations):
+    registry = Metrics()
+
+    def span():
+        with registry.span('render'):
+            pass
+
+    def plain():
+        return None
+
+    timed = registry.timed('stats')(plain)
+
+    print(f"{'operation':<36}{'ns':>8}")
+    for label, fn in (
+        ("with metrics.span(...)", span),
+        ("metrics.observe_span(...)", lambda: registry.observe_span('render', 0.001)),
+        ("@metrics.timed call (minus call)", lambda: timed()),
+        ("metrics.inc(..., 3 labels)", lambda: registry.inc(REQUESTS_TOTAL, endpoint='home', method='GET', status=200)),
+    ):
+        cost = per_call_ns(fn, iterations)
+        if label.startswith("@"):
+            cost -= per_call_ns(plain, iterations)
+        print(f"{label:<36}{cost:>8.0f}")
+
+
+# ==================== PER REQUEST ====================
+
+def bench_requests(portfolio, count):
+    """Cached /about with and without the request hooks and render signals"""
+    from flask.signals import before_render_template, template_rendered
+
+    app = portfolio.app
+    client = app.test_client()
+    before = app.before_request_funcs[None]
+    after = app.after_request_funcs[None]
+    hooks = (portfolio.start_request_timer, portfolio.record_request_metrics)
+
+    def instrument(enabled):
+        if enabled:
+            before.insert(before.index(portfolio.before_request), hooks[0])
+            after.insert(after.index(portfolio.compress_response), hooks[1])
+            before_render_template.connect(portfolio.start_render_timer, app)
+            template_rendered.connect(portfolio.record_render_time, app)
+        else:
+            before.remove(hooks[0])
+            after.remove(hooks[1])
+            before_render_template.disconnect(portfolio.start_render_timer, app)
+            template_rendered.disconnect(portfolio.record_render_time, app)
+
+    def run():
+        latencies = []
+        for i in range(count):
+            started = time.perf_counter()
+            client.get('/about', environ_base={'REMOTE_ADDR': f"10.0.{i >> 8 & 255}.{i & 255}"})
+            latencies.append((time.perf_counter() - started) * 1e6)
+        return statistics.median(latencies)
+
+    portfolio.limiter.enabled = False
+    client.get('/about')
+    instrument(False)
+    without = min(run() for _ in range(3))
+    instrument(True)
+    with_hooks = min(run() for _ in range(3))
+    portfolio.limiter.enabled = True
+    print(f"\nGET /about (cached), median of {count}: {without:.0f} us without the hooks, "
+          f"{with_hooks:.0f} us with them ({with_hooks - without:+.0f} us)")
+
+
+# ==================== ACROSS PROCESSES ====================
+
+def worker(count, barrier):
+    """A forked worker: serve requests, snapshot, exit (skipping atexit)"""
+    import app as portfolio
+
+    client = portfolio.app.test_client()
+    barrier.wait()
+    for i in range(count):
+        client.get('/api/skills', environ_base={'REMOTE_ADDR': f"10.1.{i >> 8 & 255}.{i & 255}"})
+    portfolio.metrics.write_snapshot()
+
+
+def served(text, endpoint):
+    """Sum of granito_http_requests_total for one endpoint"""
+    pattern = re.compile(rf'^{REQUESTS_TOTAL}{{endpoint="{endpoint}",[^}}]*}} (\d+)$', re.M)
+    return sum(int(n) for n in pattern.findall(text))
+
+
+def check_format(text):
+    """Every sample line parses and histogram buckets never decrease"""
+    previous = {}
+    for line in text.splitlines():
+        if line.startswith('#'):
+            continue
+        assert SAMPLE_LINE.match(line), f"bad sample line: {line}"
+        if '_bucket{' in line:
+            series = re.sub(r',?le="[^"]*"', '', line.rsplit(' ', 1)[0])
+            value = int(line.rsplit(' ', 1)[1])
+            assert value >= previous.get(series, 0), f"bucket decreases: {line}"
+            previous[series] = value
+
+
+def check_processes(portfolio, workers, count):
+    portfolio.limiter.enabled = False
+    client = portfolio.app.test_client()
+    for _ in range(count):
+        client.get('/api/skills')  # served by the "master" before it forks
+
+    barrier = multiprocessing.Barrier(workers)
+    procs = [multiprocessing.Process(target=worker, args=(count, barrier)) for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+
+    expected = count * (workers + 1)
+    first = portfolio.metrics.render()
+    second = portfolio.metrics.render()  # exited workers now come from retired.json
+    check_format(first)
+    check_format(second)
+    retired = os.path.exists(os.path.join(portfolio.metrics.directory, 'retired.json'))
+
+    print(f"\n{workers} forked workers + 1 x {count} requests: /metrics counts "
+          f"{served(first, 'api_skills')}, then {served(second, 'api_skills')} (expected {expected}); "
+          f"exited workers folded: {retired}")
+    if served(first, 'api_skills') != expected or served(second, 'api_skills') != expected:
+        print("FAILED: requests were lost or double-counted across workers")
+        sys.exit(1)
+    print("OK: every worker's requests are counted once")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--iterations', type=int, default=200000, help="Calls per primitive")
+    parser.add_argument('--requests', type=int, default=1000, help="Requests per measurement")
+    parser.add_argument('--workers', type=int, default=3, help="Forked workers")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="granito-bench-")
+    os.chdir(workdir)
+    os.makedirs("data")
+    logging.disable(logging.WARNING)
+    warnings.simplefilter('ignore')
+
+    try:
+        bench_primitives(args.iterations)
+
+        os.environ['RATELIMIT_STORAGE_URI'] = 'memory://'
+        import app as portfolio
+
+        bench_requests(portfolio, args.requests)
+        check_processes(portfolio, args.workers, args.requests // 10)
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    multiprocessing.set_start_method('fork')
+    main()
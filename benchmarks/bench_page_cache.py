@@ -0,0 +1,76 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - PAGE CACHE BENCHMARK
+==========================================
+
+Measures requests per second for the cached pages (/about, /projects,
+/blog, /offline, /api/skills) through the Flask test client with the page
+cache disabled (NullCache) and with the in-process and filesystem backends.
+
+Usage:
+    python benchmarks/bench_page_cache.py [--requests 2000]
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PAGES = ['/about', '/projects', '/blog', '/offline', '/api/skills']
+BACKENDS = ['NullCache', 'SimpleCache', 'FileSystemCache']
+
+
+def requests_per_second(client, path, count):
+    """Issue `count` GET requests and return the achieved rate"""
+    client.get(path)  # warm up (fills the cache)
+    started = time.perf_counter()
+    for _ in range(count):
+        response = client.get(path)
+        assert response.status_code == 200, (path, response.status_code)
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--requests', type=int, default=2000, help="Requests per page and backend")
+    args = parser.parse_args()
+
+    # The app keeps its data relative to the working directory
+    workdir = tempfile.mkdtemp(prefix="granito-bench-")
+    os.chdir(workdir)
+    logging.disable(logging.WARNING)
+
+    import app as portfolio  # noqa: E402
+
+    portfolio.limiter.enabled = False
+    results = {}
+
+    try:
+        for backend in BACKENDS:
+            portfolio.cache.init_app(portfolio.app, config={
+                'CACHE_TYPE': backend,
+                'CACHE_DIR': os.path.join(workdir, 'cache'),
+                'CACHE_DEFAULT_TIMEOUT': 3600
+            })
+            portfolio.cache.clear()
+            client = portfolio.app.test_client()
+            results[backend] = {path: requests_per_second(client, path, args.requests) for path in PAGES}
+
+        print(f"{'page':<12}" + ''.join(f"{backend:>17}" for backend in BACKENDS) + f"{'speedup':>9}")
+        for path in PAGES:
+            row = ''.join(f"{results[backend][path]:>13.0f} r/s" for backend in BACKENDS)
+            speedup = results['SimpleCache'][path] / results['NullCache'][path]
+            print(f"{path:<12}{row}{speedup:>8.1f}x")
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
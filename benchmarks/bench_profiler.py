@@ -0,0 +1,184 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - REQUEST PROFILER BENCHMARK
+==========================================
+
+What the profiler hook costs a request when profiling is off (the default)
+and when every request is sampled, whether the samples attribute time
+correctly (a synthetic workload spending 70% of its time in one function
+and 30% in another), and whether the admin download merges the stacks of
+several forked workers that picked up the sample rate from the shared
+settings.
+
+Usage:
+    python benchmarks/bench_profiler.py [--requests 500] [--workers 3]
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import warnings
+import statistics
+import multiprocessing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SEARCH = '/search?q=progressive+web+flask'
+
+
+def median_us(client, path, count):
+    latencies = []
+    for i in range(count):
+        started = time.perf_counter()
+        client.get(path, environ_base={'REMOTE_ADDR': f"10.0.{i >> 8 & 255}.{i & 255}"})
+        latencies.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(latencies)
+
+
+# ==================== OVERHEAD ====================
+
+def bench_overhead(portfolio, count):
+    app = portfolio.app
+    client = app.test_client()
+    profiler = portfolio.profiler
+    before = app.before_request_funcs[None]
+    teardown = app.teardown_request_funcs[None]
+
+    settings_interval, profiler.settings_interval = profiler.settings_interval, 2.0
+    started = time.perf_counter()
+    for _ in range(100000):
+        profiler.wanted(None, False)
+    check_ns = (time.perf_counter() - started) / 100000 * 1e9
+    profiler.settings_interval = settings_interval
+
+    print(f"{'configuration':<34}{'median us':>10}")
+    median_us(client, SEARCH, 50)
+
+    before.remove(portfolio.start_profiling)
+    teardown.remove(portfolio.stop_profiling)
+    baseline = min(median_us(client, SEARCH, count) for _ in range(3))
+    print(f"{'no profiler hooks':<34}{baseline:>10.0f}")
+
+    before.insert(before.index(portfolio.before_request), portfolio.start_profiling)
+    teardown.append(portfolio.stop_profiling)
+    disabled = min(median_us(client, SEARCH, count) for _ in range(3))
+    print(f"{'hooks, profiling off':<34}{disabled:>10.0f}   (check: {check_ns:.0f} ns)")
+
+    profiler.set_rate(1.0)
+    enabled = min(median_us(client, SEARCH, count) for _ in range(3))
+    samples = sum(row['samples'] for row in profiler.summary())
+    print(f"{'hooks, every request sampled':<34}{enabled:>10.0f}   "
+          f"({(enabled - baseline) / baseline:+.1%}, {samples} samples)")
+    profiler.set_rate(0)
+    profiler.clear()
+
+
+# ==================== ATTRIBUTION ====================
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def mostly_here(seconds):
+    spin(seconds)
+
+
+def partly_here(seconds):
+    spin(seconds)
+
+
+def check_attribution(rounds=40):
+    """70/30 split between two functions must show up in the samples"""
+    from profiler import StackSampler  # after main() moved to the work dir
+
+    sampler = StackSampler(interval=0.002)
+    sampler.start('synthetic')
+    for _ in range(rounds):
+        mostly_here(0.007)
+        partly_here(0.003)
+    sampler.stop()
+    time.sleep(0.01)
+
+    counts = {'mostly_here': 0, 'partly_here': 0}
+    for (_, stack), n in sampler.stacks.items():
+        for name in counts:
+            if f":{name};" in stack + ';':
+                counts[name] += n
+    total = sum(counts.values())
+    share = counts['mostly_here'] / total if total else 0
+    print(f"\nsynthetic 70/30 workload: {total} samples, {share:.0%} in mostly_here")
+    if not 0.6 <= share <= 0.8:
+        print("FAILED: samples do not reflect where the time went")
+        sys.exit(1)
+    print("OK: time is attributed to the right functions")
+
+
+# ==================== ACROSS PROCESSES ====================
+
+def worker(count, barrier):
+    import app as portfolio
+
+    client = portfolio.app.test_client()
+    barrier.wait()
+    for i in range(count):
+        client.get(SEARCH, environ_base={'REMOTE_ADDR': f"10.1.{i >> 8 & 255}.{i & 255}"})
+    portfolio.profiler.write()
+
+
+def check_processes(portfolio, workers, count):
+    portfolio.profiler.set_rate(1.0)  # written to the shared settings file
+
+    barrier = multiprocessing.Barrier(workers)
+    procs = [multiprocessing.Process(target=worker, args=(count, barrier)) for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+
+    summary = {row['endpoint']: row for row in portfolio.profiler.summary()}
+    profiled = summary.get('search', {}).get('requests', 0)
+    stacks = portfolio.profiler.collapsed('search').splitlines()
+    print(f"\n{workers} workers x {count} requests at rate 100%: {profiled} profiled, "
+          f"{summary.get('search', {}).get('samples', 0)} samples in {len(stacks)} distinct stacks")
+    if profiled != workers * count or not all(line.rsplit(' ', 1)[1].isdigit() for line in stacks):
+        print("FAILED: the download does not cover every worker")
+        sys.exit(1)
+    print("OK: every worker's profiles are merged")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--requests', type=int, default=500, help="Requests per measurement")
+    parser.add_argument('--workers', type=int, default=3, help="Forked workers")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="granito-bench-")
+    os.chdir(workdir)
+    os.makedirs("data")
+    logging.disable(logging.WARNING)
+    warnings.simplefilter('ignore')
+
+    try:
+        os.environ['RATELIMIT_STORAGE_URI'] = 'memory://'
+        import app as portfolio
+        portfolio.limiter.enabled = False
+        portfolio.profiler.settings_interval = 0  # see rate changes at once
+
+        bench_overhead(portfolio, args.requests)
+        check_attribution()
+        check_processes(portfolio, args.workers, args.requests // 10)
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    multiprocessing.set_start_method('fork')
+    main()
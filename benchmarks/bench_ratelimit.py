@@ -0,0 +1,154 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - RATE LIMIT STORAGE BENCHMARK
+==========================================
+
+Measures what Flask-Limiter adds to a request with the site's two default
+limits, for per-worker memory counters and the shared SQLite storage, then
+checks correctness across processes: several forked workers, each loading
+the app on its own like gunicorn workers, hit the "10 per hour" contact
+page concurrently and must be granted 10 requests in total, not 10 each.
+
+Usage:
+    python benchmarks/bench_ratelimit.py [--requests 2000] [--workers 4]
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import warnings
+import statistics
+import multiprocessing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask import Flask  # noqa: E402
+from flask_limiter import Limiter  # noqa: E402
+from flask_limiter.util import get_remote_address  # noqa: E402
+
+import ratelimit_store  # noqa: E402,F401 - registers sqlite://
+
+# Same shape as the site's default limits, high enough never to trigger
+DEFAULT_LIMITS = ["200000 per day", "50000 per hour"]
+
+CONFIGURATIONS = [
+    ("no limiter", None, None),
+    ("memory, fixed window", "memory://", "fixed-window"),
+    ("memory, sliding window", "memory://", "sliding-window-counter"),
+    ("sqlite, sliding window", "sqlite:///data/ratelimits.db", "sliding-window-counter"),
+]
+
+
+# ==================== OVERHEAD ====================
+
+def make_app(storage_uri, strategy):
+    app = Flask(__name__)
+
+    @app.route("/")
+    def index():
+        return "ok"
+
+    if storage_uri:
+        Limiter(app=app, key_func=get_remote_address, default_limits=DEFAULT_LIMITS,
+                storage_uri=storage_uri, strategy=strategy)
+    return app
+
+
+def bench_overhead(count):
+    print(f"{'storage':<26}{'mean us':>9}{'p95 us':>9}{'overhead us':>13}")
+    baseline = None
+    for label, storage_uri, strategy in CONFIGURATIONS:
+        client = make_app(storage_uri, strategy).test_client()
+        for _ in range(50):
+            client.get("/")
+
+        latencies = []
+        for _ in range(count):
+            started = time.perf_counter()
+            response = client.get("/")
+            latencies.append((time.perf_counter() - started) * 1e6)
+            assert response.status_code == 200
+
+        mean = statistics.mean(latencies)
+        baseline = mean if baseline is None else baseline
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(f"{label:<26}{mean:>9.0f}{p95:>9.0f}{mean - baseline:>13.0f}")
+
+
+# ==================== CROSS-PROCESS CORRECTNESS ====================
+
+def contact_worker(attempts, barrier, results):
+    """One 'gunicorn worker': load the app, then hit the rate-limited page"""
+    import app as portfolio
+
+    client = portfolio.app.test_client()
+    barrier.wait()
+    granted = sum(client.get("/contact").status_code != 429 for _ in range(attempts))
+    results.put(granted)
+
+
+def run_workers(storage_uri, workers, attempts):
+    os.environ['RATELIMIT_STORAGE_URI'] = storage_uri
+    shutil.rmtree("data", ignore_errors=True)
+    os.makedirs("data")
+
+    barrier = multiprocessing.Barrier(workers)
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=contact_worker, args=(attempts, barrier, results))
+             for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    granted = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    return granted
+
+
+def check_processes(workers, attempts):
+    limit = 10  # @limiter.limit("10 per hour") on /contact
+    print(f"\n{workers} workers x {attempts} requests to /contact (limit {limit} per hour)")
+    print(f"{'storage':<26}{'granted':>9}  per worker")
+
+    failed = False
+    for label, storage_uri in (("memory (per worker)", "memory://"),
+                               ("sqlite (shared)", "sqlite:///data/ratelimits.db")):
+        granted = run_workers(storage_uri, workers, attempts)
+        print(f"{label:<26}{sum(granted):>9}  {granted}")
+        if storage_uri.startswith("sqlite"):
+            failed = sum(granted) != limit
+
+    if failed:
+        print("FAILED: shared storage granted a different number of requests than the limit")
+        sys.exit(1)
+    print("OK: the limit holds across processes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--requests', type=int, default=2000, help="Requests per configuration")
+    parser.add_argument('--workers', type=int, default=4, help="Processes in the correctness check")
+    parser.add_argument('--attempts', type=int, default=20, help="Requests per process")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="granito-bench-")
+    os.chdir(workdir)
+    os.makedirs("data")
+    logging.disable(logging.WARNING)
+    warnings.simplefilter('ignore')
+
+    try:
+        bench_overhead(args.requests)
+        check_processes(args.workers, args.attempts)
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    multiprocessing.set_start_method('fork')
+    main()
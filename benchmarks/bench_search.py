@@ -0,0 +1,147 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - SEARCH INDEX BENCHMARK
+==========================================
+
+Builds SearchIndex over synthetic blog-sized documents (Zipf-distributed
+vocabulary) and reports build time, the cost of an incremental refresh
+after one document changes, and query latency for common, rare, multi-word
+and prefix queries, and for typeahead suggestions with and without the
+LRU cache - plus the site's own content as served by /search and
+/api/search.
+
+Usage:
+    python benchmarks/bench_search.py [--sizes 100 1000 10000]
+"""
+
+import os
+import sys
+import time
+import random
+import string
+import logging
+import argparse
+import warnings
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from search_index import SearchIndex  # noqa: E402
+
+def make_vocabulary(size, rng):
+    """Distinct pseudo-words of 3-10 letters (prefixes spread like real text)"""
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))))
+    return sorted(words, key=lambda word: rng.random())
+
+
+VOCABULARY = make_vocabulary(20000, random.Random(0))
+ZIPF = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+
+def make_document(i, rng):
+    words = rng.choices(VOCABULARY, weights=ZIPF, k=300)
+    return {
+        'id': f"doc-{i}",
+        'type': rng.choice(['project', 'post', 'page']),
+        'url': f"/blog#post-{i}",
+        'title': ' '.join(rng.choices(VOCABULARY, weights=ZIPF, k=6)),
+        'excerpt': ' '.join(words[:25]),
+        'content': ' '.join(words),
+        'tags': rng.choices(VOCABULARY[:200], k=3)
+    }
+
+
+def timed(fn, repeat):
+    """Per-call latencies in ms"""
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def report(label, latencies):
+    p95 = statistics.quantiles(latencies, n=20)[-1]
+    print(f"  {label:<32}{statistics.median(latencies):>9.3f}{p95:>9.3f}")
+
+
+def bench_size(size, repeat):
+    rng = random.Random(size)
+    documents = [make_document(i, rng) for i in range(size)]
+
+    started = time.perf_counter()
+    index = SearchIndex(documents)
+    build = time.perf_counter() - started
+
+    changed = list(documents)
+    changed[size // 2] = make_document(size + 1, rng) | {'id': documents[size // 2]['id']}
+    started = time.perf_counter()
+    index.update(changed)
+    refresh = (time.perf_counter() - started) * 1000
+
+    print(f"\n{size} documents: build {build:.2f} s, {len(index.postings)} terms, "
+          f"refresh after one change {refresh:.1f} ms")
+    print(f"  {'query':<32}{'p50 ms':>9}{'p95 ms':>9}")
+    common, rare, words = VOCABULARY[3], VOCABULARY[15000], VOCABULARY[40:43]
+    prefix, typed = VOCABULARY[19][:3], f"{VOCABULARY[12]} {VOCABULARY[60][:2]}"
+    report("common term", timed(lambda: index.search(common), repeat))
+    report("rare term", timed(lambda: index.search(rare), repeat))
+    report("three terms", timed(lambda: index.search(' '.join(words)), repeat))
+    report(f"prefix ({prefix}*)", timed(lambda: index.search(prefix), repeat))
+    report("no match", timed(lambda: index.search("granito"), repeat))
+
+    def uncached(query):
+        index._cache.clear()
+        return index.suggest(query)
+    report(f"suggest '{prefix}' (cold)", timed(lambda: uncached(prefix), repeat))
+    report(f"suggest '{typed}' (cold)", timed(lambda: uncached(typed), repeat))
+    report(f"suggest '{prefix}' (cached)", timed(lambda: index.suggest(prefix), repeat))
+
+
+def bench_site(repeat):
+    """The real content, as indexed by the app at startup"""
+    warnings.simplefilter('ignore')
+    import app as portfolio
+
+    index = portfolio.search_index
+    print(f"\nsite content: {len(index)} documents, {len(index.postings)} terms")
+    print(f"  {'query':<32}{'p50 ms':>9}{'p95 ms':>9}")
+    for query in ("flask", "progressive web apps", "flas", "uttam"):
+        report(query, timed(lambda: index.search(query), repeat))
+
+    client = portfolio.app.test_client()
+    portfolio.limiter.enabled = False
+    report("GET /search?q=flask", timed(lambda: client.get('/search?q=flask'), repeat // 10))
+
+    # Every keystroke of a typed query, as the typeahead would send them
+    typed = "progressive web"
+    prefixes = [typed[:i] for i in range(2, len(typed) + 1)]
+    index._cache.clear()
+    cold = [timed(lambda: client.get('/api/search', query_string={'q': q}), 1)[0] for q in prefixes]
+    warm = [timed(lambda: client.get('/api/search', query_string={'q': q}), 1)[0] for q in prefixes]
+    report("GET /api/search (cold)", cold)
+    report("GET /api/search (cached)", warm)
+    print(f"  suggestion cache: {index.cache_hits} hits, {index.cache_misses} misses")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                        help="Synthetic index sizes")
+    parser.add_argument('--repeat', type=int, default=500, help="Queries per measurement")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    for size in args.sizes:
+        bench_size(size, args.repeat)
+
+    os.chdir(ROOT)
+    bench_site(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - VISITOR CONCURRENCY BENCHMARK
+==========================================
+
+Hammers track_visitor from N processes sharing one visitor log, then checks
+that every single visit made it to disk and reports throughput per worker
+count.
+
+Usage:
+    python benchmarks/bench_visitor_concurrency.py [--visits 2000] [--workers 1 2 4 8]
+    python benchmarks/bench_visitor_concurrency.py --write-behind
+"""
+
+import os
+import sys
+import time
+import json
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def worker(worker_id, visits, start_event):
+    """Track `visits` visits tagged with this worker's id"""
+    import visitor_tracker
+
+    start_event.wait()
+    for i in range(visits):
+        visitor_tracker.track_visitor(f"{worker_id}.{i}", "bench-agent")
+
+    # multiprocessing children skip atexit, so flush the queue explicitly
+    if visitor_tracker.writer is not None:
+        visitor_tracker.writer.stop()
+
+
+def run(workers, visits):
+    """Run one round and return (elapsed seconds, missing, duplicated)"""
+    import visitor_tracker
+
+    if os.path.exists("data"):
+        shutil.rmtree("data")
+    visitor_tracker.store.max_records = workers * visits + 1
+    visitor_tracker.store._line_count = None
+
+    start_event = multiprocessing.Event()
+    procs = [
+        multiprocessing.Process(target=worker, args=(w, visits, start_event))
+        for w in range(workers)
+    ]
+    for p in procs:
+        p.start()
+
+    started = time.perf_counter()
+    start_event.set()
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - started
+
+    seen = {}
+    with open(visitor_tracker.VISITORS_LOG, 'r', encoding='utf-8') as f:
+        f.readline()  # header
+        for line in f:
+            ip = json.loads(line)['ip']
+            seen[ip] = seen.get(ip, 0) + 1
+
+    expected = {f"{w}.{i}" for w in range(workers) for i in range(visits)}
+    missing = len(expected - seen.keys())
+    duplicated = sum(1 for count in seen.values() if count > 1)
+    return elapsed, missing, duplicated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--visits', type=int, default=2000, help="visits per worker")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--write-behind', action='store_true',
+                        help="use the background write-behind queue")
+    args = parser.parse_args()
+
+    os.environ['VISITOR_WRITE_BEHIND'] = 'true' if args.write_behind else 'false'
+    sys.path.insert(0, ROOT)
+    workdir = tempfile.mkdtemp(prefix="granito-bench-")
+    os.chdir(workdir)
+
+    import logging
+    logging.disable(logging.INFO)
+
+    mode = "write-behind" if args.write_behind else "inline"
+    print(f"track_visitor from N processes ({mode}, {args.visits} visits each)")
+    print(f"{'workers':>8} {'visits':>8} {'seconds':>8} {'visits/s':>10} {'missing':>8} {'dupes':>6}")
+
+    failed = False
+    try:
+        for workers in args.workers:
+            elapsed, missing, duplicated = run(workers, args.visits)
+            total = workers * args.visits
+            print(f"{workers:>8} {total:>8} {elapsed:>8.2f} {total / elapsed:>10.0f} "
+                  f"{missing:>8} {duplicated:>6}")
+            failed = failed or missing or duplicated
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if failed:
+        print("FAILED: visits were lost or duplicated")
+        sys.exit(1)
+    print("OK: no visits lost")
+
+
+if __name__ == "__main__":
+    multiprocessing.set_start_method('fork')
+    main()
@@ -0,0 +1,179 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - VISITOR REPORTS BENCHMARK
+==========================================
+
+Compares building the full admin report set (stats, daily, pages, hourly,
+unique) the old way - every function loading and looping over the visitor
+history on its own - against one load and one pass with build_reports.
+
+Usage:
+    python benchmarks/bench_visitor_reports.py [--sizes 10000 1000000]
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from visitor_store import VisitorLog  # noqa: E402
+from visitor_aggregates import build_reports  # noqa: E402
+
+PAGES = ['/', '/about', '/projects', '/blog', '/contact']
+
+
+# ==================== PREVIOUS IMPLEMENTATION ====================
+# Verbatim loops from visitor_tracker before the single-pass engine; each
+# one loads the full history itself.
+
+def old_visitor_stats(visitors):
+    now = datetime.utcnow()
+    today = now.date()
+    week_ago = (now - timedelta(days=7)).date()
+    month_ago = (now - timedelta(days=30)).date()
+    today_count = week_count = month_count = 0
+    unique_ips = set()
+    page_counts = defaultdict(int)
+    for visitor in visitors:
+        try:
+            visitor_date = datetime.fromisoformat(visitor['date']).date()
+            unique_ips.add(visitor['ip'])
+            page_counts[visitor.get('page', '/')] += 1
+            if visitor_date == today:
+                today_count += 1
+            if visitor_date >= week_ago:
+                week_count += 1
+            if visitor_date >= month_ago:
+                month_count += 1
+        except (KeyError, ValueError):
+            continue
+    return {
+        'total': len(visitors), 'today': today_count, 'this_week': week_count,
+        'this_month': month_count, 'unique_ips': len(unique_ips),
+        'pages': dict(page_counts), 'recent': visitors[-10:][::-1]
+    }
+
+
+def old_daily_stats(visitors, days=30):
+    start_date = (datetime.utcnow() - timedelta(days=days)).date()
+    daily_counts = defaultdict(int)
+    for visitor in visitors:
+        try:
+            visitor_date = datetime.fromisoformat(visitor['date']).date()
+            if visitor_date >= start_date:
+                daily_counts[visitor_date.isoformat()] += 1
+        except (KeyError, ValueError):
+            continue
+    return dict(daily_counts)
+
+
+def old_page_stats(visitors):
+    page_counts = defaultdict(int)
+    for visitor in visitors:
+        page_counts[visitor.get('page', '/')] += 1
+    return dict(sorted(page_counts.items(), key=lambda x: x[1], reverse=True))
+
+
+def old_hourly_distribution(visitors):
+    hourly_counts = defaultdict(int)
+    for visitor in visitors:
+        try:
+            hourly_counts[datetime.fromisoformat(visitor['timestamp']).hour] += 1
+        except (KeyError, ValueError):
+            continue
+    for hour in range(24):
+        hourly_counts.setdefault(hour, 0)
+    return dict(sorted(hourly_counts.items()))
+
+
+def old_unique_visitors(visitors, days=7):
+    cutoff_date = (datetime.utcnow() - timedelta(days=days)).date()
+    unique_ips = set()
+    for visitor in visitors:
+        try:
+            if datetime.fromisoformat(visitor['date']).date() >= cutoff_date:
+                unique_ips.add(visitor['ip'])
+        except (KeyError, ValueError):
+            continue
+    return len(unique_ips)
+
+
+def old_dashboard(log):
+    return (
+        old_visitor_stats(log.load()),
+        old_daily_stats(log.load()),
+        old_page_stats(log.load()),
+        old_hourly_distribution(log.load()),
+        old_unique_visitors(log.load()),
+    )
+
+
+def new_dashboard(log):
+    reports = build_reports(log.iter_records())
+    return (
+        reports.summary(),
+        reports.daily(),
+        reports.pages(),
+        reports.hourly(),
+        reports.unique(),
+    )
+
+
+# ==================== BENCHMARK ====================
+
+def synthetic_visitors(count, days=90):
+    """Generate `count` visitor records spread over the last `days` days"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    for _ in range(count):
+        ts = now - timedelta(seconds=rng.randrange(days * 86400))
+        yield {
+            "ip": f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}",
+            "user_agent": "Mozilla/5.0 (bench)",
+            "page": rng.choice(PAGES),
+            "timestamp": ts.isoformat(),
+            "date": ts.date().isoformat()
+        }
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 1000000])
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    workdir = tempfile.mkdtemp(prefix="granito-bench-")
+
+    print(f"{'records':>10} {'old (5 scans)':>14} {'new (1 pass)':>13} {'speedup':>8}  match")
+    try:
+        for size in args.sizes:
+            log = VisitorLog(os.path.join(workdir, f"visitors-{size}.log"),
+                             legacy_path=None, max_records=size)
+            log.replace(synthetic_visitors(size))
+
+            old_time, old_result = timed(old_dashboard, log)
+            new_time, new_result = timed(new_dashboard, log)
+
+            print(f"{size:>10} {old_time:>13.2f}s {new_time:>12.2f}s "
+                  f"{old_time / new_time:>7.1f}x  {old_result == new_result}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
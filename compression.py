@@ -0,0 +1,219 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - RESPONSE COMPRESSION
+Version: 2.0
+==========================================
+"""
+
+import gzip
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Encodings in order of preference (brotli is skipped when not installed)
+ENCODINGS = ('br', 'gzip')
+
+# Text types worth compressing; images, fonts and archives already are
+COMPRESSIBLE_TYPES = {
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/xml',
+    'text/javascript',
+    'application/javascript',
+    'application/json',
+    'application/manifest+json',
+    'application/xml',
+    'image/svg+xml',
+}
+
+
+def compress(data, encoding, level):
+    """
+    Compress bytes with a content coding
+
+    Args:
+        data (bytes): Uncompressed body
+        encoding (str): 'br' or 'gzip'
+        level (int): Brotli quality (0-11) or gzip level (1-9)
+
+    Returns:
+        bytes: Compressed body
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    if encoding == 'gzip':
+        return gzip.compress(data, level, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+# ==================== COMPRESSOR ====================
+
+class Compressor:
+    """
+    Compresses eligible response bodies for the encodings a client accepts
+
+    A response is left alone unless it is a buffered (not streamed or
+    file-backed) 200 with an allowlisted Content-Type, no Content-Encoding
+    yet, no ``Cache-Control: no-transform`` and at least ``min_size`` bytes.
+    Precompressed files (the static bundle) arrive with Content-Encoding
+    set and pass straight through.
+
+    Bodies of responses that are themselves cached are compressed once:
+    the caller passes a ``cache_key`` identifying the exact bytes (e.g. the
+    ETag of a cached page) and the compressed body is kept in a small LRU
+    bounded by ``cache_bytes``.
+    """
+
+    def __init__(self, levels=None, min_size=500, mimetypes=None,
+                 cache_entries=128, cache_bytes=4 * 1024 * 1024):
+        levels = levels or {'br': 4, 'gzip': 6}
+        self.levels = {encoding: level for encoding, level in levels.items()
+                       if encoding != 'br' or brotli is not None}
+        self.min_size = min_size
+        self.mimetypes = set(mimetypes or COMPRESSIBLE_TYPES)
+        self.cache_entries = cache_entries
+        self.cache_bytes = cache_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()  # (cache key, encoding) -> compressed body
+        self._cache_size = 0
+        self._lock = threading.Lock()
+
+        if brotli is None and 'br' in levels:
+            logger.warning("Brotli not installed; compressing responses with gzip only")
+
+    def is_compressible(self, response):
+        """
+        Check whether a response may be compressed
+
+        Args:
+            response: Flask/Werkzeug response
+
+        Returns:
+            bool: True if the body is buffered, eligible and large enough
+        """
+        return (response.status_code == 200
+                and not response.direct_passthrough
+                and not response.is_streamed
+                and response.mimetype in self.mimetypes
+                and 'Content-Encoding' not in response.headers
+                and not response.cache_control.no_transform
+                and (response.content_length or 0) >= self.min_size)
+
+    def choose_encoding(self, accept_encodings):
+        """
+        Pick the preferred encoding a client accepts
+
+        Args:
+            accept_encodings: The request's parsed ``Accept-Encoding``
+
+        Returns:
+            str: Encoding, or None to send the body as is
+        """
+        for encoding in ENCODINGS:
+            if encoding in self.levels and accept_encodings.quality(encoding) > 0:
+                return encoding
+        return None
+
+    def compress_response(self, response, accept_encodings, cache_key=None):
+        """
+        Compress a response in place
+
+        Args:
+            response: Flask/Werkzeug response
+            accept_encodings: The request's parsed ``Accept-Encoding``
+            cache_key (str): Identifies the body's exact bytes; reuse the
+                compressed body for later responses with the same key
+
+        Returns:
+            Response: The same response
+        """
+        if not self.is_compressible(response):
+            return response
+
+        # Caches must keep one copy per Accept-Encoding
+        response.vary.add('Accept-Encoding')
+
+        encoding = self.choose_encoding(accept_encodings)
+        if encoding is None:
+            return response
+
+        data = self._compressed(response.get_data(), encoding, cache_key)
+        if data is None:
+            return response
+
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+
+        # The compressed bytes differ from the identity representation,
+        # but are semantically equivalent
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _compressed(self, data, encoding, cache_key):
+        """Compressed body (None if compression does not help)"""
+        if cache_key is None:
+            compressed = compress(data, encoding, self.levels[encoding])
+            return compressed if len(compressed) < len(data) else None
+
+        # Key on a digest of the body too, so a stale key can never serve
+        # someone else's bytes
+        key = (cache_key, hashlib.sha1(data).hexdigest(), encoding)
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            self.misses += 1
+
+        compressed = compress(data, encoding, self.levels[encoding])
+        if len(compressed) >= len(data):
+            compressed = None
+
+        size = len(compressed or b'')
+        if size <= self.cache_bytes:
+            with self._lock:
+                if key not in self._cache:
+                    self._cache[key] = compressed
+                    self._cache_size += size
+                while len(self._cache) > self.cache_entries or self._cache_size > self.cache_bytes:
+                    _, evicted = self._cache.popitem(last=False)
+                    self._cache_size -= len(evicted or b'')
+        return compressed
+
+    def clear(self):
+        """Drop every cached body and reset the counters"""
+        with self._lock:
+            self._cache.clear()
+            self._cache_size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Get compressed-body cache counters
+
+        Returns:
+            dict: hits, misses, hit_rate, entries, bytes
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'entries': len(self._cache),
+                'bytes': self._cache_size
+            }
@@ -33,12 +33,85 @@ class Config:
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf'}
     
     # Rate Limiting
-    RATELIMIT_STORAGE_URL = "memory://"
+    # Counters live in SQLite (see ratelimit_store.py) so every gunicorn
+    # worker shares them; "memory://" keeps a separate budget per worker
+    RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI', 'sqlite:///data/ratelimits.db')
+    RATELIMIT_STRATEGY = 'sliding-window-counter'
+    RATELIMIT_STORAGE_OPTIONS = {'purge_interval': 60}  # seconds between expired-counter sweeps
+    
+    # Page Cache (Flask-Caching)
+    # 'SimpleCache' (in-process), 'FileSystemCache' (shared by all workers
+    # through CACHE_DIR) or 'NullCache' (disabled)
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'SimpleCache')
+    CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT') or 3600)  # seconds
+    CACHE_DIR = os.environ.get('CACHE_DIR') or 'data/cache'
+    CACHE_THRESHOLD = 500
+    
+    # Cache lifetime per endpoint in seconds (CACHE_DEFAULT_TIMEOUT if absent)
+    PAGE_CACHE_TIMEOUTS = {
+        'about': 3600,
+        'projects': 3600,
+        'blog': 3600,
+        'offline': 86400,
+        'api_skills': 86400
+    }
+    
+    # Response Compression (gzip, plus brotli when installed)
+    # Dynamic levels trade CPU for bytes; see benchmarks/bench_compression.py
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() in ['true', 'on', '1']
+    COMPRESS_LEVELS = {'br': 4, 'gzip': 6}
+    COMPRESS_MIN_SIZE = 500  # bytes; smaller bodies fit in a packet anyway
+    COMPRESS_CACHE_BYTES = 4 * 1024 * 1024  # compressed bodies of cached pages
+    
+    # Site Search (in-process index over projects, blog posts and pages)
+    SEARCH_RESULTS_LIMIT = 20
+    SEARCH_MAX_QUERY = 200  # characters
+    SEARCH_REFRESH_INTERVAL = 5  # seconds between checks for changed content
+    
+    # Typeahead API (/api/search): under the default rate limits, so the
+    # browser debounces, waits for 2 characters and caches answers (and
+    # HTTP caching lets it reuse them); answers are also cached per worker
+    SEARCH_SUGGEST_LIMIT = 6
+    SEARCH_SUGGEST_CACHE_SIZE = 256
+    SEARCH_API_MAX_AGE = 60  # seconds browsers may reuse an answer
+    
+    # Logging: records are queued and written by a background thread as
+    # JSON lines to LOG_FILE, which all workers share and rotate by size or
+    # age; messages starting with a LOG_SAMPLED_MESSAGES prefix pass
+    # LOG_SAMPLE_BURST times per interval, then one in LOG_SAMPLE_EVERY
+    LOG_FILE = os.environ.get('LOG_FILE') or 'app.log'
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    LOG_CONSOLE = os.environ.get('LOG_CONSOLE', 'true').lower() in ['true', 'on', '1']
+    LOG_MAX_BYTES = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT = 5
+    LOG_ROTATE_INTERVAL = 86400  # seconds per file (0 disables time rotation)
+    LOG_QUEUE_SIZE = 10000  # records buffered before new ones are dropped
+    LOG_SAMPLED_MESSAGES = ('Invalid visitor record',)
+    LOG_SAMPLE_BURST = 10
+    LOG_SAMPLE_EVERY = 1000
+    LOG_SAMPLE_INTERVAL = 60  # seconds
+    
+    # Metrics (/metrics, Prometheus text format): each worker snapshots its
+    # counters into METRICS_DIR and the endpoint merges them. Readable by an
+    # admin session or with "Authorization: Bearer <METRICS_TOKEN>"
+    METRICS_DIR = os.environ.get('METRICS_DIR') or 'data/metrics'
+    METRICS_FLUSH_INTERVAL = 5  # seconds between a worker's snapshots
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    
+    # Request profiler: a sampled fraction of requests (PROFILE_SAMPLE_RATE,
+    # changeable from the admin dashboard) or ones sent with
+    # "X-Profile: <PROFILE_TOKEN>" (any value from an admin session) have
+    # their stacks sampled every PROFILE_INTERVAL seconds; download them as
+    # collapsed stacks for flamegraphs from the dashboard
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE') or 0)
+    PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN')
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or 'data/profiles'
+    PROFILE_INTERVAL = 0.005  # seconds
     
     # CORS Settings
     CORS_HEADERS = 'Content-Type'
     
-    # Email Settings (if using Flask-Mail)
+    # Email Settings
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
     MAIL_PORT = int(os.environ.get('MAIL_PORT') or 587)
     MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'true').lower() in ['true', 'on', '1']
@@ -46,10 +119,45 @@ class Config:
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
     
+    # Contact notifications: sent in the background when MAIL_SERVER is set,
+    # batched over a pooled SMTP connection and retried with backoff
+    MAIL_NOTIFY_RECIPIENT = os.environ.get('MAIL_NOTIFY_RECIPIENT') or MAIL_DEFAULT_SENDER
+    MAIL_MAX_ATTEMPTS = 4
+    MAIL_BATCH_SIZE = 20
+    MAIL_FLUSH_INTERVAL = 2.0  # seconds
+    
     # Database Settings (if using database)
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///portfolio.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Storage engine for visitors and contacts: 'json' (data/*.json files)
+    # or 'sqlite' (SQLALCHEMY_DATABASE_URI, migrate with `python sqlite_store.py`)
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'json').lower()
+    
+    # Contact journal (json backend): fsync every commit so an acknowledged
+    # message survives power loss, and fold the journal into contacts.json
+    # once it grows past CONTACT_JOURNAL_COMPACT_BYTES
+    CONTACT_JOURNAL_FSYNC = os.environ.get('CONTACT_JOURNAL_FSYNC', 'true').lower() in ['true', 'on', '1']
+    CONTACT_JOURNAL_COMPACT_BYTES = 1024 * 1024
+    
+    # Visitor Tracking
+    # Retained visits; the columnar stats table costs ~17 bytes per visit
+    # (plus each distinct IP/page/user agent once), so 1M visits is ~17 MB
+    VISITOR_MAX_RECORDS = int(os.environ.get('VISITOR_MAX_RECORDS') or 1000000)
+    
+    # Write-behind queue
+    VISITOR_WRITE_BEHIND = os.environ.get('VISITOR_WRITE_BEHIND', 'true').lower() in ['true', 'on', '1']
+    VISITOR_QUEUE_SIZE = 10000
+    VISITOR_BATCH_SIZE = 100
+    VISITOR_FLUSH_INTERVAL = 1.0  # seconds
+    VISITOR_QUEUE_POLICY = 'drop'  # 'drop' or 'block'
+    
+    # Unique visitor counting: windows up to VISITOR_UNIQUE_EXACT_LIMIT visits
+    # are counted exactly, larger ones with HyperLogLog sketches (4 KB per day
+    # at the default 2% standard error)
+    VISITOR_UNIQUE_ERROR = float(os.environ.get('VISITOR_UNIQUE_ERROR') or 0.02)
+    VISITOR_UNIQUE_EXACT_LIMIT = int(os.environ.get('VISITOR_UNIQUE_EXACT_LIMIT') or 10000)
+    
     # Analytics
     GOOGLE_ANALYTICS_ID = os.environ.get('GOOGLE_ANALYTICS_ID')
     
@@ -98,6 +206,7 @@ class TestingConfig(Config):
     TESTING = True
     DEBUG = True
     WTF_CSRF_ENABLED = False
+    CACHE_TYPE = 'NullCache'
 
 
 # Configuration dictionary
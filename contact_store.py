@@ -0,0 +1,483 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - CONTACT STORAGE
+Version: 2.0
+==========================================
+"""
+
+import os
+import json
+import uuid
+import logging
+import threading
+from collections import defaultdict
+
+from utils import file_lock, atomic_write_json, json_cache
+from instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+# File paths
+CONTACTS_FILE = "data/contacts.json"
+
+# Inbox states; submissions start as 'new' (also assumed when missing)
+CONTACT_STATUSES = ('new', 'read', 'replied', 'archived')
+
+# Admin inbox page size
+CONTACTS_PER_PAGE = 25
+
+
+def new_contact_id():
+    """Random, never reused contact ID"""
+    return uuid.uuid4().hex[:16]
+
+
+def _sort_key(contact):
+    """Inbox order: timestamp (old records use a space, new ones ISO 'T'), then ID"""
+    return (str(contact.get('timestamp') or '').replace('T', ' '), str(contact['id']))
+
+
+def _status_key(contact):
+    return contact.get('status') or 'new'
+
+
+def _email_key(contact):
+    return str(contact.get('email') or '').lower()
+
+
+# ==================== INBOX INDEX ====================
+
+class ContactIndex:
+    """
+    Index over a contact list for the admin inbox
+
+    Contacts are looked up by ID in a dict and listed from per-status and
+    per-email ID lists kept in timestamp order, so a page costs the same
+    however large the inbox is. Journal entries written by this process
+    are applied in place (a binary search and a list insert or removal);
+    anything else replaces the index.
+    """
+
+    def __init__(self, contacts):
+        self.by_id = {}
+        self.keys = {}  # id -> sort key
+        self.oldest_first = []
+        self.by_status = defaultdict(list)
+        self.by_email = defaultdict(list)
+
+        for contact in sorted(contacts, key=_sort_key):
+            contact_id = contact['id']
+            self.by_id[contact_id] = contact
+            self.keys[contact_id] = _sort_key(contact)
+            for ids in self._lists(contact):
+                ids.append(contact_id)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def get(self, contact_id):
+        """
+        Look up a contact
+
+        Args:
+            contact_id (str): Contact ID
+
+        Returns:
+            dict: Contact, or None if unknown
+        """
+        return self.by_id.get(contact_id)
+
+    def status_counts(self):
+        """
+        Count contacts per status
+
+        Returns:
+            dict: Status -> number of contacts (every known status present)
+        """
+        counts = {status: 0 for status in CONTACT_STATUSES}
+        counts.update((status, len(ids)) for status, ids in self.by_status.items() if ids)
+        return counts
+
+    def query(self, status=None, email=None, offset=0, limit=CONTACTS_PER_PAGE):
+        """
+        One page of contacts, newest first
+
+        Args:
+            status (str): Only contacts in this state
+            email (str): Only contacts from this address (case-insensitive)
+            offset (int): Contacts to skip
+            limit (int): Page size
+
+        Returns:
+            tuple: (contacts on the page, total matching contacts)
+        """
+        if status and email:
+            # Walk the shorter list, test the other condition per contact
+            by_status = self.by_status.get(status, [])
+            by_email = self.by_email.get(email.lower(), [])
+            if len(by_status) <= len(by_email):
+                ids = [i for i in by_status if _email_key(self.by_id[i]) == email.lower()]
+            else:
+                ids = [i for i in by_email if _status_key(self.by_id[i]) == status]
+        elif status:
+            ids = self.by_status.get(status, [])
+        elif email:
+            ids = self.by_email.get(email.lower(), [])
+        else:
+            ids = self.oldest_first
+
+        end = max(len(ids) - offset, 0)
+        page = ids[max(end - limit, 0):end]
+        return [self.by_id[i] for i in reversed(page)], len(ids)
+
+    def apply(self, entry):
+        """
+        Apply a journal entry (see ``ContactJournal``) in place
+
+        Args:
+            entry (dict): ``add``, ``update`` or ``delete`` entry
+        """
+        op = entry.get('op')
+        if op == 'add':
+            contact = dict(entry['contact'])
+            self._remove(contact['id'])
+            self._insert(contact)
+        elif op == 'update' and entry.get('id') in self.by_id:
+            contact = dict(self.by_id[entry['id']], **(entry.get('fields') or {}))
+            self._remove(contact['id'])
+            self._insert(contact)
+        elif op == 'delete':
+            self._remove(entry.get('id'))
+
+    def _lists(self, contact):
+        """ID lists a contact belongs to"""
+        return (
+            self.oldest_first,
+            self.by_status[_status_key(contact)],
+            self.by_email[_email_key(contact)]
+        )
+
+    def _position(self, ids, key):
+        """First position in an ID list whose key is not below key"""
+        lo, hi = 0, len(ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.keys[ids[mid]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _insert(self, contact):
+        contact_id = contact['id']
+        key = _sort_key(contact)
+        self.by_id[contact_id] = contact
+        self.keys[contact_id] = key
+        for ids in self._lists(contact):
+            ids.insert(self._position(ids, key), contact_id)
+
+    def _remove(self, contact_id):
+        contact = self.by_id.get(contact_id)
+        if contact is None:
+            return
+        key = self.keys[contact_id]
+        for ids in self._lists(contact):
+            del ids[self._position(ids, key)]
+        del self.by_id[contact_id]
+        del self.keys[contact_id]
+
+
+# ==================== CONTACT JOURNAL ====================
+
+class ContactJournal:
+    """
+    Contact submissions as a JSON snapshot plus an append-only journal
+
+    ``path`` holds the snapshot: the same JSON list the site always used.
+    Every change is one JSON line appended to ``journal_path`` - ``add``
+    for a submission, ``update`` for changed fields and ``delete`` as a
+    tombstone - so a commit writes a few hundred bytes however large the
+    inbox is, and never rewrites past messages.
+
+    Crash safety:
+    - a commit is durable once its line and newline are written (and
+      fsynced when ``fsync`` is on); a line torn by a crash is ignored on
+      replay and cut off before the next append
+    - once the journal grows past ``compact_bytes`` it is folded into a new
+      snapshot (temp file, fsync, atomic rename) and only then emptied;
+      replay is idempotent (``add`` replaces a contact with the same ID),
+      so a crash between the two steps loses nothing
+
+    Writers and readers serialise on a ``file_lock`` on the snapshot, so
+    gunicorn workers never see a half-finished compaction.
+    """
+
+    def __init__(self, path=CONTACTS_FILE, journal_path=None, fsync=True,
+                 compact_bytes=1024 * 1024):
+        self.path = path
+        self.journal_path = journal_path or os.path.splitext(path)[0] + ".journal"
+        self.fsync = fsync
+        self.compact_bytes = compact_bytes
+        self._index = None
+        self._index_signature = None
+        self._index_lock = threading.Lock()
+
+    # ---------- Reading ----------
+
+    def load(self):
+        """
+        Load every contact submission (snapshot with the journal replayed)
+
+        Returns:
+            list: Contacts, oldest first
+        """
+        try:
+            with file_lock(self.path):
+                self._migrate_ids()
+                return list(self._replay().values())
+        except Exception as e:
+            logger.error(f"Error loading contacts from {self.path}: {e}")
+            return []
+
+    def index(self):
+        """
+        Index of the current contacts, rebuilt only when a file changed
+
+        Returns:
+            ContactIndex: Inbox index
+        """
+        signature = self._signature()
+        if self._index is None or signature != self._index_signature:
+            with file_lock(self.path):
+                self._migrate_ids()
+                signature = self._signature()
+                contacts = list(self._replay().values())
+            with self._index_lock:
+                self._index = ContactIndex(contacts)
+                self._index_signature = signature
+        return self._index
+
+    def query(self, status=None, email=None, offset=0, limit=CONTACTS_PER_PAGE):
+        """
+        One page of contacts, newest first (see ``ContactIndex.query``)
+
+        Returns:
+            tuple: (contacts on the page, total matching contacts)
+        """
+        index = self.index()
+        with self._index_lock:
+            return index.query(status, email, offset, limit)
+
+    def status_counts(self):
+        """
+        Count contacts per status
+
+        Returns:
+            dict: Status -> number of contacts
+        """
+        index = self.index()
+        with self._index_lock:
+            return index.status_counts()
+
+    def get(self, contact_id):
+        """
+        Look up a contact by ID
+
+        Args:
+            contact_id (str): Contact ID
+
+        Returns:
+            dict: Contact, or None if unknown
+        """
+        index = self.index()
+        with self._index_lock:
+            return index.get(contact_id)
+
+    # ---------- Writing ----------
+
+    def append(self, contact):
+        """
+        Add a contact submission
+
+        Args:
+            contact (dict): Contact data (an ``id`` is assigned if missing)
+
+        Returns:
+            bool: True once the submission is committed
+        """
+        contact.setdefault('id', new_contact_id())
+        return self._commit({'op': 'add', 'contact': contact})
+
+    def update(self, contact_id, **fields):
+        """
+        Change fields (e.g. ``status``) of a contact
+
+        Args:
+            contact_id (str): Contact ID
+            **fields: New values
+
+        Returns:
+            bool: True if the contact exists and the change was committed
+        """
+        if self.get(contact_id) is None:
+            return False
+        return self._commit({'op': 'update', 'id': contact_id, 'fields': fields})
+
+    def delete(self, contact_id):
+        """
+        Delete a contact (recorded as a tombstone until the next compaction)
+
+        Args:
+            contact_id (str): Contact ID
+
+        Returns:
+            bool: True if the contact existed and the deletion was committed
+        """
+        if self.get(contact_id) is None:
+            return False
+        return self._commit({'op': 'delete', 'id': contact_id})
+
+    def compact(self):
+        """
+        Fold the journal into a new snapshot and empty it
+
+        Returns:
+            int: Number of journal entries folded in
+        """
+        with file_lock(self.path):
+            return self._compact_locked()
+
+    # ---------- Internals ----------
+
+    @metrics.timed('storage_save')
+    def _commit(self, entry):
+        """Append one journal entry durably, compacting when due"""
+        line = (json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+        try:
+            with file_lock(self.path):
+                # An index that saw every earlier commit can take this one
+                # in place instead of being rebuilt
+                fresh = self._index is not None and self._signature() == self._index_signature
+
+                with open(self.journal_path, 'ab') as f:
+                    self._repair_tail(f)
+                    self._write(f, line)
+                    f.flush()
+                    if self.fsync:
+                        os.fsync(f.fileno())
+
+                    journal_size = f.tell()
+
+                if journal_size > self.compact_bytes:
+                    self._compact_locked()
+
+                if fresh:
+                    with self._index_lock:
+                        self._index.apply(entry)
+                        self._index_signature = self._signature()
+            return True
+        except Exception as e:
+            logger.error(f"Error committing contact change to {self.journal_path}: {e}")
+            return False
+
+    @staticmethod
+    def _write(f, data):
+        """Write the entry bytes (separate so crash tests can tear it)"""
+        f.write(data)
+
+    @staticmethod
+    def _repair_tail(f):
+        """Cut off a line torn by a crash so the next entry starts clean"""
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+
+        with open(f.name, 'rb') as reader:
+            reader.seek(size - 1)
+            if reader.read(1) == b'\n':
+                return
+            reader.seek(0)
+            end = reader.read().rfind(b'\n') + 1
+
+        logger.warning(f"Discarding torn entry at the end of {f.name}")
+        f.truncate(end)
+        f.seek(end)
+
+    def _read_snapshot(self):
+        """Contacts in the snapshot (lock held)"""
+        if not os.path.exists(self.path):
+            return []
+        contacts = json_cache.load(self.path)
+        if not isinstance(contacts, list):
+            raise ValueError(f"{self.path} is not a list")
+        return contacts
+
+    def _read_journal(self):
+        """Complete journal entries, oldest first (lock held)"""
+        try:
+            with open(self.journal_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+
+        entries = []
+        for line_no, line in enumerate(data.splitlines(keepends=True), 1):
+            if not line.endswith(b'\n'):
+                break  # torn by a crash mid-commit, never acknowledged
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping malformed contact journal line {line_no}")
+        return entries
+
+    def _replay(self, entries=None):
+        """Snapshot with the journal applied, as an ordered id -> contact dict"""
+        contacts = {}
+        for contact in self._read_snapshot():
+            contacts[contact['id']] = contact
+
+        for entry in self._read_journal() if entries is None else entries:
+            op = entry.get('op')
+            if op == 'add':
+                contact = entry['contact']
+                contacts[contact['id']] = contact
+            elif op == 'update' and entry.get('id') in contacts:
+                contacts[entry['id']].update(entry.get('fields') or {})
+            elif op == 'delete':
+                contacts.pop(entry.get('id'), None)
+        return contacts
+
+    def _compact_locked(self):
+        """Write a new snapshot, then empty the journal (lock held)"""
+        self._migrate_ids()
+        entries = self._read_journal()
+        contacts = self._replay(entries)
+
+        atomic_write_json(self.path, list(contacts.values()), indent=2)
+        with open(self.journal_path, 'wb') as f:
+            if self.fsync:
+                os.fsync(f.fileno())
+
+        if entries:
+            logger.info(f"Compacted {len(entries)} contact journal entries into {self.path}")
+        return len(entries)
+
+    def _migrate_ids(self):
+        """Give snapshot contacts written before IDs existed one (lock held)"""
+        contacts = self._read_snapshot()
+        if any('id' not in contact for contact in contacts):
+            for contact in contacts:
+                contact.setdefault('id', new_contact_id())
+            atomic_write_json(self.path, contacts, indent=2)
+
+    def _signature(self):
+        """Identity and version of both files"""
+        signature = []
+        for path in (self.path, self.journal_path):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
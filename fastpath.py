@@ -0,0 +1,95 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - REQUEST FAST PATH
+Version: 2.0
+==========================================
+
+Classifies each request from its path before Flask routes it, so requests
+that only fetch a file (static assets, favicon, manifest, robots.txt,
+sitemap) can skip rate limiting, session loading and visitor tracking,
+and answers load-balancer health checks without entering Flask at all.
+"""
+
+import json
+
+from flask.sessions import SecureCookieSessionInterface
+
+# Request classes, stored in the WSGI environ under REQUEST_CLASS_KEY
+PAGE = 'page'
+ASSET = 'asset'
+HEALTH = 'health'
+
+REQUEST_CLASS_KEY = 'granito.request_class'
+
+# Files served at the site root
+ASSET_PATHS = frozenset({'/favicon.ico', '/manifest.json', '/robots.txt', '/sitemap.xml'})
+HEALTH_PATH = '/healthz'
+
+
+def classify(path, static_url_path='/static'):
+    """
+    Class of a request path
+
+    Args:
+        path (str): Request path (WSGI ``PATH_INFO``)
+        static_url_path (str): Prefix static files are served under
+
+    Returns:
+        str: HEALTH, ASSET or PAGE
+    """
+    if path == HEALTH_PATH:
+        return HEALTH
+    if path in ASSET_PATHS or path.startswith(static_url_path + '/'):
+        return ASSET
+    return PAGE
+
+
+def request_class(environ):
+    """Class recorded by FastPathMiddleware (PAGE without the middleware)"""
+    return environ.get(REQUEST_CLASS_KEY, PAGE)
+
+
+class FastPathMiddleware:
+    """
+    WSGI middleware tagging requests with their class
+
+    ``/healthz`` is answered here with a small JSON body: no URL routing,
+    session, rate limiting, hooks or templates, so a load balancer can
+    poll it as often as it likes. Everything else continues to the app
+    with ``environ[REQUEST_CLASS_KEY]`` set.
+    """
+
+    def __init__(self, app, static_url_path='/static'):
+        self.app = app
+        self.static_url_path = static_url_path
+        self._health_body = json.dumps({'status': 'ok'}).encode('utf-8')
+
+    def __call__(self, environ, start_response):
+        kind = classify(environ.get('PATH_INFO', ''), self.static_url_path)
+        if kind == HEALTH:
+            return self.health(environ, start_response)
+
+        environ[REQUEST_CLASS_KEY] = kind
+        return self.app(environ, start_response)
+
+    def health(self, environ, start_response):
+        """Liveness answer: the process is up and serving"""
+        if environ.get('REQUEST_METHOD') not in ('GET', 'HEAD'):
+            start_response('405 METHOD NOT ALLOWED', [('Allow', 'GET, HEAD'), ('Content-Length', '0')])
+            return [b'']
+
+        start_response('200 OK', [
+            ('Content-Type', 'application/json'),
+            ('Content-Length', str(len(self._health_body))),
+            ('Cache-Control', 'no-store')
+        ])
+        return [b''] if environ['REQUEST_METHOD'] == 'HEAD' else [self._health_body]
+
+
+class FastPathSessionInterface(SecureCookieSessionInterface):
+    """Cookie sessions, except that asset requests never load or save one"""
+
+    def open_session(self, app, request):
+        if request_class(request.environ) == ASSET:
+            return self.null_session_class()
+        return super().open_session(app, request)
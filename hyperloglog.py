@@ -0,0 +1,177 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - HYPERLOGLOG
+Version: 2.0
+==========================================
+"""
+
+import math
+import base64
+import hashlib
+
+try:
+    import numpy as np
+except ImportError:  # optional - pure Python register loops are used instead
+    np = None
+
+MIN_PRECISION = 4
+MAX_PRECISION = 16
+
+# 2 ** -k for every possible register value
+_INVERSE_POWERS = [2.0 ** -k for k in range(65)]
+
+
+def precision_for_error(error):
+    """
+    Smallest precision whose standard error is within a bound
+
+    The standard error of HyperLogLog is ``1.04 / sqrt(2 ** precision)``.
+
+    Args:
+        error (float): Target relative standard error (e.g. 0.02 for 2%)
+
+    Returns:
+        int: Precision between MIN_PRECISION and MAX_PRECISION
+    """
+    precision = math.ceil(2 * math.log2(1.04 / error))
+    return max(MIN_PRECISION, min(MAX_PRECISION, precision))
+
+
+def hash_value(value):
+    """
+    Stable 64-bit hash of a value (identical across processes and restarts)
+
+    Args:
+        value: Value to hash; converted with str()
+
+    Returns:
+        int: Unsigned 64-bit hash
+    """
+    digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+# ==================== HYPERLOGLOG ====================
+
+class HyperLogLog:
+    """
+    Fixed-size cardinality estimator
+
+    Uses ``2 ** precision`` one-byte registers regardless of how many
+    values are added. Sketches with the same precision merge losslessly,
+    so per-day sketches can be combined into any range of days.
+    """
+
+    def __init__(self, precision=12, registers=None):
+        if not MIN_PRECISION <= precision <= MAX_PRECISION:
+            raise ValueError(f"Precision must be between {MIN_PRECISION} and {MAX_PRECISION}")
+
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.size)
+        self._suffix_bits = 64 - precision
+        self._suffix_mask = (1 << self._suffix_bits) - 1
+
+        if len(self.registers) != self.size:
+            raise ValueError("Register count does not match precision")
+
+    def add(self, value):
+        """
+        Add a value
+
+        Args:
+            value: Value to count
+        """
+        self.add_hash(hash_value(value))
+
+    def add_hash(self, hashed):
+        """
+        Add a value already hashed with ``hash_value``
+
+        Args:
+            hashed (int): Unsigned 64-bit hash
+        """
+        index = hashed >> self._suffix_bits
+        rank = self._suffix_bits - (hashed & self._suffix_mask).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """
+        Fold another sketch into this one (register-wise maximum)
+
+        Args:
+            other (HyperLogLog): Sketch with the same precision
+        """
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+
+        if np is not None:
+            merged = np.maximum(
+                np.frombuffer(self.registers, dtype=np.uint8),
+                np.frombuffer(other.registers, dtype=np.uint8)
+            )
+            self.registers = bytearray(merged.tobytes())
+        else:
+            self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self):
+        """
+        Estimate the number of distinct values added
+
+        Returns:
+            int: Estimated cardinality
+        """
+        m = self.size
+
+        if np is not None:
+            registers = np.frombuffer(self.registers, dtype=np.uint8)
+            harmonic = float(np.sum(np.exp2(-registers.astype(np.float64))))
+            zeros = int(np.count_nonzero(registers == 0))
+        else:
+            harmonic = sum(map(_INVERSE_POWERS.__getitem__, self.registers))
+            zeros = self.registers.count(0)
+
+        if m == 16:
+            alpha = 0.673
+        elif m == 32:
+            alpha = 0.697
+        elif m == 64:
+            alpha = 0.709
+        else:
+            alpha = 0.7213 / (1 + 1.079 / m)
+
+        estimate = alpha * m * m / harmonic
+
+        # Small range correction (linear counting)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+
+        return int(round(estimate))
+
+    def copy(self):
+        """
+        Independent copy of the sketch
+
+        Returns:
+            HyperLogLog: Copy
+        """
+        return HyperLogLog(self.precision, self.registers)
+
+    def to_string(self):
+        """Serialise the registers as base64"""
+        return base64.b64encode(bytes(self.registers)).decode('ascii')
+
+    @classmethod
+    def from_string(cls, precision, data):
+        """
+        Restore a sketch produced by ``to_string``
+
+        Args:
+            precision (int): Precision the sketch was built with
+            data (str): Base64 registers
+
+        Returns:
+            HyperLogLog: Restored sketch
+        """
+        return cls(precision, base64.b64decode(data))
@@ -0,0 +1,448 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - INSTRUMENTATION
+Version: 2.0
+==========================================
+
+In-process counters and latency histograms, exported in the Prometheus
+text format. Each gunicorn worker keeps its own and writes a snapshot to
+METRICS_DIR every few seconds; ``/metrics`` merges the snapshots of every
+worker, so a scrape sees the whole host whichever worker answers it.
+
+    with metrics.span('render'):
+        ...
+
+    @metrics.timed('stats')
+    def get_visitor_stats():
+        ...
+"""
+
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+from bisect import bisect_left
+from functools import wraps
+
+try:
+    import fcntl
+except ImportError:  # Windows (waitress) - snapshots are folded without a lock
+    fcntl = None
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds: 100 us (a span) to 10 s (a slow request)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Metric names
+REQUESTS_TOTAL = 'granito_http_requests_total'
+REQUEST_SECONDS = 'granito_http_request_duration_seconds'
+SPAN_SECONDS = 'granito_span_duration_seconds'
+CACHE_HITS = 'granito_cache_hits_total'
+CACHE_MISSES = 'granito_cache_misses_total'
+RATELIMIT_REJECTIONS = 'granito_ratelimit_rejections_total'
+
+COUNTER = 'counter'
+HISTOGRAM = 'histogram'
+
+# Snapshots of workers that have exited are summed into this file
+RETIRED_FILE = 'retired.json'
+
+# Formatted label strings kept for reuse (label values must be few)
+LABEL_CACHE_SIZE = 4096
+
+
+def format_labels(labels):
+    """
+    Prometheus label string
+
+    Args:
+        labels (dict): Label name -> value
+
+    Returns:
+        str: e.g. 'endpoint="home",status="200"'
+    """
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# ==================== HISTOGRAM ====================
+
+class Histogram:
+    """Observation counts per bucket (the last one is +Inf) and their sum"""
+
+    __slots__ = ('bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """
+        Record one observation
+
+        Args:
+            value (float): Observed value (seconds)
+        """
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(self.bounds) + 1)
+            self.sum = 0.0
+
+
+class _Span:
+    """Context manager adding its duration to a histogram"""
+
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+# ==================== REGISTRY ====================
+
+class Metrics:
+    """
+    Counters and histograms of one process, plus their merged export
+
+    Series are identified by metric name and label string. Collectors are
+    callables returning ``(name, labels, value)`` counters read at export
+    time, for components that already count (cache hits and misses).
+
+    Args:
+        directory (str): Where workers write snapshots (None for this
+            process only)
+        flush_interval (float): Seconds between snapshots
+        buckets (tuple): Histogram upper bounds in seconds
+    """
+
+    def __init__(self, directory=None, flush_interval=5.0, buckets=DEFAULT_BUCKETS):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.buckets = tuple(buckets)
+
+        self._descriptions = {}  # name -> (type, help)
+        self._counters = {}      # (name, labels) -> value
+        self._histograms = {}    # (name, labels) -> Histogram
+        self._spans = {}         # span name -> Histogram
+        self._label_strings = {}  # label items -> formatted labels
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._start_process()
+
+        atexit.register(self._write_at_exit)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _start_process(self):
+        self._token = f"{os.getpid()}-{time.time_ns()}"
+        self._next_write = 0.0
+
+    def _after_fork(self):
+        """A forked worker starts from zero under its own snapshot file"""
+        with self._lock:
+            self._counters.clear()
+            for histogram in self._histograms.values():
+                histogram.reset()
+        self._start_process()
+
+    # ---------- Recording ----------
+
+    def _labels(self, labels):
+        """Formatted label string, cached by label values"""
+        items = tuple(labels.items())
+        formatted = self._label_strings.get(items)
+        if formatted is None:
+            if len(self._label_strings) >= LABEL_CACHE_SIZE:
+                self._label_strings.clear()
+            formatted = self._label_strings[items] = format_labels(labels)
+        return formatted
+
+    def describe(self, name, kind, help_text):
+        """Set the TYPE and HELP lines of a metric"""
+        self._descriptions[name] = (kind, help_text)
+
+    def inc(self, name, amount=1, **labels):
+        """
+        Add to a counter
+
+        Args:
+            name (str): Metric name
+            amount (int|float): Increment
+            **labels: Label values of the series
+        """
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def histogram(self, name, **labels):
+        """
+        Histogram of a series, created on first use
+
+        Returns:
+            Histogram: Call ``observe(seconds)`` on it
+        """
+        key = (name, self._labels(labels))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(self.buckets))
+        return histogram
+
+    def span(self, name):
+        """
+        Context manager timing a named span (``SPAN_SECONDS{span=name}``)
+
+        Args:
+            name (str): Span name
+
+        Returns:
+            Context manager
+        """
+        histogram = self._spans.get(name)
+        if histogram is None:
+            histogram = self._spans[name] = self.histogram(SPAN_SECONDS, span=name)
+        return _Span(histogram)
+
+    def observe_span(self, name, seconds):
+        """Record a span timed by the caller"""
+        histogram = self._spans.get(name)
+        if histogram is None:
+            histogram = self._spans[name] = self.histogram(SPAN_SECONDS, span=name)
+        histogram.observe(seconds)
+
+    def timed(self, name):
+        """Decorator timing every call of a function as a span"""
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                with self.span(name):
+                    return f(*args, **kwargs)
+            return decorated_function
+        return decorator
+
+    def collect(self, collector):
+        """Register a collector (usable as a decorator)"""
+        self._collectors.append(collector)
+        return collector
+
+    # ---------- Snapshots ----------
+
+    def snapshot(self):
+        """
+        This process's series
+
+        Returns:
+            dict: counters [[name, labels, value]] and
+                histograms [[name, labels, counts, sum]]
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = list(self._histograms.items())
+
+        for collector in self._collectors:
+            try:
+                for name, labels, value in collector():
+                    key = (name, format_labels(labels))
+                    counters[key] = counters.get(key, 0) + value
+            except Exception as e:
+                logger.error(f"Metrics collector {collector.__name__} failed: {e}")
+
+        exported = []
+        for (name, labels), histogram in histograms:
+            with histogram._lock:
+                if any(histogram.counts):
+                    exported.append([name, labels, list(histogram.counts), histogram.sum])
+
+        return {
+            'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+            'histograms': exported
+        }
+
+    def _snapshot_path(self, token):
+        return os.path.join(self.directory, f"{token}.json")
+
+    def write_snapshot(self):
+        """Write this process's snapshot for the other workers' /metrics"""
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._snapshot_path(self._token)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Error writing metrics snapshot: {e}")
+
+    def _write_at_exit(self):
+        """Final snapshot, from processes that have written one (workers)"""
+        if self._next_write:
+            self.write_snapshot()
+
+    def maybe_write_snapshot(self):
+        """Write the snapshot if flush_interval has passed since the last one"""
+        if self.directory and time.monotonic() >= self._next_write:
+            self._next_write = time.monotonic() + self.flush_interval
+            self.write_snapshot()
+
+    # ---------- Export ----------
+
+    def _read_snapshots(self):
+        """Snapshots of every worker, folding exited ones into RETIRED_FILE"""
+        from utils import read_json_or_none  # utils imports this module
+
+        snapshots = [self.snapshot()]
+        if not self.directory or not os.path.isdir(self.directory):
+            return snapshots
+
+        own = f"{self._token}.json"
+        lock_path = os.path.join(self.directory, '.lock')
+        with open(lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                retired_path = os.path.join(self.directory, RETIRED_FILE)
+                retired = read_json_or_none(retired_path)
+                folded = []
+                for filename in os.listdir(self.directory):
+                    if not filename.endswith('.json') or filename in (own, RETIRED_FILE):
+                        continue
+                    snapshot = read_json_or_none(os.path.join(self.directory, filename))
+                    if snapshot is None:
+                        continue
+                    if _process_alive(filename):
+                        snapshots.append(snapshot)
+                    else:
+                        retired = merge_snapshots([retired, snapshot]) if retired else snapshot
+                        folded.append(filename)
+
+                if folded:
+                    tmp_path = f"{retired_path}.tmp"
+                    with open(tmp_path, 'w', encoding='utf-8') as f:
+                        json.dump(retired, f)
+                    os.replace(tmp_path, retired_path)
+                    for filename in folded:
+                        os.remove(os.path.join(self.directory, filename))
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        if retired:
+            snapshots.append(retired)
+        return snapshots
+
+    def render(self):
+        """
+        Every worker's series merged, in the Prometheus text format
+
+        Returns:
+            str: Exposition text (version 0.0.4)
+        """
+        merged = merge_snapshots(self._read_snapshots())
+
+        series = {}  # name -> lines
+        for name, labels, value in sorted(merged['counters']):
+            series.setdefault(name, []).append(f"{name}{{{labels}}} {_number(value)}" if labels
+                                               else f"{name} {_number(value)}")
+
+        bounds = [repr(float(bound)) for bound in self.buckets] + ['+Inf']
+        for name, labels, counts, total in sorted(merged['histograms']):
+            lines = series.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'{labels},le="{bound}"' if labels else f'le="{bound}"'
+                lines.append(f"{name}_bucket{{{le}}} {cumulative}")
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{name}_sum{suffix} {_number(total)}")
+            lines.append(f"{name}_count{suffix} {cumulative}")
+
+        out = []
+        for name in sorted(series):
+            kind, help_text = self._descriptions.get(name, (COUNTER, name))
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(series[name])
+        return '\n'.join(out) + '\n'
+
+
+def merge_snapshots(snapshots):
+    """
+    Sum snapshots series by series
+
+    Args:
+        snapshots (list): Snapshot dicts (see ``Metrics.snapshot``)
+
+    Returns:
+        dict: One snapshot
+    """
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot.get('counters', ()):
+            counters[(name, labels)] = counters.get((name, labels), 0) + value
+        for name, labels, counts, total in snapshot.get('histograms', ()):
+            entry = histograms.get((name, labels))
+            if entry is None:
+                histograms[(name, labels)] = [list(counts), total]
+            else:
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+    return {
+        'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+        'histograms': [[name, labels, counts, total] for (name, labels), (counts, total) in histograms.items()]
+    }
+
+
+def _process_alive(filename):
+    """True if the worker that wrote a snapshot (``<pid>-<ns>.json``) runs"""
+    try:
+        os.kill(int(filename.split('-', 1)[0]), 0)
+    except ValueError:
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Shared by the app and the modules it times
+metrics = Metrics(directory=Config.METRICS_DIR, flush_interval=Config.METRICS_FLUSH_INTERVAL)
+
+metrics.describe(REQUESTS_TOTAL, COUNTER, "Requests by endpoint, method and status")
+metrics.describe(REQUEST_SECONDS, HISTOGRAM, "Request latency by endpoint")
+metrics.describe(SPAN_SECONDS, HISTOGRAM,
+                 "Time in named spans: storage_load, storage_save, stats, render, sanitize")
+metrics.describe(CACHE_HITS, COUNTER, "Cache hits by cache")
+metrics.describe(CACHE_MISSES, COUNTER, "Cache misses by cache")
+metrics.describe(RATELIMIT_REJECTIONS, COUNTER, "Requests rejected with 429 by endpoint")
@@ -0,0 +1,344 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - QUEUED LOGGING
+Version: 2.0
+==========================================
+
+Request threads only put log records on an in-memory queue; a background
+QueueListener formats them as one JSON object per line and appends them to
+the log file, which every gunicorn worker shares. Rotation (by size and by
+age) takes a lock on a sibling ``.lock`` file, so exactly one worker renames
+the file and the others simply reopen the new one. High-volume messages can
+be sampled before they are queued.
+"""
+
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+
+try:
+    import fcntl
+except ImportError:  # Windows (waitress) - rotation is then per-process only
+    fcntl = None
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# LogRecord attributes that are not "extra" fields
+_RECORD_FIELDS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+# ==================== JSON LINES ====================
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record
+
+    Always has ``ts`` (UTC, millisecond precision), ``level``, ``logger``,
+    ``msg`` and ``pid``; ``exc`` when an exception was logged, and any
+    ``extra={...}`` fields passed to the logging call.
+    """
+
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'pid': record.process
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and key not in entry:
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+# ==================== SAMPLING ====================
+
+class SamplingFilter(logging.Filter):
+    """
+    Rate-limit records whose message starts with one of ``prefixes``
+
+    Per prefix and per ``interval`` seconds, the first ``burst`` records
+    pass, then one in every ``every``. The next record that passes carries
+    a ``suppressed`` count of the ones dropped before it. Other records are
+    not touched. Counts are per process.
+    """
+
+    def __init__(self, prefixes, burst=10, every=1000, interval=60.0):
+        super().__init__()
+        self.prefixes = tuple(prefixes)
+        self.burst = burst
+        self.every = max(1, every)
+        self.interval = interval
+        self._windows = {}  # prefix -> [window start, seen, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        msg = record.msg
+        if not isinstance(msg, str) or not msg.startswith(self.prefixes):
+            return True
+
+        prefix = next(p for p in self.prefixes if msg.startswith(p))
+        now = record.created
+        with self._lock:
+            window = self._windows.get(prefix)
+            if window is None or now - window[0] >= self.interval:
+                window = self._windows[prefix] = [now, 0, window[2] if window else 0]
+            window[1] += 1
+            seen = window[1]
+            if seen > self.burst and (seen - self.burst) % self.every:
+                window[2] += 1
+                return False
+            if window[2]:
+                record.suppressed = window[2]
+                window[2] = 0
+        return True
+
+
+# ==================== SHARED ROTATING FILE ====================
+
+class SharedRotatingFileHandler(logging.Handler):
+    """
+    Append-only log file rotated safely by several processes
+
+    Each line is written with one ``write`` on an ``O_APPEND`` descriptor
+    while holding an exclusive ``flock`` on a sibling ``.lock`` file, so
+    lines from different workers never interleave and the size check, the
+    rotation and the write happen together. The file is rotated to ``.1``
+    .. ``.backup_count`` before a line would take it past ``max_bytes``,
+    or once the ``rotate_interval`` period (seconds, counted from the
+    epoch) of its last write has ended. A worker that finds the file
+    already replaced by another one just reopens it.
+
+    Args:
+        path (str): Log file
+        max_bytes (int): Size limit (0 for none)
+        backup_count (int): Rotated files kept
+        rotate_interval (float): Seconds per file (0 for no time rotation)
+    """
+
+    def __init__(self, path, max_bytes=0, backup_count=5, rotate_interval=0):
+        super().__init__()
+        self.path = os.path.abspath(path)
+        self.lock_path = f"{self.path}.lock"
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_interval = rotate_interval
+        self.rotations = 0
+        self._fd = None
+        self._ino = None
+        self._lock_fd = None
+        self._lock_pid = None
+        self._open()
+
+    def _period_of(self, timestamp):
+        return int(timestamp // self.rotate_interval) if self.rotate_interval else 0
+
+    def _open(self):
+        if self._fd is not None:
+            os.close(self._fd)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._ino = os.fstat(self._fd).st_ino
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive flock, on a descriptor opened by this process"""
+        if fcntl is None:
+            yield
+            return
+
+        # flock is per open file description, which fork() shares
+        if self._lock_pid != os.getpid():
+            self._lock_fd = os.open(self.lock_path, os.O_WRONLY | os.O_CREAT, 0o644)
+            self._lock_pid = os.getpid()
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _due(self, st, size, now):
+        """True if writing `size` more bytes now calls for a new file"""
+        if not st.st_size:
+            return False
+        if self.max_bytes and st.st_size + size > self.max_bytes:
+            return True
+        return self._period_of(st.st_mtime) != self._period_of(now)
+
+    def _rotate(self):
+        """Shift the backups up by one and start a new file (lock held)"""
+        for n in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{n}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{n + 1}")
+        if self.backup_count:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.unlink(self.path)
+        self.rotations += 1
+        self._open()
+
+    def emit(self, record):
+        try:
+            data = (self.format(record) + '\n').encode('utf-8')
+            with self._file_lock():
+                try:
+                    st = os.stat(self.path)
+                    if st.st_ino != self._ino:
+                        self._open()  # rotated by another worker
+                except FileNotFoundError:
+                    self._open()
+                    st = os.fstat(self._fd)
+                if self._due(st, len(data), time.time()):
+                    self._rotate()
+                os.write(self._fd, data)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.acquire()
+        try:
+            for fd in (self._fd, self._lock_fd if self._lock_pid == os.getpid() else None):
+                if fd is not None:
+                    os.close(fd)
+            self._fd = self._lock_fd = self._lock_pid = None
+        finally:
+            self.release()
+        super().close()
+
+
+# ==================== QUEUE ====================
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks: records beyond ``max_size`` waiting
+    are dropped and counted
+
+    The queue is a lock-free ``SimpleQueue`` (a bounded ``queue.Queue``
+    costs the caller several microseconds more per record). Records are
+    prepared on the calling thread (message merged with its args,
+    exception rendered to text) so the listener only serialises them.
+    """
+
+    def __init__(self, max_size=10000):
+        super().__init__(queue.SimpleQueue())
+        self.max_size = max_size
+        self.dropped = 0
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.stack_info = None
+        return record
+
+    def enqueue(self, record):
+        if self.queue.qsize() >= self.max_size:
+            self.dropped += 1
+            return
+        self.queue.put(record)
+
+
+class QueuedLogging:
+    """
+    Root logger wired to a background writer
+
+    ``start`` replaces the root handlers with a DroppingQueueHandler (plus
+    any filters) and starts a QueueListener feeding ``handlers``. After
+    ``fork()`` the child gets a fresh queue and listener; remaining records
+    are written when the interpreter exits.
+    """
+
+    def __init__(self, handlers, level=logging.INFO, queue_size=10000, filters=()):
+        self.handlers = list(handlers)
+        self.level = level
+        self.queue_size = queue_size
+        self.filters = list(filters)
+        self.handler = None
+        self.listener = None
+
+    def start(self):
+        """Install the queue handler on the root logger and start writing"""
+        self.handler = DroppingQueueHandler(self.queue_size)
+        for log_filter in self.filters:
+            self.handler.addFilter(log_filter)
+
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+            if handler not in self.handlers:
+                handler.close()
+        root.addHandler(self.handler)
+        root.setLevel(self.level)
+
+        self.listener = QueueListener(self.handler.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+        return self
+
+    def stop(self):
+        """Write everything queued, then stop the listener"""
+        if self.listener is not None and self.listener._thread is not None:
+            self.listener.stop()
+
+    def _after_fork(self):
+        """The listener thread does not survive fork(); start a new one"""
+        self.handler.queue = queue.SimpleQueue()
+        self.listener = QueueListener(self.handler.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+
+
+def setup_logging(path='app.log', level=logging.INFO, max_bytes=10 * 1024 * 1024,
+                  backup_count=5, rotate_interval=86400, queue_size=10000,
+                  console=True, sampled=(), sample_burst=10, sample_every=1000,
+                  sample_interval=60.0):
+    """
+    Send all logging through a queue to a JSON log file (and the console)
+
+    Args:
+        path (str): Log file shared by every worker
+        level (int|str): Root log level
+        max_bytes (int): Rotate once the file would exceed this (0 for never)
+        backup_count (int): Rotated files kept
+        rotate_interval (float): Seconds per file (0 for no time rotation)
+        queue_size (int): Records buffered before new ones are dropped
+        console (bool): Also write human-readable lines to stderr
+        sampled (iterable): Message prefixes to sample
+        sample_burst (int): Records per prefix passed each interval before sampling
+        sample_every (int): Then pass one record in this many
+        sample_interval (float): Sampling window in seconds
+
+    Returns:
+        QueuedLogging: The running setup
+    """
+    file_handler = SharedRotatingFileHandler(path, max_bytes, backup_count, rotate_interval)
+    file_handler.setFormatter(JsonFormatter())
+    handlers = [file_handler]
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        handlers.append(console_handler)
+
+    filters = []
+    if sampled:
+        filters.append(SamplingFilter(sampled, sample_burst, sample_every, sample_interval))
+
+    logs = QueuedLogging(handlers, level, queue_size, filters).start()
+    atexit.register(logs.stop)
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=logs._after_fork)
+    return logs
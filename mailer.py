@@ -0,0 +1,291 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - CONTACT NOTIFICATIONS
+Version: 2.0
+==========================================
+"""
+
+import time
+import socket
+import smtplib
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from email.message import EmailMessage
+
+from visitor_queue import WriteBehindQueue
+
+logger = logging.getLogger(__name__)
+
+# Delivery states recorded on the contact as ``delivery``
+QUEUED = 'queued'
+SENT = 'sent'
+FAILED = 'failed'
+
+# Errors that leave the connection unusable. Every SMTPException is an
+# OSError, so replies to one message must not be caught as OSError.
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError,
+                     socket.timeout, ConnectionError)
+
+
+def is_transient(error):
+    """True if a delivery error may succeed on retry; 5xx replies are permanent"""
+    if isinstance(error, CONNECTION_ERRORS):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    return isinstance(error, OSError)
+
+
+# ==================== CONNECTION POOL ====================
+
+class SMTPPool:
+    """
+    Reusable, authenticated SMTP connections
+
+    A connection is opened on first use and handed back after each batch,
+    so consecutive notifications share one TCP/TLS session and login.
+    Idle connections are checked with NOOP (or dropped after
+    ``idle_timeout``) before reuse; broken ones are discarded.
+    """
+
+    def __init__(self, host, port=587, username=None, password=None,
+                 use_tls=True, timeout=10, max_size=2, idle_timeout=60):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+
+        self.opened = 0
+        self._idle = []  # (connection, returned at)
+        self._lock = threading.Lock()
+
+    def _open(self):
+        """Connect, upgrade to TLS and log in"""
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                connection.starttls()
+            if self.username:
+                connection.login(self.username, self.password or '')
+        except Exception:
+            self._close(connection)
+            raise
+        self.opened += 1
+        return connection
+
+    @staticmethod
+    def _close(connection):
+        """Close a connection, ignoring errors from a dead socket"""
+        try:
+            connection.quit()
+        except Exception:
+            connection.close()
+
+    def _take(self):
+        """An idle connection that still answers, or None"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection, returned = self._idle.pop()
+
+            if time.monotonic() - returned < self.idle_timeout:
+                try:
+                    if connection.noop()[0] == 250:
+                        return connection
+                except Exception:
+                    pass
+            self._close(connection)
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection
+
+        Exceptions discard it (the server may have dropped it); otherwise it
+        goes back to the pool.
+
+        Yields:
+            smtplib.SMTP: Connected, logged-in client
+        """
+        connection = self._take() or self._open()
+        try:
+            yield connection
+        except Exception:
+            self._close(connection)
+            raise
+
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((connection, time.monotonic()))
+                return
+        self._close(connection)
+
+    def close(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._close(connection)
+
+
+# ==================== CONTACT MAILER ====================
+
+class ContactMailer:
+    """
+    Sends a notification email for each saved contact in the background
+
+    ``notify`` only enqueues the contact on a ``WriteBehindQueue``, so the
+    contact POST never waits on SMTP. The queue's worker hands over batches
+    that are sent over one pooled connection; transient failures are
+    retried with exponential backoff on a fresh connection. The outcome is
+    recorded on the contact through ``store.update`` as ``delivery``
+    (queued, sent or failed), ``delivery_attempts`` and ``delivered_at`` or
+    ``delivery_error``.
+    """
+
+    def __init__(self, pool, store, sender, recipient, max_attempts=4,
+                 backoff=1.0, max_backoff=30.0, batch_size=20, flush_interval=2.0,
+                 queue_size=1000):
+        self.pool = pool
+        self.store = store
+        self.sender = sender
+        self.recipient = recipient
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.sent = 0
+        self.failed = 0
+
+        self.queue = WriteBehindQueue(
+            self._deliver_batch,
+            max_size=queue_size,
+            batch_size=batch_size,
+            flush_interval=flush_interval
+        )
+
+    def notify(self, contact):
+        """
+        Queue a notification for a saved contact
+
+        Args:
+            contact (dict): Contact with its ``id``
+
+        Returns:
+            bool: False if the queue was full and the notification dropped
+        """
+        if self.queue.put(dict(contact)):
+            return True
+        self._record(contact, FAILED, 0, error="notification queue full")
+        return False
+
+    def build_message(self, contact):
+        """
+        Notification email for a contact
+
+        Args:
+            contact (dict): Contact data
+
+        Returns:
+            EmailMessage: Message ready to send
+        """
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = self.recipient
+        message['Reply-To'] = contact.get('email', '')
+        message['Subject'] = f"[TheGranito] {contact.get('subject') or 'New message'} - {contact.get('name', '')}"
+        message.set_content(
+            f"Name: {contact.get('name', '')}\n"
+            f"Email: {contact.get('email', '')}\n"
+            f"Subject: {contact.get('subject', '')}\n"
+            f"Received: {contact.get('timestamp', '')}\n\n"
+            f"{contact.get('message', '')}\n"
+        )
+        return message
+
+    def _deliver_batch(self, contacts):
+        """Send a batch, retrying transient failures with backoff (worker thread)"""
+        pending = [(contact, 1) for contact in contacts]  # (contact, attempt)
+        delay = self.backoff
+
+        while pending:
+            pending = self._send(pending)
+            if pending:
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+
+    def _send(self, pending):
+        """
+        Send notifications over one pooled connection
+
+        Returns:
+            list: (contact, next attempt) pairs to retry
+        """
+        retry = []
+        connected = False
+        done = 0
+
+        try:
+            with self.pool.connection() as connection:
+                connected = True
+                for contact, attempt in pending:
+                    try:
+                        connection.send_message(self.build_message(contact))
+                        self._record(contact, SENT, attempt)
+                    except CONNECTION_ERRORS:
+                        raise  # connection lost, handled below
+                    except Exception as e:
+                        self._retry_or_fail(contact, attempt, e, retry)
+                    done += 1
+        except Exception as e:
+            logger.warning(f"SMTP connection error, retrying {len(pending) - done} notifications: {e}")
+            if not connected:
+                # Nothing was sent: every notification used an attempt
+                for contact, attempt in pending:
+                    self._retry_or_fail(contact, attempt, e, retry)
+            else:
+                # Only the one in flight used an attempt
+                (contact, attempt), rest = pending[done], pending[done + 1:]
+                self._retry_or_fail(contact, attempt, e, retry)
+                retry.extend(rest)
+
+        return retry
+
+    def _retry_or_fail(self, contact, attempt, error, retry):
+        """Schedule another attempt, or record the failure"""
+        if is_transient(error) and attempt < self.max_attempts:
+            retry.append((contact, attempt + 1))
+        else:
+            self._record(contact, FAILED, attempt, error=error)
+
+    def _record(self, contact, state, attempts, error=None):
+        """Store the delivery outcome on the contact"""
+        fields = {'delivery': state, 'delivery_attempts': attempts}
+        if state == SENT:
+            self.sent += 1
+            fields['delivered_at'] = datetime.utcnow().isoformat()
+        elif state == FAILED:
+            self.failed += 1
+            fields['delivery_error'] = str(error)
+            logger.error(f"Giving up on notification for contact {contact.get('id')}: {error}")
+
+        try:
+            self.store.update(contact['id'], **fields)
+        except Exception as e:
+            logger.error(f"Error recording delivery for contact {contact.get('id')}: {e}")
+
+    def stop(self):
+        """Deliver what is queued and close pooled connections"""
+        self.queue.stop()
+        self.pool.close()
@@ -0,0 +1,349 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - REQUEST PROFILER
+Version: 2.0
+==========================================
+
+Opt-in statistical profiling of live requests. A sampled fraction of
+requests (or those asking for it with ``X-Profile``) registers its thread
+with a StackSampler, whose background thread records that thread's call
+stack every few milliseconds. Stacks are counted per endpoint and
+exported in the collapsed format read by flamegraph.pl, speedscope and
+inferno:
+
+    home;app.py:home;flask/templating.py:render_template 42
+
+Nothing runs while no request is being profiled: the sampler thread
+waits on an event, and the per-request check is one comparison when the
+rate is zero. Each worker writes its stacks to PROFILE_DIR every few
+seconds so the admin download covers every worker.
+"""
+
+import os
+import sys
+import hmac
+import json
+import time
+import random
+import logging
+import threading
+from collections import Counter
+
+from utils import read_json_or_none
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_FILE = 'settings.json'
+
+
+# ==================== STACK SAMPLER ====================
+
+class StackSampler:
+    """
+    Background thread sampling the stacks of registered threads
+
+    Args:
+        interval (float): Seconds between samples
+        max_depth (int): Frames kept per stack (innermost are dropped)
+        max_stacks (int): Distinct stacks kept; later new ones are
+            counted under "[truncated]"
+    """
+
+    def __init__(self, interval=0.005, max_depth=96, max_stacks=20000):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.max_stacks = max_stacks
+
+        self.stacks = Counter()   # (endpoint, collapsed stack) -> samples
+        self.requests = Counter()  # endpoint -> profiled requests
+
+        self._names = {}         # code object -> frame name
+        self._reset_process()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset_process)
+
+    def _reset_process(self):
+        """Fresh locks and no thread (the parent's may be mid-sample at fork)"""
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._active = {}  # thread id -> endpoint
+        self._pid = None
+        self._thread = None
+
+    def start(self, endpoint):
+        """Sample the calling thread, as `endpoint`, until stop()"""
+        self._ensure_thread()
+        with self._lock:
+            self.requests[endpoint] += 1
+        self._active[threading.get_ident()] = endpoint
+        self._wakeup.set()
+
+    def stop(self):
+        """Stop sampling the calling thread"""
+        self._active.pop(threading.get_ident(), None)
+
+    def clear(self):
+        """Drop every recorded stack"""
+        with self._lock:
+            self.stacks.clear()
+            self.requests.clear()
+
+    # ---------- Sampling ----------
+
+    def _ensure_thread(self):
+        """Start the sampler in this process (again after a fork)"""
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            if not self._active:
+                self._wakeup.clear()
+                if not self._active:  # a request may have registered meanwhile
+                    self._wakeup.wait()
+            time.sleep(self.interval)
+            self.sample()
+
+    def sample(self):
+        """Record one stack for every registered thread"""
+        frames = sys._current_frames()
+        samples = []
+        for thread_id, endpoint in list(self._active.items()):
+            frame = frames.get(thread_id)
+            if frame is not None:
+                samples.append((endpoint, self._collapse(frame)))
+        del frames
+
+        with self._lock:
+            for key in samples:
+                if key not in self.stacks and len(self.stacks) >= self.max_stacks:
+                    key = (key[0], '[truncated]')
+                self.stacks[key] += 1
+
+    def _collapse(self, frame):
+        """'outer;...;inner' frame names of a stack"""
+        names = []
+        while frame is not None:
+            names.append(self._name(frame.f_code))
+            frame = frame.f_back
+        if len(names) > self.max_depth:
+            names = names[-self.max_depth:]
+        return ';'.join(reversed(names))
+
+    def _name(self, code):
+        name = self._names.get(code)
+        if name is None:
+            path = code.co_filename
+            # Keep the package for library code, the file name for ours
+            parts = path.replace('\\', '/').split('/')
+            if 'site-packages' in parts:
+                path = '/'.join(parts[parts.index('site-packages') + 1:])
+            else:
+                path = parts[-1]
+            qualname = getattr(code, 'co_qualname', code.co_name)
+            name = self._names[code] = f"{path}:{qualname}".replace(';', ':')
+        return name
+
+
+# ==================== REQUEST PROFILER ====================
+
+class RequestProfiler:
+    """
+    Decides which requests to profile and keeps the profiles of all workers
+
+    The sample rate and a generation number live in ``settings.json`` in
+    ``directory``, so an admin changes them for every worker without a
+    redeploy; each worker rereads them at most every ``settings_interval``
+    seconds. A new generation (``clear``) drops every worker's stacks.
+
+    Args:
+        directory (str): Shared directory for settings and worker profiles
+        default_rate (float): Fraction of requests profiled when no
+            settings were saved (0 disables)
+        token (str): Value of ``X-Profile`` that profiles a request
+            regardless of the rate (None: admins only)
+        interval (float): Seconds between stack samples
+        flush_interval (float): Seconds between writes of this worker's stacks
+        settings_interval (float): Seconds between settings checks
+    """
+
+    def __init__(self, directory, default_rate=0.0, token=None, interval=0.005,
+                 flush_interval=5.0, settings_interval=2.0):
+        self.directory = directory
+        self.default_rate = default_rate
+        self.token = token
+        self.flush_interval = flush_interval
+        self.settings_interval = settings_interval
+        self.sampler = StackSampler(interval=interval)
+
+        self.rate = default_rate
+        self.generation = 0
+        self._settings_checked = 0.0
+        self._next_write = 0.0
+        self._dirty = False
+
+    # ---------- Settings ----------
+
+    def _settings_path(self):
+        return os.path.join(self.directory, SETTINGS_FILE)
+
+    def refresh_settings(self, force=False):
+        """Reread the shared settings if settings_interval has passed"""
+        now = time.monotonic()
+        if not force and now - self._settings_checked < self.settings_interval:
+            return
+        self._settings_checked = now
+
+        settings = read_json_or_none(self._settings_path()) or {}
+        self.rate = float(settings.get('rate', self.default_rate))
+        generation = settings.get('generation', 0)
+        if generation != self.generation:
+            self.generation = generation
+            self.sampler.clear()
+            self._dirty = False
+
+    def _save_settings(self, rate, generation):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._settings_path()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'rate': rate, 'generation': generation}, f)
+        os.replace(tmp_path, path)
+        self._settings_checked = 0.0
+        self.refresh_settings()
+
+    def set_rate(self, rate):
+        """
+        Profile this fraction of requests in every worker
+
+        Args:
+            rate (float): 0 (off) to 1 (every request)
+        """
+        self.refresh_settings(force=True)
+        self._save_settings(min(max(float(rate), 0.0), 1.0), self.generation)
+
+    def clear(self):
+        """Drop the stacks of every worker"""
+        self.refresh_settings(force=True)
+        generation = self.generation + 1
+        if os.path.isdir(self.directory):
+            for filename in os.listdir(self.directory):
+                if filename.startswith('profile-'):
+                    try:
+                        os.remove(os.path.join(self.directory, filename))
+                    except OSError:
+                        pass
+        self._save_settings(self.rate, generation)
+
+    # ---------- Per request ----------
+
+    def wanted(self, header=None, is_admin=False):
+        """
+        Whether to profile the current request
+
+        Args:
+            header (str): Value of the ``X-Profile`` request header
+            is_admin (bool): The request comes from an admin session
+
+        Returns:
+            bool: True to profile it
+        """
+        self.refresh_settings()
+        if header and (is_admin or (self.token and hmac.compare_digest(header, self.token))):
+            return True
+        return self.rate > 0 and random.random() < self.rate
+
+    def begin(self, endpoint):
+        """Start sampling the current thread for a request to `endpoint`"""
+        self.sampler.start(endpoint)
+        self._dirty = True
+
+    def end(self):
+        """Stop sampling the current thread; save stacks when due"""
+        self.sampler.stop()
+        if self._dirty and time.monotonic() >= self._next_write:
+            self._next_write = time.monotonic() + self.flush_interval
+            self.write()
+
+    # ---------- Export ----------
+
+    def _profile_path(self):
+        return os.path.join(self.directory, f"profile-{os.getpid()}.json")
+
+    def write(self):
+        """Save this worker's stacks for the admin download"""
+        with self.sampler._lock:
+            stacks = [[endpoint, stack, count] for (endpoint, stack), count in self.sampler.stacks.items()]
+            requests = dict(self.sampler.requests)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._profile_path()
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'generation': self.generation, 'requests': requests, 'stacks': stacks}, f)
+            os.replace(tmp_path, path)
+            self._dirty = False
+        except OSError as e:
+            logger.error(f"Error writing request profile: {e}")
+
+    def _merged(self):
+        """Stacks and request counts of every worker in this generation"""
+        self.refresh_settings(force=True)
+        self.write()
+
+        stacks, requests = Counter(), Counter()
+        if not os.path.isdir(self.directory):
+            return stacks, requests
+        for filename in os.listdir(self.directory):
+            if not (filename.startswith('profile-') and filename.endswith('.json')):
+                continue
+            profile = read_json_or_none(os.path.join(self.directory, filename))
+            if not profile or profile.get('generation') != self.generation:
+                continue
+            requests.update(profile.get('requests', {}))
+            for endpoint, stack, count in profile.get('stacks', ()):
+                stacks[(endpoint, stack)] += count
+        return stacks, requests
+
+    def summary(self):
+        """
+        Profiled requests and samples per endpoint, across workers
+
+        Returns:
+            list: dicts with endpoint, requests and samples, most sampled first
+        """
+        stacks, requests = self._merged()
+        samples = Counter()
+        for (endpoint, _), count in stacks.items():
+            samples[endpoint] += count
+        return sorted(
+            ({'endpoint': endpoint, 'requests': requests[endpoint], 'samples': samples[endpoint]}
+             for endpoint in set(requests) | set(samples)),
+            key=lambda row: (-row['samples'], row['endpoint'])
+        )
+
+    def collapsed(self, endpoint=None):
+        """
+        Collapsed stacks (``frame;frame;frame count`` lines), across workers
+
+        Args:
+            endpoint (str): Only this endpoint's stacks, as sampled (None
+                for all, each stack rooted at its endpoint's name)
+
+        Returns:
+            str: One stack per line
+        """
+        stacks, _ = self._merged()
+        if endpoint is None:
+            lines = [f"{key_endpoint};{stack} {count}" for (key_endpoint, stack), count in sorted(stacks.items())]
+        else:
+            lines = [f"{stack} {count}" for (key_endpoint, stack), count in sorted(stacks.items())
+                     if key_endpoint == endpoint]
+        return '\n'.join(lines) + '\n' if lines else ''
@@ -0,0 +1,196 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - RATE LIMIT STORAGE
+Version: 2.0
+==========================================
+
+Flask-Limiter storage shared by every gunicorn worker on the host, kept in
+a small SQLite database instead of each worker's memory (so "10 per hour"
+means ten, not ten per worker) and without needing Redis.
+
+Importing this module registers the ``sqlite://`` scheme with ``limits``:
+    RATELIMIT_STORAGE_URI = "sqlite:///data/ratelimits.db"
+"""
+
+import time
+import sqlite3
+import logging
+from math import floor
+from contextlib import contextmanager
+
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+
+from sqlite_store import SqliteDatabase, sqlite_path_from_uri
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS counters (
+    key TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    expires REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_counters_expires ON counters (expires);
+"""
+
+# Counters are upserted in one statement: an expired row restarts at
+# ``amount`` with a fresh expiry, a live one is incremented
+_INCR = """
+INSERT INTO counters (key, count, expires) VALUES (?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    count = CASE WHEN expires <= ? THEN excluded.count ELSE count + excluded.count END,
+    expires = CASE WHEN expires <= ? THEN excluded.expires ELSE expires END
+RETURNING count
+"""
+
+
+class SqliteLimiterStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Cross-process rate limit counters in SQLite
+
+    Supports the fixed-window and sliding-window-counter strategies. A
+    sliding window is two timestamped counters (previous and current
+    window); checking the weighted count and taking the hit happen in one
+    ``BEGIN IMMEDIATE`` transaction, so concurrent workers can never both
+    take the last slot. Every counter carries an expiry; expired rows read
+    as zero and are purged at most every ``purge_interval`` seconds, which
+    bounds the table to the keys active within the longest window.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri, wrap_exceptions=False, purge_interval=60, **options):
+        self.path = sqlite_path_from_uri(uri)
+        self.db = SqliteDatabase(self.path, schema=SCHEMA)
+        self.purge_interval = float(purge_interval)
+        self._next_purge = 0.0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction holding the database lock from the start"""
+        conn = self.db.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    # ---------- Counters ----------
+
+    @staticmethod
+    def _get(conn, key, now):
+        row = conn.execute(
+            "SELECT count FROM counters WHERE key = ? AND expires > ?", (key, now)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _incr(self, conn, key, expiry, amount, now):
+        count = conn.execute(_INCR, (key, amount, now + expiry, now, now)).fetchone()[0]
+        if now >= self._next_purge:
+            self._next_purge = now + self.purge_interval
+            purged = conn.execute("DELETE FROM counters WHERE expires <= ?", (now,)).rowcount
+            if purged:
+                logger.debug(f"Purged {purged} expired rate limit counters")
+        return count
+
+    def incr(self, key, expiry, amount=1):
+        """
+        Increment a fixed-window counter
+
+        Args:
+            key (str): Rate limit key
+            expiry (int): Seconds until a new counter expires
+            amount (int): Increment
+
+        Returns:
+            int: Counter value after the increment
+        """
+        with self._transaction() as conn:
+            return self._incr(conn, key, expiry, amount, time.time())
+
+    def get(self, key):
+        """Current value of a counter (0 if missing or expired)"""
+        return self._get(self.db.connect(), key, time.time())
+
+    def get_expiry(self, key):
+        """Epoch time a counter expires at (now if missing)"""
+        now = time.time()
+        row = self.db.connect().execute(
+            "SELECT expires FROM counters WHERE key = ? AND expires > ?", (key, now)
+        ).fetchone()
+        return row[0] if row else now
+
+    def clear(self, key):
+        """Drop one counter"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM counters WHERE key = ?", (key,))
+
+    def reset(self):
+        """Drop every counter"""
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM counters").rowcount
+
+    def check(self):
+        """True if the database answers"""
+        try:
+            self.db.connect().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    # ---------- Sliding window counter ----------
+
+    def _sliding_window(self, conn, key, expiry, now):
+        """(previous count, previous TTL, current count, current TTL)"""
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count = self._get(conn, previous_key, now)
+        current_count = self._get(conn, current_key, now)
+        previous_ttl = 0.0
+        if previous_count:
+            previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        """
+        Take ``amount`` hits if the weighted window count allows it
+
+        Args:
+            key (str): Rate limit key
+            limit (int): Hits allowed per window
+            expiry (int): Window length in seconds
+            amount (int): Hits to take
+
+        Returns:
+            bool: True if the hits were taken
+        """
+        if amount > limit:
+            return False
+
+        now = time.time()
+        with self._transaction() as conn:
+            previous_count, previous_ttl, current_count, _ = self._sliding_window(conn, key, expiry, now)
+            if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+                return False
+            # The current window's counter is the next one's "previous"
+            _, current_key = self.sliding_window_keys(key, expiry, now)
+            self._incr(conn, current_key, 2 * expiry, amount, now)
+            return True
+
+    def get_sliding_window(self, key, expiry):
+        """Window counts and TTLs, for ``test`` and rate limit headers"""
+        return self._sliding_window(self.db.connect(), key, expiry, time.time())
+
+    def clear_sliding_window(self, key, expiry):
+        """Drop both counters of a sliding window"""
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM counters WHERE key = ?",
+                             [(k,) for k in self.sliding_window_keys(key, expiry, time.time())])
@@ -0,0 +1,532 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - SITE SEARCH
+Version: 2.0
+==========================================
+"""
+
+import re
+import math
+import heapq
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import Counter, OrderedDict, defaultdict
+
+from markupsafe import Markup, escape
+
+logger = logging.getLogger(__name__)
+
+# Field weights: a hit in a title counts for more than one in body text
+FIELD_WEIGHTS = {'title': 3.0, 'tags': 2.0, 'excerpt': 1.5, 'content': 1.0}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Prefix expansions count less than exact terms, and are capped per token
+# (the most widespread completions win)
+PREFIX_WEIGHT = 0.6
+MAX_EXPANSIONS = 16
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have i in is it its me my of on or "
+    "that the this to was were will with you your".split()
+)
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize(text):
+    """Lowercase and strip accents"""
+    text = str(text).lower()
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    """
+    Split text into index terms
+
+    Args:
+        text (str): Any text
+
+    Returns:
+        list: Lowercase, accent-free terms without stopwords
+    """
+    return [token for token in TOKEN_RE.findall(normalize(text)) if token not in STOPWORDS]
+
+
+# ==================== TEMPLATE TEXT ====================
+
+_JINJA_RE = re.compile(r"\{%.*?%\}|\{\{.*?\}\}|\{#.*?#\}", re.S)
+_SKIP_RE = re.compile(r"<(script|style)\b.*?</\1>|<!--.*?-->", re.S | re.I)
+_TAG_RE = re.compile(r"<[^>]+>")
+_TITLE_RE = re.compile(r"\{%\s*block title\s*%\}(.*?)\{%\s*endblock", re.S)
+
+
+def template_text(source):
+    """
+    Visible text of a Jinja page template
+
+    Args:
+        source (str): Template source
+
+    Returns:
+        tuple: (title from ``{% block title %}`` or '', text)
+    """
+    title = _TITLE_RE.search(source)
+    text = _SKIP_RE.sub(' ', source)
+    text = _JINJA_RE.sub(' ', text)
+    text = _TAG_RE.sub(' ', text)
+    text = re.sub(r"&[a-z]+;|&#\d+;", ' ', text)
+    return (title.group(1).strip() if title else ''), ' '.join(text.split())
+
+
+# ==================== PREFIX TRIE ====================
+
+class _Node:
+    __slots__ = ('children', 'term', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.term = None   # set on the node a term ends at
+        self.top = None    # (generation, best completions below here)
+
+
+class PrefixTrie:
+    """
+    Terms by prefix, best completions first
+
+    ``weight(term)`` ranks completions (the index passes the number of
+    documents containing the term). Each node lazily caches its
+    ``MAX_EXPANSIONS`` heaviest completions, so completing a prefix costs
+    one walk down the trie once warm. Weights are read when a cache is
+    filled; ``touch`` marks every cache stale after weights changed, and
+    only the prefixes queried afterwards pay to refill theirs.
+    """
+
+    def __init__(self, weight):
+        self.weight = weight
+        self.root = _Node()
+        self.size = 0
+        self.generation = 0
+
+    def __len__(self):
+        return self.size
+
+    def touch(self):
+        """Invalidate cached completions (weights changed)"""
+        self.generation += 1
+
+    def add(self, term):
+        """
+        Add a term
+
+        Args:
+            term (str): Term
+        """
+        node = self.root
+        for char in term:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _Node()
+            node = child
+        if node.term is None:
+            node.term = term
+            self.size += 1
+            self.generation += 1
+
+    def discard(self, term):
+        """
+        Remove a term, pruning nodes left without terms
+
+        Args:
+            term (str): Term
+        """
+        path = [self.root]
+        for char in term:
+            node = path[-1].children.get(char)
+            if node is None:
+                return
+            path.append(node)
+        if path[-1].term is None:
+            return
+
+        path[-1].term = None
+        self.size -= 1
+        self.generation += 1
+        for depth in range(len(term), 0, -1):
+            if path[depth].term is not None or path[depth].children:
+                break
+            del path[depth - 1].children[term[depth - 1]]
+
+    def _top(self, node):
+        """Heaviest completions at and below a node: [(weight, term)]"""
+        if node.top is None or node.top[0] != self.generation:
+            candidates = [(self.weight(node.term), node.term)] if node.term is not None else []
+            for child in node.children.values():
+                candidates.extend(self._top(child))
+            node.top = (self.generation, heapq.nlargest(MAX_EXPANSIONS, candidates))
+        return node.top[1]
+
+    def complete(self, prefix, limit=MAX_EXPANSIONS):
+        """
+        Terms starting with a prefix
+
+        Args:
+            prefix (str): Normalised prefix
+            limit (int): Maximum terms (at most MAX_EXPANSIONS)
+
+        Returns:
+            list: Terms, heaviest first
+        """
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [term for _, term in self._top(node)[:limit]]
+
+
+# ==================== INDEX ====================
+
+class SearchIndex:
+    """
+    In-memory inverted index with BM25 ranking and prefix matching
+
+    Documents are dicts with an ``id``, a ``url``, a ``type`` and any of the
+    fields in ``FIELD_WEIGHTS``. Postings map each term to the weighted
+    term frequency per document. ``update`` takes the full document set and
+    only re-indexes documents whose content changed, so the index can be
+    refreshed cheaply whenever the content might have moved.
+
+    Query tokens match exact terms and, through a prefix trie, terms they
+    are a prefix of ("flas" finds "flask"). The same trie drives
+    ``suggest``, whose recent answers are kept in an LRU cache that any
+    change to the index clears.
+    """
+
+    def __init__(self, documents=None, cache_size=256):
+        self.documents = {}   # id -> document
+        self.digests = {}     # id -> content digest
+        self.lengths = {}     # id -> weighted length
+        self.texts = {}       # id -> (snippet text, folded for matching)
+        self.postings = defaultdict(dict)  # term -> {id: weighted tf}
+        self.trie = PrefixTrie(lambda term: len(self.postings[term]))
+        self._total_length = 0.0
+        self._norms = None    # id -> BM25 length normalisation, rebuilt lazily
+        self._lock = threading.RLock()
+
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache = OrderedDict()  # (normalised query, limit) -> suggestions
+
+        if documents:
+            self.update(documents)
+
+    def __len__(self):
+        return len(self.documents)
+
+    # ---------- Building ----------
+
+    @staticmethod
+    def digest(document):
+        """Content digest deciding whether a document needs re-indexing"""
+        parts = [str(document.get(field, '')) for field in ('url', 'type', *FIELD_WEIGHTS)]
+        return hashlib.sha1('\x00'.join(parts).encode('utf-8')).hexdigest()
+
+    def add(self, document):
+        """
+        Index a document (replacing one with the same ID)
+
+        Args:
+            document (dict): Document
+        """
+        with self._lock:
+            doc_id = document['id']
+            self.remove(doc_id)
+
+            frequencies = Counter()
+            for field, weight in FIELD_WEIGHTS.items():
+                value = document.get(field)
+                if isinstance(value, (list, tuple)):
+                    value = ' '.join(map(str, value))
+                for term in tokenize(value or ''):
+                    frequencies[term] += weight
+
+            for term, frequency in frequencies.items():
+                docs = self.postings[term]
+                if not docs:
+                    self.trie.add(term)
+                docs[doc_id] = frequency
+
+            length = sum(frequencies.values())
+            self.documents[doc_id] = document
+            self.digests[doc_id] = self.digest(document)
+            self.lengths[doc_id] = length
+            self.texts[doc_id] = snippet_text(document)
+            self._total_length += length
+            self._norms = None
+            self._cache.clear()
+            self.trie.touch()
+
+    def remove(self, doc_id):
+        """
+        Drop a document from the index
+
+        Args:
+            doc_id (str): Document ID
+        """
+        with self._lock:
+            document = self.documents.pop(doc_id, None)
+            if document is None:
+                return
+
+            for term in set(self._document_terms(document)):
+                docs = self.postings.get(term)
+                if docs is not None:
+                    docs.pop(doc_id, None)
+                    if not docs:
+                        del self.postings[term]
+                        self.trie.discard(term)
+
+            self._total_length -= self.lengths.pop(doc_id)
+            self._norms = None
+            self._cache.clear()
+            self.trie.touch()
+            del self.digests[doc_id]
+            del self.texts[doc_id]
+
+    def update(self, documents):
+        """
+        Bring the index in line with a full document set
+
+        Args:
+            documents (iterable): Every current document
+
+        Returns:
+            int: Documents added, changed or removed
+        """
+        with self._lock:
+            current = {document['id']: document for document in documents}
+            changed = 0
+
+            for doc_id in list(self.documents):
+                if doc_id not in current:
+                    self.remove(doc_id)
+                    changed += 1
+
+            for doc_id, document in current.items():
+                if self.digests.get(doc_id) != self.digest(document):
+                    self.add(document)
+                    changed += 1
+
+            if changed:
+                logger.info(f"Search index updated: {changed} documents changed, {len(self)} total")
+            return changed
+
+    @staticmethod
+    def _document_terms(document):
+        """Every term a document was indexed under"""
+        for field in FIELD_WEIGHTS:
+            value = document.get(field)
+            if isinstance(value, (list, tuple)):
+                value = ' '.join(map(str, value))
+            yield from tokenize(value or '')
+
+    # ---------- Querying ----------
+
+    def expand(self, token):
+        """
+        Index terms a query token matches
+
+        Args:
+            token (str): Normalised query token
+
+        Returns:
+            dict: term -> weight (1 for the exact term, PREFIX_WEIGHT for
+            longer terms it is a prefix of)
+        """
+        with self._lock:
+            matches = {term: PREFIX_WEIGHT for term in self.trie.complete(token)}
+            if token in self.postings:
+                matches[token] = 1.0
+        return matches
+
+    def search(self, query, limit=10, doc_type=None):
+        """
+        Rank documents for a query with BM25
+
+        Args:
+            query (str): Free text
+            limit (int): Maximum results
+            doc_type (str): Only documents of this type
+
+        Returns:
+            list: Result dicts (id, url, type, title, score, snippet)
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            documents = [(self.documents[doc_id], self.texts[doc_id], score)
+                         for doc_id, score in self._rank(tokens, limit, doc_type)]
+
+        return [
+            {
+                'id': document['id'],
+                'url': document.get('url', ''),
+                'type': document.get('type', ''),
+                'title': document.get('title', ''),
+                'score': round(score, 4),
+                'snippet': snippet(*text, tokens)
+            }
+            for document, text, score in documents
+        ]
+
+    def suggest(self, query, limit=5):
+        """
+        Typeahead suggestions for a partly typed query
+
+        The last word counts as unfinished unless the query ends in
+        whitespace: it is completed from the trie (even if it is a
+        stopword so far, "th" may become "theme") and matched as a prefix.
+        Answers are cached per normalised query.
+
+        Args:
+            query (str): Text typed so far
+            limit (int): Maximum completions and results
+
+        Returns:
+            tuple: ({'completions': [str], 'results': [{id, url, type,
+            title}]}, True if served from the cache)
+        """
+        words = TOKEN_RE.findall(normalize(query))
+        typing = bool(words) and not query[-1:].isspace()
+        key = (' '.join(words), typing, limit)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return cached, True
+            self.cache_misses += 1
+
+            completions = []
+            tokens = [word for word in words if word not in STOPWORDS]
+            if typing:
+                head = ' '.join(words[:-1])
+                completions = [f"{head} {term}".lstrip() for term in self.trie.complete(words[-1], limit)]
+                if words[-1] in STOPWORDS:
+                    tokens.append(words[-1])
+
+            results = [
+                {field: self.documents[doc_id].get(field, '') for field in ('id', 'url', 'type', 'title')}
+                for doc_id, _ in self._rank(list(dict.fromkeys(tokens)), limit)
+            ]
+            suggestions = {'completions': completions, 'results': results}
+
+            self._cache[key] = suggestions
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return suggestions, False
+
+    def _rank(self, tokens, limit, doc_type=None):
+        """
+        BM25 over prefix-expanded tokens (caller holds the lock)
+
+        Returns:
+            list: (doc_id, score), best first
+        """
+        count = len(self.documents)
+        if not tokens or not count:
+            return []
+
+        norms = self._norms
+        if norms is None:
+            average = self._total_length / count or 1.0
+            norms = self._norms = {
+                doc_id: K1 * (1 - B + B * length / average)
+                for doc_id, length in self.lengths.items()
+            }
+
+        scores = defaultdict(float)
+        for token in tokens:
+            for term, weight in self.expand(token).items():
+                docs = self.postings[term]
+                idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+                boost = weight * idf * (K1 + 1)
+                for doc_id, frequency in docs.items():
+                    scores[doc_id] += boost * frequency / (frequency + norms[doc_id])
+
+        if doc_type:
+            scores = {doc_id: score for doc_id, score in scores.items()
+                      if self.documents[doc_id].get('type') == doc_type}
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+# ==================== SNIPPETS ====================
+
+def snippet_text(document):
+    """
+    Text snippets are cut from, with its folded form for matching
+
+    Args:
+        document (dict): Document
+
+    Returns:
+        tuple: (text, folded) - excerpt and content, or the title
+    """
+    text = ' '.join(
+        str(document.get(field) or '') for field in ('excerpt', 'content')
+    ).strip() or str(document.get('title', ''))
+
+    # Match on the accent-free lowercase text; positions line up with the
+    # original as long as normalising keeps the length (true for almost
+    # all text, otherwise fall back to plain lowercase matching)
+    folded = normalize(text)
+    if len(folded) != len(text):
+        folded = text.lower()
+    return text, folded
+
+
+def snippet(text, folded, tokens, width=160):
+    """
+    Excerpt around the first query match with matches wrapped in <mark>
+
+    Args:
+        text (str): Text to cut from
+        folded (str): ``text`` normalised, same length
+        tokens (list): Normalised query tokens (matched as word prefixes)
+        width (int): Approximate snippet length in characters
+
+    Returns:
+        Markup: Escaped, highlighted excerpt
+    """
+    pattern = re.compile(r"\b(?:" + '|'.join(re.escape(token) for token in tokens) + r")\w*", re.UNICODE)
+    first = pattern.search(folded)
+
+    # Start a word or so before the first match, end on a word boundary
+    start = 0
+    if first and first.start() > width // 3:
+        start = text.rfind(' ', 0, first.start() - width // 3) + 1
+    end = min(len(text), start + width)
+    if end < len(text):
+        boundary = text.rfind(' ', start, end)
+        if boundary > start:
+            end = boundary
+
+    parts = ['…' if start else '']
+    position = start
+    for match in pattern.finditer(folded, start, end):
+        parts.append(escape(text[position:match.start()]))
+        parts.append(Markup('<mark>') + escape(text[match.start():match.end()]) + Markup('</mark>'))
+        position = match.end()
+    parts.append(escape(text[position:end]))
+    parts.append('…' if end < len(text) else '')
+    return Markup('').join(parts)
@@ -0,0 +1,682 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - SQLITE STORAGE
+Version: 2.0
+==========================================
+
+Optional SQLite engine for visitors and contacts, enabled with
+STORAGE_BACKEND=sqlite. The database lives at Config.SQLALCHEMY_DATABASE_URI.
+
+One-shot migration from the JSON files:
+    python sqlite_store.py [--database sqlite:///portfolio.db] [--force]
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# Retention (mirrors the JSON visitor log)
+MAX_VISITORS = 10000
+
+VISITOR_FIELDS = ('ip', 'user_agent', 'page', 'timestamp', 'date')
+CONTACT_FIELDS = ('name', 'email', 'subject', 'message', 'timestamp', 'ip', 'status')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS visitors (
+    id INTEGER PRIMARY KEY,
+    ip TEXT,
+    user_agent TEXT,
+    page TEXT,
+    timestamp TEXT,
+    date TEXT,
+    day TEXT,
+    hour INTEGER,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_visitors_day_ip ON visitors (day, ip);
+CREATE INDEX IF NOT EXISTS idx_visitors_ip ON visitors (ip);
+CREATE INDEX IF NOT EXISTS idx_visitors_page ON visitors (page);
+
+CREATE TABLE IF NOT EXISTS contacts (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    email TEXT,
+    subject TEXT,
+    message TEXT,
+    timestamp TEXT,
+    ip TEXT,
+    status TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_contacts_timestamp ON contacts (timestamp);
+CREATE INDEX IF NOT EXISTS idx_contacts_status_timestamp ON contacts (status, timestamp);
+CREATE INDEX IF NOT EXISTS idx_contacts_email ON contacts (email COLLATE NOCASE, timestamp);
+"""
+
+
+def sqlite_path_from_uri(uri):
+    """
+    Extract the database file path from a SQLAlchemy-style SQLite URI
+
+    Args:
+        uri (str): e.g. ``sqlite:///portfolio.db`` or ``sqlite:////abs/path.db``
+
+    Returns:
+        str: Filesystem path
+
+    Raises:
+        ValueError: If the URI is not a SQLite file URI
+    """
+    prefix = 'sqlite:///'
+    if not uri or not uri.startswith(prefix) or uri == prefix:
+        raise ValueError(f"Not a SQLite file URI: {uri}")
+    return uri[len(prefix):]
+
+
+# ==================== CONNECTIONS ====================
+
+class SqliteDatabase:
+    """
+    Per-thread, per-process SQLite connections in WAL mode
+
+    WAL lets readers run alongside the single writer, and ``busy_timeout``
+    makes concurrent gunicorn workers wait for the write lock instead of
+    failing.
+    """
+
+    def __init__(self, path, schema=SCHEMA):
+        self.path = path
+        self.schema = schema
+        self._local = threading.local()
+
+    def connect(self):
+        """
+        Get this thread's connection, creating the schema on first use
+
+        Returns:
+            sqlite3.Connection: Open connection
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=10000")
+        conn.executescript(self.schema)
+
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+
+def _split_record(record, fields):
+    """Split a record into known column values and a JSON blob of the rest"""
+    values = [record.get(field) for field in fields]
+    extra = {k: v for k, v in record.items() if k not in fields}
+    return values, json.dumps(extra, ensure_ascii=False) if extra else None
+
+
+def _join_record(row, fields):
+    """Rebuild a record dict from a row, omitting missing fields"""
+    record = {field: row[field] for field in fields if row[field] is not None}
+    if row['extra']:
+        record.update(json.loads(row['extra']))
+    return record
+
+
+# ==================== VISITORS ====================
+
+class SqliteVisitorStore:
+    """
+    Visitor records in an indexed SQLite table
+
+    Mirrors the ``VisitorLog`` interface and adds statistics methods that
+    run as indexed aggregate queries. ``day`` and ``hour`` are parsed once
+    on insert; ``day`` is NULL when ``date`` is not a valid ISO date.
+    """
+
+    def __init__(self, path, max_records=MAX_VISITORS):
+        self.db = SqliteDatabase(path)
+        self.max_records = max_records
+
+    # ---------- Reading ----------
+
+    def iter_records(self):
+        """
+        Iterate over stored visitor records, oldest first
+
+        Yields:
+            dict: Visitor record
+        """
+        cursor = self.db.connect().execute("SELECT * FROM visitors ORDER BY id")
+        for row in cursor:
+            yield _join_record(row, VISITOR_FIELDS)
+
+    def load(self):
+        """
+        Load every stored visitor record
+
+        Returns:
+            list: Visitor records, oldest first
+        """
+        return list(self.iter_records())
+
+    def version(self):
+        """
+        Cheap change token for the table (two rowid lookups)
+
+        Inserts raise the newest id and retention or cleanup deletes raise
+        the oldest one, so the pair changes whenever the records do.
+
+        Returns:
+            tuple: (token, last modified datetime in UTC or None)
+        """
+        conn = self.db.connect()
+        newest = conn.execute("SELECT id, timestamp FROM visitors ORDER BY id DESC LIMIT 1").fetchone()
+        if newest is None:
+            return "empty", None
+
+        oldest = conn.execute("SELECT MIN(id) FROM visitors").fetchone()[0]
+        try:
+            last_modified = datetime.fromisoformat(newest['timestamp']).replace(microsecond=0)
+        except (TypeError, ValueError):
+            last_modified = None
+        return f"{oldest:x}-{newest['id']:x}", last_modified
+
+    # ---------- Writing ----------
+
+    def append(self, record):
+        """
+        Insert a single visitor record
+
+        Args:
+            record (dict): Visitor record
+
+        Returns:
+            bool: True if the record was written
+        """
+        return self.append_many([record])
+
+    def append_many(self, records):
+        """
+        Insert a batch of visitor records in one transaction
+
+        Args:
+            records (list): Visitor records, oldest first
+
+        Returns:
+            bool: True if the records were written
+        """
+        conn = self.db.connect()
+        with conn:
+            self._insert(conn, records)
+            # ids only grow, so this keeps the newest max_records ids with
+            # one index lookup (an OFFSET would walk max_records entries)
+            conn.execute(
+                "DELETE FROM visitors WHERE id <= (SELECT MAX(id) FROM visitors) - ?",
+                (self.max_records,)
+            )
+        return True
+
+    def replace(self, records):
+        """
+        Replace every stored record
+
+        Args:
+            records (list): Visitor records, oldest first
+
+        Returns:
+            bool: True if the table was rewritten
+        """
+        conn = self.db.connect()
+        with conn:
+            conn.execute("DELETE FROM visitors")
+            self._insert(conn, records)
+        return True
+
+    def compact(self, keep=None):
+        """
+        Delete records rejected by ``keep`` and enforce retention
+
+        Args:
+            keep (callable): Optional predicate; records for which it
+                returns False are deleted
+
+        Returns:
+            int: Number of records removed
+        """
+        conn = self.db.connect()
+        with conn:
+            before = conn.execute("SELECT COUNT(*) FROM visitors").fetchone()[0]
+
+            if keep is not None:
+                doomed = [
+                    (row['id'],)
+                    for row in conn.execute("SELECT * FROM visitors")
+                    if not keep(_join_record(row, VISITOR_FIELDS))
+                ]
+                conn.executemany("DELETE FROM visitors WHERE id = ?", doomed)
+
+            # Exact count: deletions above leave gaps in the ids
+            conn.execute(
+                "DELETE FROM visitors WHERE id <= "
+                "(SELECT id FROM visitors ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (self.max_records,)
+            )
+            after = conn.execute("SELECT COUNT(*) FROM visitors").fetchone()[0]
+
+        return before - after
+
+    def _insert(self, conn, records):
+        """Insert records with their parsed day and hour columns"""
+        rows = []
+        for record in records:
+            values, extra = _split_record(record, VISITOR_FIELDS)
+            rows.append(values + [_parse_day(record), _parse_hour(record), extra])
+
+        conn.executemany(
+            "INSERT INTO visitors (ip, user_agent, page, timestamp, date, day, hour, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+    # ---------- Statistics ----------
+
+    def visitor_stats(self, now=None):
+        """
+        Compute the ``get_visitor_stats`` dictionary with indexed queries
+
+        Args:
+            now (datetime): Reference time (defaults to utcnow)
+
+        Returns:
+            dict: total, today, this_week, this_month, unique_ips, pages, recent
+        """
+        conn = self.db.connect()
+        now = now or datetime.utcnow()
+        today = now.date().isoformat()
+        week_ago = (now - timedelta(days=7)).date().isoformat()
+        month_ago = (now - timedelta(days=30)).date().isoformat()
+
+        total = conn.execute("SELECT COUNT(*) FROM visitors").fetchone()[0]
+        if not total:
+            return {
+                'total': 0,
+                'today': 0,
+                'this_week': 0,
+                'this_month': 0,
+                'unique_ips': 0,
+                'pages': {},
+                'recent': []
+            }
+
+        counts = conn.execute(
+            "SELECT "
+            " SUM(day = ?), SUM(day >= ?), SUM(day >= ?), COUNT(DISTINCT ip) "
+            "FROM visitors WHERE day IS NOT NULL AND ip IS NOT NULL",
+            (today, week_ago, month_ago)
+        ).fetchone()
+
+        pages = conn.execute(
+            "SELECT COALESCE(page, '/') AS page, COUNT(*) AS visits FROM visitors "
+            "WHERE day IS NOT NULL AND ip IS NOT NULL "
+            "GROUP BY COALESCE(page, '/') ORDER BY MIN(id)"
+        ).fetchall()
+
+        recent = conn.execute("SELECT * FROM visitors ORDER BY id DESC LIMIT 10").fetchall()
+
+        return {
+            'total': total,
+            'today': counts[0] or 0,
+            'this_week': counts[1] or 0,
+            'this_month': counts[2] or 0,
+            'unique_ips': counts[3] or 0,
+            'pages': {row['page']: row['visits'] for row in pages},
+            'recent': [_join_record(row, VISITOR_FIELDS) for row in recent]
+        }
+
+    def daily_stats(self, days=30, now=None):
+        """
+        Visitor counts per day for the last N days
+
+        Args:
+            days (int): Number of days to include
+            now (datetime): Reference time (defaults to utcnow)
+
+        Returns:
+            dict: ISO date -> visit count
+        """
+        now = now or datetime.utcnow()
+        start_date = (now - timedelta(days=days)).date().isoformat()
+
+        rows = self.db.connect().execute(
+            "SELECT day, COUNT(*) FROM visitors WHERE day >= ? GROUP BY day ORDER BY MIN(id)",
+            (start_date,)
+        ).fetchall()
+        return {day: count for day, count in rows}
+
+    def unique_visitors(self, days=7, now=None):
+        """
+        Number of distinct IPs seen in the last N days
+
+        Args:
+            days (int): Number of days to check
+            now (datetime): Reference time (defaults to utcnow)
+
+        Returns:
+            int: Unique visitor count
+        """
+        now = now or datetime.utcnow()
+        cutoff_date = (now - timedelta(days=days)).date().isoformat()
+
+        return self.db.connect().execute(
+            "SELECT COUNT(DISTINCT ip) FROM visitors WHERE day >= ? AND ip IS NOT NULL",
+            (cutoff_date,)
+        ).fetchone()[0]
+
+    def page_unique_visitors(self, days=7, now=None):
+        """
+        Number of distinct IPs per page in the last N days
+
+        Args:
+            days (int): Number of days to check
+            now (datetime): Reference time (defaults to utcnow)
+
+        Returns:
+            dict: Page -> unique visitor count, most visitors first
+        """
+        now = now or datetime.utcnow()
+        cutoff_date = (now - timedelta(days=days)).date().isoformat()
+
+        rows = self.db.connect().execute(
+            "SELECT COALESCE(page, '/'), COUNT(DISTINCT ip) AS visitors FROM visitors "
+            "WHERE day >= ? AND ip IS NOT NULL "
+            "GROUP BY COALESCE(page, '/') ORDER BY visitors DESC, MIN(id)",
+            (cutoff_date,)
+        ).fetchall()
+        return {page: count for page, count in rows}
+
+    def page_stats(self):
+        """
+        Visit counts per page, most visited first
+
+        Returns:
+            dict: Page -> visit count
+        """
+        rows = self.db.connect().execute(
+            "SELECT COALESCE(page, '/'), COUNT(*) AS visits FROM visitors "
+            "GROUP BY COALESCE(page, '/') ORDER BY visits DESC, MIN(id)"
+        ).fetchall()
+        return {page: count for page, count in rows}
+
+    def hourly_distribution(self):
+        """
+        Visit counts per hour of day
+
+        Returns:
+            dict: Hour (0-23) -> visit count
+        """
+        counts = dict.fromkeys(range(24), 0)
+        rows = self.db.connect().execute(
+            "SELECT hour, COUNT(*) FROM visitors WHERE hour IS NOT NULL GROUP BY hour"
+        ).fetchall()
+        counts.update({hour: count for hour, count in rows})
+        return counts
+
+
+def _parse_day(record):
+    """ISO date of a visitor record, or None if it has no valid date"""
+    try:
+        return datetime.fromisoformat(record['date']).date().isoformat()
+    except (KeyError, ValueError, TypeError):
+        return None
+
+
+def _parse_hour(record):
+    """Hour of a visitor record's timestamp, or None if it has none"""
+    try:
+        return datetime.fromisoformat(record['timestamp']).hour
+    except (KeyError, ValueError, TypeError):
+        return None
+
+
+# ==================== CONTACTS ====================
+
+class SqliteContactStore:
+    """
+    Contact form submissions in a SQLite table, oldest first
+
+    A contact's ``id`` is its row id (as a string, like the JSON store's
+    IDs). Inbox pages are indexed queries on status, email and timestamp.
+    """
+
+    def __init__(self, path):
+        self.db = SqliteDatabase(path)
+
+    def load(self):
+        """
+        Load every contact submission
+
+        Returns:
+            list: Contacts, oldest first
+        """
+        rows = self.db.connect().execute("SELECT * FROM contacts ORDER BY id").fetchall()
+        return [_join_contact(row) for row in rows]
+
+    def query(self, status=None, email=None, offset=0, limit=25):
+        """
+        One page of contacts, newest first
+
+        Args:
+            status (str): Only contacts in this state
+            email (str): Only contacts from this address (case-insensitive)
+            offset (int): Contacts to skip
+            limit (int): Page size
+
+        Returns:
+            tuple: (contacts on the page, total matching contacts)
+        """
+        conditions, params = [], []
+        if status:
+            conditions.append("COALESCE(status, 'new') = ?" if status == 'new' else "status = ?")
+            params.append(status)
+        if email:
+            conditions.append("email = ? COLLATE NOCASE")
+            params.append(email)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        conn = self.db.connect()
+        total = conn.execute(f"SELECT COUNT(*) FROM contacts{where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT * FROM contacts{where} ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+        return [_join_contact(row) for row in rows], total
+
+    def status_counts(self):
+        """
+        Count contacts per status
+
+        Returns:
+            dict: Status -> number of contacts
+        """
+        from contact_store import CONTACT_STATUSES
+
+        counts = {status: 0 for status in CONTACT_STATUSES}
+        rows = self.db.connect().execute(
+            "SELECT COALESCE(status, 'new') AS status, COUNT(*) FROM contacts GROUP BY 1"
+        )
+        counts.update((status, count) for status, count in rows)
+        return counts
+
+    def get(self, contact_id):
+        """
+        Look up a contact by ID
+
+        Args:
+            contact_id (str): Contact ID
+
+        Returns:
+            dict: Contact, or None if unknown
+        """
+        row = self.db.connect().execute(
+            "SELECT * FROM contacts WHERE id = ?", (_row_id(contact_id),)
+        ).fetchone()
+        return _join_contact(row) if row else None
+
+    def append(self, contact):
+        """
+        Add a contact submission
+
+        Args:
+            contact (dict): Contact data; its ``id`` is set to the new row
+                id (replacing one from another store)
+
+        Returns:
+            bool: True if saved
+        """
+        values, extra = _split_record({k: v for k, v in contact.items() if k != 'id'}, CONTACT_FIELDS)
+        conn = self.db.connect()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO contacts (name, email, subject, message, timestamp, ip, status, extra) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                values + [extra]
+            )
+        contact['id'] = str(cursor.lastrowid)
+        return True
+
+    def update(self, contact_id, **fields):
+        """
+        Change fields (e.g. ``status``) of a contact
+
+        Args:
+            contact_id (str): Contact ID
+            **fields: New values; unknown fields are merged into ``extra``
+
+        Returns:
+            bool: True if the contact exists
+        """
+        row_id = _row_id(contact_id)
+        columns = {k: v for k, v in fields.items() if k in CONTACT_FIELDS}
+        others = {k: v for k, v in fields.items() if k not in CONTACT_FIELDS and k != 'id'}
+
+        conn = self.db.connect()
+        with conn:
+            row = conn.execute("SELECT extra FROM contacts WHERE id = ?", (row_id,)).fetchone()
+            if row is None:
+                return False
+
+            if others:
+                extra = json.loads(row['extra']) if row['extra'] else {}
+                extra.update(others)
+                columns['extra'] = json.dumps(extra, ensure_ascii=False)
+
+            if columns:
+                assignments = ', '.join(f"{field} = ?" for field in columns)
+                conn.execute(
+                    f"UPDATE contacts SET {assignments} WHERE id = ?",
+                    list(columns.values()) + [row_id]
+                )
+        return True
+
+    def delete(self, contact_id):
+        """
+        Delete a contact
+
+        Args:
+            contact_id (str): Contact ID
+
+        Returns:
+            bool: True if a contact was deleted
+        """
+        conn = self.db.connect()
+        with conn:
+            cursor = conn.execute("DELETE FROM contacts WHERE id = ?", (_row_id(contact_id),))
+        return cursor.rowcount > 0
+
+
+def _join_contact(row):
+    """Rebuild a contact dict from a row, with its row id as ``id``"""
+    contact = _join_record(row, CONTACT_FIELDS)
+    contact['id'] = str(row['id'])
+    return contact
+
+
+def _row_id(contact_id):
+    """Row id for a contact ID (-1, matching nothing, if not numeric)"""
+    try:
+        return int(contact_id)
+    except (TypeError, ValueError):
+        return -1
+
+
+# ==================== MIGRATION ====================
+
+def migrate_json_files(db_path, visitors_log="data/visitors.log",
+                       legacy_visitors="data/visitors.json",
+                       contacts_file="data/contacts.json", force=False):
+    """
+    Copy visitors and contacts from the JSON files into SQLite
+
+    Args:
+        db_path (str): SQLite database file
+        visitors_log (str): Visitor log (imports legacy_visitors if missing)
+        legacy_visitors (str): Old visitors.json list
+        contacts_file (str): contacts.json snapshot (its journal is replayed)
+        force (bool): Replace rows already present in the database
+
+    Returns:
+        dict: Number of visitors and contacts migrated
+    """
+    from visitor_store import VisitorLog
+    from contact_store import ContactJournal
+
+    visitors = VisitorLog(visitors_log, legacy_path=legacy_visitors).load()
+    contacts = ContactJournal(contacts_file).load()
+
+    visitor_store = SqliteVisitorStore(db_path, max_records=max(len(visitors), MAX_VISITORS))
+    contact_store = SqliteContactStore(db_path)
+    conn = visitor_store.db.connect()
+
+    existing = conn.execute(
+        "SELECT (SELECT COUNT(*) FROM visitors) + (SELECT COUNT(*) FROM contacts)"
+    ).fetchone()[0]
+    if existing and not force:
+        raise RuntimeError(f"{db_path} already holds data; pass force=True to replace it")
+
+    with conn:
+        conn.execute("DELETE FROM contacts")
+    visitor_store.replace(visitors)
+    for contact in contacts:
+        contact_store.append(contact)
+
+    logger.info(f"Migrated {len(visitors)} visitors and {len(contacts)} contacts to {db_path}")
+    return {'visitors': len(visitors), 'contacts': len(contacts)}
+
+
+if __name__ == "__main__":
+    import argparse
+    from config import Config
+
+    parser = argparse.ArgumentParser(description="Migrate data/*.json into SQLite")
+    parser.add_argument('--database', default=Config.SQLALCHEMY_DATABASE_URI,
+                        help="SQLite URI (default: SQLALCHEMY_DATABASE_URI)")
+    parser.add_argument('--force', action='store_true', help="replace existing rows")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    counts = migrate_json_files(sqlite_path_from_uri(args.database), force=args.force)
+    print(f"Migrated {counts['visitors']} visitors and {counts['contacts']} contacts")
@@ -35,6 +35,13 @@
         },
         cursor: {
             enabled: true // Set to false to disable custom cursor
+        },
+        typeahead: {
+            endpoint: '/api/search',
+            minChars: 2,
+            debounce: 150,   // ms after the last keystroke
+            cacheSize: 100,  // answers kept per page view
+            backoff: 30000   // ms to pause after a 429
         }
     };
 
@@ -545,6 +552,140 @@
         }
     }
 
+    // ==================== SEARCH TYPEAHEAD ====================
+    
+    /**
+     * Suggestions under inputs marked data-typeahead, from /api/search.
+     * Requests are debounced, answers cached for the page view and stale
+     * requests aborted, so typing stays well inside the rate limit.
+     */
+    class SearchTypeahead {
+        constructor(input) {
+            this.input = input;
+            this.options = CONFIG.typeahead;
+            this.cache = new Map();
+            this.controller = null;
+            this.pausedUntil = 0;
+            this.active = -1;
+            this.init();
+        }
+
+        init() {
+            this.menu = document.createElement('div');
+            this.menu.className = 'dropdown-menu typeahead-menu';
+            this.menu.setAttribute('role', 'listbox');
+            this.input.parentNode.classList.add('typeahead');
+            this.input.parentNode.appendChild(this.menu);
+            this.input.setAttribute('autocomplete', 'off');
+
+            this.input.addEventListener('input', debounce(() => this.lookup(), this.options.debounce));
+            this.input.addEventListener('keydown', (e) => this.handleKey(e));
+            this.input.addEventListener('blur', () => setTimeout(() => this.hide(), 150));
+        }
+
+        async lookup() {
+            const query = this.input.value;
+            if (query.trim().length < this.options.minChars || Date.now() < this.pausedUntil) {
+                this.hide();
+                return;
+            }
+
+            if (this.cache.has(query)) {
+                this.render(this.cache.get(query));
+                return;
+            }
+
+            if (this.controller) this.controller.abort();
+            this.controller = new AbortController();
+
+            try {
+                const response = await fetch(
+                    `${this.options.endpoint}?q=${encodeURIComponent(query)}`,
+                    { signal: this.controller.signal }
+                );
+                if (response.status === 429) {
+                    this.pausedUntil = Date.now() + this.options.backoff;
+                    this.hide();
+                    return;
+                }
+                if (!response.ok) return;
+
+                const data = await response.json();
+                if (this.cache.size >= this.options.cacheSize) {
+                    this.cache.delete(this.cache.keys().next().value);
+                }
+                this.cache.set(query, data);
+                if (this.input.value === query) this.render(data);
+            } catch (error) {
+                if (error.name !== 'AbortError') console.log('Search suggestions error:', error);
+            }
+        }
+
+        render(data) {
+            this.menu.innerHTML = '';
+            this.active = -1;
+
+            data.completions.forEach(text => {
+                this.addItem(text, null, () => {
+                    this.input.value = text + ' ';
+                    this.input.focus();
+                    this.lookup();
+                });
+            });
+            if (data.completions.length && data.results.length) {
+                this.menu.appendChild(Object.assign(document.createElement('div'), {
+                    className: 'dropdown-divider'
+                }));
+            }
+            data.results.forEach(result => {
+                this.addItem(result.title, result.type, () => {
+                    window.location.href = result.url;
+                });
+            });
+
+            this.menu.classList.toggle('show', this.menu.children.length > 0);
+        }
+
+        addItem(text, badge, onSelect) {
+            const item = document.createElement('button');
+            item.type = 'button';
+            item.className = 'dropdown-item';
+            item.setAttribute('role', 'option');
+            item.textContent = text;
+            if (badge) {
+                const label = document.createElement('span');
+                label.className = 'badge bg-secondary ms-2 text-capitalize';
+                label.textContent = badge;
+                item.appendChild(label);
+            }
+            item.addEventListener('mousedown', (e) => e.preventDefault());
+            item.addEventListener('click', onSelect);
+            this.menu.appendChild(item);
+        }
+
+        handleKey(e) {
+            const items = this.menu.querySelectorAll('.dropdown-item');
+            if (!this.menu.classList.contains('show') || !items.length) return;
+
+            if (e.key === 'ArrowDown' || e.key === 'ArrowUp') {
+                e.preventDefault();
+                const step = e.key === 'ArrowDown' ? 1 : -1;
+                this.active = (this.active + step + items.length) % items.length;
+                items.forEach((item, i) => item.classList.toggle('active', i === this.active));
+            } else if (e.key === 'Enter' && this.active >= 0) {
+                e.preventDefault();
+                items[this.active].click();
+            } else if (e.key === 'Escape') {
+                this.hide();
+            }
+        }
+
+        hide() {
+            this.menu.classList.remove('show');
+            this.active = -1;
+        }
+    }
+
     // ==================== LAZY LOADING IMAGES ====================
     
     class LazyLoader {
@@ -624,6 +765,9 @@
         // Initialize Lazy Loading
         new LazyLoader();
 
+        // Initialize Search Suggestions
+        document.querySelectorAll('input[data-typeahead]').forEach(input => new SearchTypeahead(input));
+
         // Initialize AOS (Animate On Scroll) if available
         if (typeof AOS !== 'undefined') {
             AOS.init({
@@ -8,22 +8,42 @@ Version: 2.0
 import re
 import os
 import json
+import pickle
 import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 from functools import wraps
 from flask import request, jsonify
 import bleach
 
+from config import Config
+from log_queue import setup_logging
+from instrumentation import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows (waitress) - fall back to in-process locking
+    fcntl = None
+
 
 # ==================== LOGGING SETUP ====================
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('app.log'),
-        logging.StreamHandler()
-    ]
+# Records are queued here and written as JSON lines by a background thread
+# (see log_queue.py); settings in Config.LOG_*
+log_pipeline = setup_logging(
+    path=Config.LOG_FILE,
+    level=Config.LOG_LEVEL,
+    max_bytes=Config.LOG_MAX_BYTES,
+    backup_count=Config.LOG_BACKUP_COUNT,
+    rotate_interval=Config.LOG_ROTATE_INTERVAL,
+    queue_size=Config.LOG_QUEUE_SIZE,
+    console=Config.LOG_CONSOLE,
+    sampled=Config.LOG_SAMPLED_MESSAGES,
+    sample_burst=Config.LOG_SAMPLE_BURST,
+    sample_every=Config.LOG_SAMPLE_EVERY,
+    sample_interval=Config.LOG_SAMPLE_INTERVAL
 )
 
 logger = logging.getLogger(__name__)
@@ -31,6 +51,7 @@ logger = logging.getLogger(__name__)
 
 # ==================== INPUT SANITIZATION ====================
 
+@metrics.timed('sanitize')
 def sanitize_input(text, max_length=1000):
     """
     Sanitize user input to prevent XSS attacks
@@ -211,6 +232,73 @@ def format_file_size(size_bytes):
     return f"{size_bytes:.1f} TB"
 
 
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+@contextmanager
+def file_lock(filepath):
+    """
+    Hold an exclusive lock tied to a file, across processes and threads
+    
+    Uses ``flock`` on a sibling ``.lock`` file, so every gunicorn worker
+    serialises on the same lock. Falls back to a per-process lock where
+    ``fcntl`` is unavailable.
+    
+    Args:
+        filepath (str): File to lock
+    """
+    lock_path = f"{filepath}.lock"
+    
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(lock_path, threading.Lock())
+    
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        
+        directory = os.path.dirname(lock_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@metrics.timed('storage_save')
+def atomic_write_json(filepath, data, **dump_kwargs):
+    """
+    Write JSON to a temporary file and rename it over the target
+    
+    Readers see either the old or the new contents, never a truncated file.
+    
+    Args:
+        filepath (str): Path to JSON file
+        data: Data to save
+        **dump_kwargs: Extra arguments for json.dump
+    """
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, **dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    finally:
+        json_cache.invalidate(filepath)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
 # ==================== DATE/TIME UTILITIES ====================
 
 def format_datetime(dt, format_str="%Y-%m-%d %H:%M:%S"):
@@ -269,8 +357,153 @@ def get_time_ago(dt):
         return format_datetime(dt, "%B %d, %Y")
 
 
+# ==================== READ CACHE ====================
+
+def read_json(filepath):
+    """Parse a JSON file (no error handling)"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class FileCache:
+    """
+    Parsed file contents keyed by path, reused while the file is unchanged
+    
+    An entry stays valid while the file's inode, size and mtime match the
+    values seen when it was parsed, so writes from other workers are picked
+    up on the next read; writes from this process also drop the entry via
+    ``invalidate``. Entries are kept pickled and every hit unpickles a fresh
+    copy (several times cheaper than parsing JSON), so callers may mutate
+    what they get back without corrupting the cache. Files larger than
+    ``max_entry_bytes`` are parsed but never pickled, as their entry would
+    be dropped anyway.
+    """
+    
+    def __init__(self, max_entries=64, max_entry_bytes=16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_entry_bytes = max_entry_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # absolute path -> (signature, pickled data)
+        self._lock = threading.Lock()
+    
+    @metrics.timed('storage_load')
+    def load(self, filepath, loader=read_json):
+        """
+        Load a file through the cache
+        
+        Args:
+            filepath (str): File to read
+            loader (callable): Parses the file; exceptions propagate and
+                nothing is cached
+        
+        Returns:
+            Parsed data, private to the caller
+        """
+        key = os.path.abspath(filepath)
+        
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            self.invalidate(filepath)
+            return loader(filepath)
+        
+        # Taken before reading, so a concurrent write can only make the
+        # cached data newer than its signature, never older
+        signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                pickled = entry[1]
+            else:
+                self.misses += 1
+                pickled = None
+        
+        if pickled is not None:
+            return pickle.loads(pickled)
+        
+        data = loader(filepath)
+        
+        # The file size bounds the pickle closely enough to skip pickling
+        # data that could never be cached
+        if stat.st_size > self.max_entry_bytes:
+            self.invalidate(filepath)
+            return data
+        
+        pickled = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+        
+        with self._lock:
+            if len(pickled) <= self.max_entry_bytes:
+                self._entries[key] = (signature, pickled)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.pop(key, None)
+        
+        return data
+    
+    def invalidate(self, filepath):
+        """
+        Drop the cached entry for a file
+        
+        Args:
+            filepath (str): File that changed
+        """
+        with self._lock:
+            self._entries.pop(os.path.abspath(filepath), None)
+    
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self):
+        """
+        Get cache counters
+        
+        Returns:
+            dict: hits, misses, hit_rate, entries, bytes
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': sum(len(pickled) for _, pickled in self._entries.values())
+            }
+
+
+# Shared by every JSON loader in the app
+json_cache = FileCache()
+
+
 # ==================== JSON UTILITIES ====================
 
+def read_json_or_none(filepath):
+    """
+    Parse a JSON file that other processes may be replacing
+    
+    Args:
+        filepath (str): Path to JSON file
+    
+    Returns:
+        Parsed data, or None if the file is missing or not valid JSON
+    """
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
 def load_json_safe(filepath, default=None):
     """
     Safely load JSON file
@@ -287,8 +520,7 @@ def load_json_safe(filepath, default=None):
     
     try:
         if os.path.exists(filepath):
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return json_cache.load(filepath)
     except Exception as e:
         logger.error(f"Error loading JSON from {filepath}: {e}")
     
@@ -307,9 +539,7 @@ def save_json_safe(filepath, data):
         bool: True if successful, False otherwise
     """
     try:
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        atomic_write_json(filepath, data, indent=2)
         return True
     except Exception as e:
         logger.error(f"Error saving JSON to {filepath}: {e}")
@@ -0,0 +1,407 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - VISITOR AGGREGATES
+Version: 2.0
+==========================================
+"""
+
+import os
+import json
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+from utils import atomic_write_json
+from visitor_table import VisitorTable, MISSING
+from hyperloglog import HyperLogLog, hash_value, precision_for_error
+
+logger = logging.getLogger(__name__)
+
+# File paths
+STATS_FILE = "data/visitor_stats.json"
+
+# Persist a snapshot after this many newly applied records (or a tenth of
+# the history, whichever is larger, so snapshot cost stays amortised O(1))
+SNAPSHOT_INTERVAL = 100
+
+# Bump when the snapshot layout changes; older snapshots are rebuilt
+SNAPSHOT_VERSION = 4
+
+RECENT_LIMIT = 10
+
+# Relative standard error of the HyperLogLog unique-visitor estimates
+UNIQUE_ERROR = 0.02
+
+# Windows with at most this many records are counted exactly from the table
+UNIQUE_EXACT_LIMIT = 10000
+
+
+def build_reports(visitors):
+    """
+    Compute every visitor report in a single pass over the records
+
+    Args:
+        visitors (iterable): Visitor records, oldest first
+
+    Returns:
+        VisitorAggregates: Counters to read reports from
+    """
+    aggregates = VisitorAggregates(path=None)
+    aggregates.rebuild(visitors)
+    return aggregates
+
+
+# ==================== AGGREGATES ====================
+
+class VisitorAggregates:
+    """
+    Incrementally maintained visitor statistics
+
+    One pass over the records fills a columnar ``VisitorTable`` plus a few
+    running counters. ``summary`` (the homepage numbers) reads only the
+    counters and costs O(1); ``daily``, ``pages``, ``hourly`` and ``unique``
+    are vectorized scans over the table's typed arrays.
+
+    Unique visitors are also tracked with one HyperLogLog sketch per day
+    (and per day and page). Windows holding at most ``exact_limit`` records
+    are counted exactly from the table; larger ones merge the day sketches,
+    so the cost depends on the number of days, not on the traffic.
+
+    The aggregates follow a ``VisitorLog`` with a cursor so each sync only
+    reads records appended since the last one. When the log is compacted
+    they are rebuilt from the raw log. State is periodically snapshotted to
+    ``path`` together with the cursor, so a restarted process only replays
+    the tail of the log.
+    """
+
+    def __init__(self, path=STATS_FILE, snapshot_interval=SNAPSHOT_INTERVAL,
+                 unique_error=UNIQUE_ERROR, exact_limit=UNIQUE_EXACT_LIMIT):
+        self.path = path
+        self.snapshot_interval = snapshot_interval
+        self.precision = precision_for_error(unique_error)
+        self.exact_limit = exact_limit
+        self._lock = threading.Lock()
+        self._cursor = None
+        self._unsaved = 0
+        self._loaded = path is None
+        self.reset()
+
+    def reset(self):
+        """Clear all counters"""
+        self.table = VisitorTable()
+        self.total = 0
+        self.day_counts = {}           # day ordinal -> dated records with an IP
+        self.page_counts = {}          # page -> dated records with an IP
+        self.valid_total = 0           # dated records with an IP
+        self.day_sketches = {}         # day ordinal -> HyperLogLog of IPs
+        self.page_sketches = {}        # (day ordinal, page code) -> HyperLogLog of IPs
+        self.recent = deque(maxlen=RECENT_LIMIT)
+        self._unique_cache = {}        # query -> (valid_total, result)
+
+    # ---------- Updating ----------
+
+    def add(self, visitor):
+        """
+        Fold a single visitor record into the table and counters
+
+        Args:
+            visitor (dict): Visitor record
+        """
+        self.total += 1
+        self.recent.append(visitor)
+
+        day, ip = self.table.append(visitor)
+
+        if day == MISSING:
+            logger.warning(f"Invalid visitor record: bad date {visitor.get('date')!r}")
+            return
+        if ip == MISSING:
+            logger.warning("Invalid visitor record: missing ip")
+            return
+
+        page_code = self.table.pages[-1]
+        page = self.table.page_dict.values[page_code]
+        self.valid_total += 1
+        self.day_counts[day] = self.day_counts.get(day, 0) + 1
+        self.page_counts[page] = self.page_counts.get(page, 0) + 1
+
+        hashed = hash_value(self.table.ip_dict.values[ip])
+        self._sketch(self.day_sketches, day).add_hash(hashed)
+        self._sketch(self.page_sketches, (day, page_code)).add_hash(hashed)
+
+    def _sketch(self, sketches, key):
+        """Get the sketch stored under a key, creating an empty one if needed"""
+        sketch = sketches.get(key)
+        if sketch is None:
+            sketch = sketches[key] = HyperLogLog(self.precision)
+        return sketch
+
+    def rebuild(self, visitors):
+        """
+        Recompute every counter from raw records
+
+        Args:
+            visitors (iterable): Visitor records, oldest first
+        """
+        self.reset()
+        for visitor in visitors:
+            self.add(visitor)
+
+    def sync(self, log):
+        """
+        Apply records appended to the log since the last sync
+
+        Args:
+            log (VisitorLog): Log to follow
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load_snapshot()
+
+            records, cursor, reset = log.read_since(self._cursor)
+
+            if reset:
+                self.reset()
+            count = 0
+            for visitor in records:
+                self.add(visitor)
+                count += 1
+
+            self._cursor = cursor
+            self._unsaved += count
+
+            interval = max(self.snapshot_interval, self.total // 10)
+            if self.path and (reset or self._unsaved >= interval):
+                self._save_snapshot()
+
+    # ---------- Reports ----------
+
+    def summary(self, now=None):
+        """
+        Build the ``get_visitor_stats`` dictionary
+
+        Args:
+            now (datetime): Reference time (defaults to utcnow)
+
+        Returns:
+            dict: total, today, this_week, this_month, unique_ips, pages, recent
+        """
+        if not self.total:
+            return {
+                'total': 0,
+                'today': 0,
+                'this_week': 0,
+                'this_month': 0,
+                'unique_ips': 0,
+                'pages': {},
+                'recent': []
+            }
+
+        now = now or datetime.utcnow()
+        today = now.toordinal()
+        week_ago = (now - timedelta(days=7)).toordinal()
+        month_ago = (now - timedelta(days=30)).toordinal()
+
+        with self._lock:
+            week_count = 0
+            month_count = 0
+            for day, count in self.day_counts.items():
+                if day >= week_ago:
+                    week_count += count
+                if day >= month_ago:
+                    month_count += count
+
+            return {
+                'total': self.total,
+                'today': self.day_counts.get(today, 0),
+                'this_week': week_count,
+                'this_month': month_count,
+                'unique_ips': self._unique_since(MISSING + 1),
+                'pages': dict(self.page_counts),
+                'recent': list(self.recent)[::-1]
+            }
+
+    def daily(self, days=30, now=None):
+        """
+        Visitor counts per day for the last N days
+
+        Args:
+            days (int): Number of days to include
+            now (datetime): Reference time (defaults to utcnow)
+
+        Returns:
+            dict: ISO date -> visit count
+        """
+        now = now or datetime.utcnow()
+        with self._lock:
+            return self.table.daily_counts((now - timedelta(days=days)).toordinal())
+
+    def pages(self):
+        """
+        Visit counts per page, most visited first
+
+        Returns:
+            dict: Page -> visit count
+        """
+        with self._lock:
+            return self.table.page_counts()
+
+    def hourly(self):
+        """
+        Visit counts per hour of day
+
+        Returns:
+            dict: Hour (0-23) -> visit count
+        """
+        with self._lock:
+            return self.table.hourly_counts()
+
+    def unique(self, days=7, now=None):
+        """
+        Number of distinct IPs seen in the last N days
+
+        Args:
+            days (int): Number of days to check
+            now (datetime): Reference time (defaults to utcnow)
+
+        Returns:
+            int: Unique visitor count
+        """
+        now = now or datetime.utcnow()
+        with self._lock:
+            return self._unique_since((now - timedelta(days=days)).toordinal())
+
+    def page_unique(self, days=7, now=None):
+        """
+        Number of distinct IPs per page in the last N days
+
+        Args:
+            days (int): Number of days to check
+            now (datetime): Reference time (defaults to utcnow)
+
+        Returns:
+            dict: Page -> unique visitor count, most visitors first
+        """
+        now = now or datetime.utcnow()
+        start_day = (now - timedelta(days=days)).toordinal()
+
+        with self._lock:
+            if self._window_size(start_day) <= self.exact_limit:
+                counts = self.table.page_unique_ips(start_day)
+            else:
+                merged = {}
+                for (day, page_code), sketch in self.page_sketches.items():
+                    if day < start_day:
+                        continue
+                    if page_code in merged:
+                        merged[page_code].merge(sketch)
+                    else:
+                        merged[page_code] = sketch.copy()
+                counts = {self.table.page_dict.values[code]: sketch.count()
+                          for code, sketch in merged.items()}
+
+            return dict(sorted(counts.items(), key=lambda x: x[1], reverse=True))
+
+    def _window_size(self, start_day):
+        """Number of dated records with an IP on or after a day"""
+        return sum(count for day, count in self.day_counts.items() if day >= start_day)
+
+    def _unique_since(self, start_day):
+        """
+        Distinct IPs among dated records on or after a day: exact for small
+        windows, otherwise estimated by merging the per-day sketches.
+        Results are cached until the next valid record arrives.
+        """
+        cached = self._unique_cache.get(start_day)
+        if cached and cached[0] == self.valid_total:
+            return cached[1]
+
+        if self._window_size(start_day) <= self.exact_limit:
+            result = self.table.unique_ips(start_day)
+        else:
+            merged = HyperLogLog(self.precision)
+            for day, sketch in self.day_sketches.items():
+                if day >= start_day:
+                    merged.merge(sketch)
+            result = merged.count()
+
+        self._unique_cache[start_day] = (self.valid_total, result)
+        return result
+
+    # ---------- Snapshots ----------
+
+    def _load_snapshot(self):
+        """Restore counters and cursor from the snapshot file"""
+        self._loaded = True
+
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            if data.get('version') != SNAPSHOT_VERSION:
+                return
+
+            self.table = VisitorTable.from_dict(data['table'])
+            self.total = data['total']
+            self.day_counts = {int(day): count for day, count in data['day_counts'].items()}
+            self.page_counts = dict(map(tuple, data['page_counts']))
+            self.valid_total = sum(self.day_counts.values())
+
+            sketches = data['sketches']
+            if sketches['precision'] == self.precision:
+                self.day_sketches = {
+                    day: HyperLogLog.from_string(self.precision, registers)
+                    for day, registers in sketches['days']
+                }
+                self.page_sketches = {
+                    (day, page_code): HyperLogLog.from_string(self.precision, registers)
+                    for day, page_code, registers in sketches['pages']
+                }
+            else:
+                self._rebuild_sketches()
+
+            self.recent = deque(data['recent'], maxlen=RECENT_LIMIT)
+            self._cursor = tuple(data['cursor']) if data['cursor'] else None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Ignoring unreadable visitor stats snapshot: {e}")
+            self.reset()
+            self._cursor = None
+
+    def _rebuild_sketches(self):
+        """Recompute the sketches from the table (after a precision change)"""
+        self.day_sketches = {}
+        self.page_sketches = {}
+        ip_values = self.table.ip_dict.values
+        for day, ip, page_code in zip(self.table.days, self.table.ips, self.table.pages):
+            if day != MISSING and ip != MISSING:
+                hashed = hash_value(ip_values[ip])
+                self._sketch(self.day_sketches, day).add_hash(hashed)
+                self._sketch(self.page_sketches, (day, page_code)).add_hash(hashed)
+
+    def _save_snapshot(self):
+        """Write counters and cursor to the snapshot file"""
+        data = {
+            'version': SNAPSHOT_VERSION,
+            'cursor': self._cursor,
+            'total': self.total,
+            'day_counts': self.day_counts,
+            'page_counts': list(self.page_counts.items()),
+            'recent': list(self.recent),
+            'table': self.table.to_dict(),
+            'sketches': {
+                'precision': self.precision,
+                'days': [[day, sketch.to_string()] for day, sketch in self.day_sketches.items()],
+                'pages': [[day, page_code, sketch.to_string()]
+                          for (day, page_code), sketch in self.page_sketches.items()]
+            }
+        }
+
+        try:
+            atomic_write_json(self.path, data, separators=(',', ':'))
+            self._unsaved = 0
+        except OSError as e:
+            logger.error(f"Error saving visitor stats snapshot: {e}")
@@ -0,0 +1,209 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - WRITE-BEHIND QUEUE
+Version: 2.0
+==========================================
+"""
+
+import os
+import queue
+import atexit
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Overflow policies
+DROP = 'drop'    # drop the new record when the queue is full
+BLOCK = 'block'  # wait up to block_timeout for room, then drop
+
+# Queued by flush() to make the worker write its batch without waiting
+_FLUSH = object()
+
+
+# ==================== WRITE-BEHIND QUEUE ====================
+
+class WriteBehindQueue:
+    """
+    Bounded in-process buffer flushed in batches by a background thread
+
+    ``put`` only enqueues, so the caller never waits on storage. The worker
+    hands records to ``flush_func`` once ``batch_size`` records are waiting
+    or ``flush_interval`` seconds have passed since the first one arrived.
+    Remaining records are flushed when the interpreter exits. Batches are
+    written one at a time, in the order they were queued, whether by the
+    worker or by ``flush``.
+
+    The worker is started lazily and restarted after ``fork()``, so the
+    queue is safe to create at import time under a pre-forking server.
+    """
+
+    def __init__(self, flush_func, max_size=10000, batch_size=100,
+                 flush_interval=1.0, policy=DROP, block_timeout=0.05):
+        if policy not in (DROP, BLOCK):
+            raise ValueError(f"Unknown overflow policy: {policy}")
+
+        self.flush_func = flush_func
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+
+        self.dropped = 0
+        self.flushed = 0
+
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self._write_lock = threading.Lock()  # held from dequeue to written
+
+        atexit.register(self.stop)
+
+    # ---------- Producer ----------
+
+    def put(self, record):
+        """
+        Enqueue a record for the background writer
+
+        Args:
+            record: Item passed to flush_func in a batch
+
+        Returns:
+            bool: False if the record was dropped because the queue was full
+        """
+        self._ensure_worker()
+
+        try:
+            if self.policy == BLOCK:
+                self._queue.put(record, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"Write-behind queue full, dropped {self.dropped} records")
+            return False
+
+    def pending(self):
+        """
+        Number of records waiting to be flushed
+
+        Returns:
+            int: Queue length
+        """
+        return self._queue.qsize() if self._queue is not None else 0
+
+    # ---------- Flushing ----------
+
+    def flush(self):
+        """
+        Synchronously flush everything currently queued
+
+        Waits for the batch the worker has already taken to be written
+        first, so every record put before the call is stored on return.
+        """
+        if self._queue is None or self._pid != os.getpid():
+            return
+
+        if self._thread is not None:
+            try:
+                self._queue.put_nowait(_FLUSH)  # cut the worker's batch short
+            except queue.Full:
+                pass  # then its batch is about to fill up anyway
+
+        with self._write_lock:
+            while True:
+                batch = self._drain(self.batch_size)
+                if not batch:
+                    return
+                self._write(batch)
+
+    def stop(self, timeout=5.0):
+        """
+        Stop the worker and flush remaining records
+
+        Args:
+            timeout (float): Seconds to wait for the worker to finish
+        """
+        if self._thread is None or self._pid != os.getpid():
+            return
+
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+        self.flush()
+
+    # ---------- Worker ----------
+
+    def _ensure_worker(self):
+        """Start the worker thread in the current process if needed"""
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+
+        with self._start_lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+
+            self._pid = os.getpid()
+            self._queue = queue.Queue(maxsize=self.max_size)
+            self._write_lock = threading.Lock()  # the parent's may be held at fork
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name="visitor-write-behind",
+                daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        """Collect batches by size or age and hand them to flush_func"""
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            if first is _FLUSH:
+                continue
+
+            with self._write_lock:
+                batch = [first]
+                deadline = time.monotonic() + self.flush_interval
+
+                while len(batch) < self.batch_size and not self._stopping.is_set():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        record = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if record is _FLUSH:
+                        break
+                    batch.append(record)
+
+                self._write(batch)
+
+    def _drain(self, limit):
+        """Take up to limit records without waiting (write lock held)"""
+        batch = []
+        while len(batch) < limit:
+            try:
+                record = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if record is not _FLUSH:
+                batch.append(record)
+        return batch
+
+    def _write(self, batch):
+        """Pass a batch to flush_func, logging instead of raising (write lock held)"""
+        try:
+            self.flush_func(batch)
+            self.flushed += len(batch)
+        except Exception as e:
+            logger.error(f"Error flushing {len(batch)} queued records: {e}")
@@ -0,0 +1,381 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - VISITOR STORAGE
+Version: 2.0
+==========================================
+"""
+
+import os
+import json
+import uuid
+import logging
+from datetime import datetime
+
+from utils import file_lock
+
+logger = logging.getLogger(__name__)
+
+# File paths
+VISITORS_LOG = "data/visitors.log"
+LEGACY_VISITORS_FILE = "data/visitors.json"
+
+# Retention
+MAX_VISITORS = 10000
+
+
+# ==================== APPEND-ONLY LOG ====================
+
+class VisitorLog:
+    """
+    Append-only visitor log stored as newline-delimited JSON
+
+    Every visit is written as one compact JSON line at the end of the file,
+    so tracking a visit costs the same no matter how large the history is.
+    Once the log holds more than ``max_records + compact_slack`` lines it is
+    compacted: rewritten with only the newest ``max_records`` records.
+
+    The first line is a header carrying a random ``log_id`` that changes
+    whenever the log is rewritten, so readers following the log with a
+    cursor (see ``read_since``) can tell when their offset became invalid.
+
+    Writers from several processes serialise on a ``file_lock``; rewrites go
+    through a temporary file and an atomic rename, so readers never need the
+    lock and never observe a truncated log.
+    """
+
+    def __init__(self, path=VISITORS_LOG, legacy_path=LEGACY_VISITORS_FILE,
+                 max_records=MAX_VISITORS, compact_slack=None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.max_records = max_records
+        self.compact_slack = compact_slack or max(max_records // 10, 1)
+        self._line_count = None
+        self._inode = None
+        self._size = None  # file size when _line_count was last right
+
+    # ---------- Reading ----------
+
+    def iter_records(self):
+        """
+        Iterate over stored visitor records, oldest first
+
+        Yields:
+            dict: Visitor record
+        """
+        self._ensure_ready()
+
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            f.readline()  # header
+            for line_no, line in enumerate(f, 2):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping malformed visitor log line {line_no}")
+
+    def load(self):
+        """
+        Load every stored visitor record
+
+        Returns:
+            list: Visitor records, oldest first
+        """
+        return list(self.iter_records())
+
+    def read_since(self, cursor=None):
+        """
+        Read the records appended after a cursor
+
+        Only complete lines are consumed, so a record that is still being
+        written is picked up by the next call. Records are parsed lazily
+        from the open file, so following a large log after a rewrite
+        never holds more than one line in memory.
+
+        Args:
+            cursor (tuple): ``(log_id, offset)`` returned by a previous call,
+                or None to read from the beginning
+
+        Returns:
+            tuple: (records, new_cursor, reset) where ``records`` is an
+            iterator to consume before the next call, and ``reset`` is True
+            when the log was rewritten since the cursor was taken and
+            ``records`` therefore covers the whole log
+        """
+        self._ensure_ready()
+
+        if not os.path.exists(self.path):
+            return iter(()), None, cursor is not None
+
+        f = open(self.path, 'rb')
+        try:
+            log_id = self._parse_header(f.readline())
+            if cursor is None or cursor[0] != log_id:
+                reset = True
+                offset = f.tell()
+            else:
+                reset = False
+                offset = cursor[1]
+            end = self._complete_end(f, offset)
+        except Exception:
+            f.close()
+            raise
+
+        return self._iter_range(f, offset, end), (log_id, end), reset
+
+    def version(self):
+        """
+        Cheap change token for the log, read without parsing it
+
+        Appends grow the file and rewrites replace it, so the inode and
+        size change whenever the stored records do.
+
+        Returns:
+            tuple: (token, last modified datetime in UTC or None)
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return "empty", None
+        return f"{stat.st_ino:x}-{stat.st_size:x}", datetime.utcfromtimestamp(int(stat.st_mtime))
+
+    # ---------- Writing ----------
+
+    def append(self, record):
+        """
+        Append a single visitor record to the log
+
+        Args:
+            record (dict): Visitor record
+
+        Returns:
+            bool: True if the record was written
+        """
+        return self.append_many([record])
+
+    def append_many(self, records):
+        """
+        Append a batch of visitor records with a single write
+
+        Args:
+            records (list): Visitor records, oldest first
+
+        Returns:
+            bool: True if the records were written
+        """
+        if not records:
+            return True
+
+        self._ensure_ready()
+
+        lines = ''.join(
+            json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+            for record in records
+        )
+
+        with file_lock(self.path):
+            self._refresh_line_count()
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+            self._line_count += len(records)
+            self._size = os.stat(self.path).st_size
+
+            if self._line_count > self.max_records + self.compact_slack:
+                self._compact_locked()
+
+        return True
+
+    def replace(self, records):
+        """
+        Replace the whole log with the given records
+
+        Args:
+            records (iterable): Visitor records, oldest first
+
+        Returns:
+            bool: True if the log was rewritten
+        """
+        with file_lock(self.path):
+            self._write_log(records)
+        return True
+
+    def compact(self, keep=None):
+        """
+        Rewrite the log keeping only retained records
+
+        Args:
+            keep (callable): Optional predicate; records for which it
+                returns False are dropped
+
+        Returns:
+            int: Number of records removed
+        """
+        self._ensure_ready()
+
+        with file_lock(self.path):
+            return self._compact_locked(keep)
+
+    # ---------- Internals ----------
+
+    def _ensure_ready(self):
+        """Import the legacy JSON file on first use and count log lines"""
+        if self._line_count is not None:
+            return
+
+        with file_lock(self.path):
+            if not os.path.exists(self.path):
+                if self.legacy_path and os.path.exists(self.legacy_path):
+                    self._import_legacy()
+                else:
+                    self._write_log([])
+            self._refresh_line_count(force=True)
+
+    def _refresh_line_count(self, force=False):
+        """
+        Bring the line count up to date with other processes (lock held)
+
+        A rewrite (new inode) is recounted in full; otherwise only the
+        lines other workers appended since this process last counted or
+        wrote are counted, so every worker sees the log's real length.
+        """
+        st = os.stat(self.path)
+        if force or st.st_ino != self._inode or st.st_size < self._size:
+            with open(self.path, 'rb') as f:
+                self._line_count = sum(1 for _ in f) - 1
+        elif st.st_size > self._size:
+            with open(self.path, 'rb') as f:
+                f.seek(self._size)
+                self._line_count += sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(65536), b''))
+        self._inode = st.st_ino
+        self._size = st.st_size
+
+    def _compact_locked(self, keep=None):
+        """
+        Drop expired records and rewrite the log (lock held)
+
+        Streams the log twice instead of loading it: the first pass marks
+        the lines to keep (one byte per line), the second copies the newest
+        ``max_records`` of them into the new file unchanged.
+        """
+        kept = bytearray()
+        original_count = 0
+        with open(self.path, 'rb') as f:
+            f.readline()  # header
+            for line in f:
+                try:
+                    record = json.loads(line) if line.strip() else None
+                except json.JSONDecodeError:
+                    record = None
+                if record is None:
+                    kept.append(False)
+                    continue
+                original_count += 1
+                kept.append(keep is None or bool(keep(record)))
+
+        skip = max(kept.count(1) - self.max_records, 0)
+
+        def lines():
+            remaining = skip
+            with open(self.path, 'rb') as f:
+                f.readline()
+                for line, wanted in zip(f, kept):
+                    if not wanted:
+                        continue
+                    if remaining:
+                        remaining -= 1
+                        continue
+                    yield line if line.endswith(b'\n') else line + b'\n'
+
+        self._write_lines(lines())
+
+        removed = original_count - self._line_count
+        if removed:
+            logger.info(f"Compacted visitor log, removed {removed} records")
+        return removed
+
+    def _write_log(self, records):
+        """Write a fresh log holding `records` (lock held)"""
+        self._write_lines(
+            (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+            for record in records
+        )
+
+    def _write_lines(self, lines):
+        """Write a fresh log via temp file and atomic rename (lock held)"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        count = 0
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write((json.dumps({"log_id": uuid.uuid4().hex}) + '\n').encode('utf-8'))
+            for line in lines:
+                f.write(line)
+                count += 1
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        st = os.stat(self.path)
+        self._line_count = count
+        self._inode = st.st_ino
+        self._size = st.st_size
+
+    @staticmethod
+    def _complete_end(f, offset):
+        """Offset just past the last newline at or after `offset`"""
+        position = os.fstat(f.fileno()).st_size
+        while position > offset:
+            start = max(position - 65536, offset)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b'\n')
+            if newline >= 0:
+                return start + newline + 1
+            position = start
+        return offset
+
+    @staticmethod
+    def _iter_range(f, start, end):
+        """Parse the complete lines between two offsets, then close `f`"""
+        with f:
+            f.seek(start)
+            position = start
+            for line in f:
+                position += len(line)
+                if position > end:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping malformed visitor log line")
+
+    @staticmethod
+    def _parse_header(line):
+        """Extract the log_id from a header line"""
+        try:
+            return json.loads(line).get('log_id')
+        except (ValueError, AttributeError):
+            return None
+
+    def _import_legacy(self):
+        """Seed the log from the old read-modify-write visitors.json"""
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Could not import legacy visitors file: {e}")
+            records = []
+
+        if not isinstance(records, list):
+            logger.error("Legacy visitors file is not a list, skipping import")
+            records = []
+
+        self._write_log(records[-self.max_records:])
+        logger.info(f"Imported {len(records)} visitor records from {self.legacy_path}")
@@ -0,0 +1,321 @@
+"""
+==========================================
+THE GRANITO PORTFOLIO - COLUMNAR VISITOR TABLE
+Version: 2.0
+==========================================
+"""
+
+import base64
+from array import array
+from datetime import date, datetime
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # optional - pure array loops are used instead
+    np = None
+
+# Code stored for a missing value in any column
+MISSING = -1
+
+
+@lru_cache(maxsize=4096)
+def parse_day(value):
+    """
+    Day ordinal of a visitor ``date`` value, parsing each distinct string
+    only once
+
+    Args:
+        value (str): Date or datetime in ISO format
+
+    Returns:
+        int: ``date.toordinal()``, or MISSING if the value is not a valid date
+    """
+    try:
+        return datetime.fromisoformat(value).toordinal()
+    except (ValueError, TypeError):
+        return MISSING
+
+
+def parse_hour(value):
+    """
+    Hour of day of an ISO timestamp
+
+    Args:
+        value (str): Timestamp in ISO format
+
+    Returns:
+        int: Hour (0-23), or MISSING if the value is not a valid timestamp
+    """
+    try:
+        return datetime.fromisoformat(value).hour
+    except (ValueError, TypeError):
+        return MISSING
+
+
+def day_to_iso(ordinal):
+    """Convert a day ordinal back to an ISO date string"""
+    return date.fromordinal(ordinal).isoformat()
+
+
+# ==================== DICTIONARY ENCODING ====================
+
+class StringDictionary:
+    """Stores each distinct value once and hands out dense integer codes"""
+
+    def __init__(self, values=None):
+        self.values = list(values or [])
+        self.codes = {value: code for code, value in enumerate(self.values)}
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, value):
+        """
+        Get the code for a value, adding it if new
+
+        Args:
+            value: Hashable value
+
+        Returns:
+            int: Dense code (first seen value gets 0)
+        """
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+
+def _encode(dictionary, value):
+    """Encode a value, falling back to its string form if unhashable"""
+    try:
+        return dictionary.encode(value)
+    except TypeError:
+        return dictionary.encode(str(value))
+
+
+# ==================== TABLE ====================
+
+class VisitorTable:
+    """
+    Compact columnar store of visitor records
+
+    Each record costs 17 bytes of typed arrays: an int32 day ordinal, an
+    int8 hour and int32 codes for the dictionary-encoded IP, page and user
+    agent. Aggregates run vectorized over NumPy views of the arrays when
+    NumPy is installed and fall back to plain loops otherwise.
+    """
+
+    COLUMNS = (('days', 'i'), ('hours', 'b'), ('ips', 'i'), ('pages', 'i'), ('agents', 'i'))
+
+    def __init__(self):
+        self.days = array('i')
+        self.hours = array('b')
+        self.ips = array('i')
+        self.pages = array('i')
+        self.agents = array('i')
+        self.ip_dict = StringDictionary()
+        self.page_dict = StringDictionary()
+        self.agent_dict = StringDictionary()
+
+    def __len__(self):
+        return len(self.days)
+
+    def nbytes(self):
+        """
+        Memory held by the column arrays
+
+        Returns:
+            int: Bytes (excluding the dictionaries)
+        """
+        return sum(getattr(self, name).itemsize * len(getattr(self, name))
+                   for name, _ in self.COLUMNS)
+
+    # ---------- Appending ----------
+
+    def append(self, visitor):
+        """
+        Add a visitor record
+
+        Args:
+            visitor (dict): Visitor record
+
+        Returns:
+            tuple: (day ordinal, ip code) as stored, MISSING where absent
+        """
+        try:
+            day = parse_day(visitor.get('date'))
+        except TypeError:  # unhashable value, cannot be a date either
+            day = MISSING
+
+        ip = MISSING
+        if 'ip' in visitor:
+            try:
+                ip = self.ip_dict.encode(visitor['ip'])
+            except TypeError:
+                pass
+
+        agent = visitor.get('user_agent')
+
+        self.days.append(day)
+        self.hours.append(parse_hour(visitor.get('timestamp')))
+        self.ips.append(ip)
+        self.pages.append(_encode(self.page_dict, visitor.get('page', '/')))
+        self.agents.append(MISSING if agent is None else _encode(self.agent_dict, agent))
+
+        return day, ip
+
+    # ---------- Aggregates ----------
+
+    def daily_counts(self, start_day):
+        """
+        Records per day for dated records on or after a day
+
+        Args:
+            start_day (int): First day ordinal to include
+
+        Returns:
+            dict: ISO date -> count, oldest day first
+        """
+        if np is not None:
+            days = np.frombuffer(self.days, dtype=np.int32)
+            found, counts = np.unique(days[days >= start_day], return_counts=True)
+            return {day_to_iso(int(d)): int(c) for d, c in zip(found, counts)}
+
+        counts = {}
+        for day in self.days:
+            if day >= start_day:
+                counts[day] = counts.get(day, 0) + 1
+        return {day_to_iso(d): counts[d] for d in sorted(counts)}
+
+    def hourly_counts(self):
+        """
+        Records per hour of day
+
+        Returns:
+            dict: Hour (0-23) -> count
+        """
+        if np is not None:
+            hours = np.frombuffer(self.hours, dtype=np.int8)
+            counts = np.bincount(hours[hours >= 0], minlength=24)
+            return {hour: int(counts[hour]) for hour in range(24)}
+
+        counts = [0] * 24
+        for hour in self.hours:
+            if hour >= 0:
+                counts[hour] += 1
+        return dict(enumerate(counts))
+
+    def page_counts(self):
+        """
+        Records per page, most visited first (ties in first-seen order)
+
+        Returns:
+            dict: Page -> count
+        """
+        if np is not None:
+            pages = np.frombuffer(self.pages, dtype=np.int32)
+            counts = np.bincount(pages, minlength=len(self.page_dict)).tolist()
+        else:
+            counts = [0] * len(self.page_dict)
+            for page in self.pages:
+                counts[page] += 1
+
+        order = sorted(range(len(counts)), key=lambda code: counts[code], reverse=True)
+        return {self.page_dict.values[code]: counts[code] for code in order if counts[code]}
+
+    def unique_ips(self, start_day):
+        """
+        Distinct IPs among dated records on or after a day
+
+        Args:
+            start_day (int): First day ordinal to include
+
+        Returns:
+            int: Number of distinct IPs
+        """
+        if np is not None:
+            days = np.frombuffer(self.days, dtype=np.int32)
+            ips = np.frombuffer(self.ips, dtype=np.int32)
+            selected = ips[(days >= start_day) & (ips >= 0)]
+            return int(np.count_nonzero(np.bincount(selected, minlength=1)))
+
+        seen = bytearray(len(self.ip_dict))
+        for day, ip in zip(self.days, self.ips):
+            if day >= start_day and ip >= 0:
+                seen[ip] = 1
+        return sum(seen)
+
+    def page_unique_ips(self, start_day):
+        """
+        Distinct IPs per page among dated records on or after a day
+
+        Args:
+            start_day (int): First day ordinal to include
+
+        Returns:
+            dict: Page -> number of distinct IPs
+        """
+        if np is not None:
+            days = np.frombuffer(self.days, dtype=np.int32)
+            ips = np.frombuffer(self.ips, dtype=np.int32)
+            pages = np.frombuffer(self.pages, dtype=np.int32)
+            mask = (days >= start_day) & (ips >= 0)
+            pairs = np.unique(pages[mask].astype(np.int64) * len(self.ip_dict) + ips[mask])
+            counts = np.bincount(pairs // max(len(self.ip_dict), 1),
+                                 minlength=len(self.page_dict)).tolist()
+        else:
+            seen = set()
+            for day, ip, page in zip(self.days, self.ips, self.pages):
+                if day >= start_day and ip >= 0:
+                    seen.add((page, ip))
+            counts = [0] * len(self.page_dict)
+            for page, _ in seen:
+                counts[page] += 1
+
+        return {self.page_dict.values[code]: count for code, count in enumerate(counts) if count}
+
+    # ---------- Serialisation ----------
+
+    def to_dict(self):
+        """
+        Serialise the table to JSON-friendly data
+
+        Returns:
+            dict: Base64 encoded columns plus dictionary values
+        """
+        data = {
+            name: base64.b64encode(getattr(self, name).tobytes()).decode('ascii')
+            for name, _ in self.COLUMNS
+        }
+        data['ip_values'] = self.ip_dict.values
+        data['page_values'] = self.page_dict.values
+        data['agent_values'] = self.agent_dict.values
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Restore a table produced by ``to_dict``
+
+        Args:
+            data (dict): Serialised table
+
+        Returns:
+            VisitorTable: Restored table
+        """
+        table = cls()
+        for name, typecode in cls.COLUMNS:
+            column = array(typecode)
+            column.frombytes(base64.b64decode(data[name]))
+            setattr(table, name, column)
+
+        table.ip_dict = StringDictionary(data['ip_values'])
+        table.page_dict = StringDictionary(data['page_values'])
+        table.agent_dict = StringDictionary(data['agent_values'])
+
+        if len({len(getattr(table, name)) for name, _ in cls.COLUMNS}) != 1:
+            raise ValueError("Visitor table columns have different lengths")
+        return table
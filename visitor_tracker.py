@@ -8,40 +8,78 @@ Version: 2.0
 import os
 import json
 from datetime import datetime, timedelta
-from collections import defaultdict
 import logging
 
+from config import Config
+from instrumentation import metrics
+from visitor_store import VisitorLog
+from visitor_aggregates import VisitorAggregates
+from visitor_queue import WriteBehindQueue
+from sqlite_store import SqliteVisitorStore, sqlite_path_from_uri
+
 logger = logging.getLogger(__name__)
 
 # File paths
 VISITORS_FILE = "data/visitors.json"
+VISITORS_LOG = "data/visitors.log"
+STATS_FILE = "data/visitor_stats.json"
+
+# Visitor storage: SQLite when configured, otherwise the append-only log
+# (which imports VISITORS_FILE on first use)
+USE_SQLITE = Config.STORAGE_BACKEND == 'sqlite'
+
+if USE_SQLITE:
+    store = SqliteVisitorStore(
+        sqlite_path_from_uri(Config.SQLALCHEMY_DATABASE_URI),
+        max_records=Config.VISITOR_MAX_RECORDS
+    )
+else:
+    store = VisitorLog(
+        VISITORS_LOG,
+        legacy_path=VISITORS_FILE,
+        max_records=Config.VISITOR_MAX_RECORDS
+    )
+
+# Running counters behind get_visitor_stats. Every worker folds in every
+# worker's appends, so they are synced on read rather than on each write.
+aggregates = VisitorAggregates(
+    STATS_FILE,
+    unique_error=Config.VISITOR_UNIQUE_ERROR,
+    exact_limit=Config.VISITOR_UNIQUE_EXACT_LIMIT
+)
+
+
+@metrics.timed('storage_save')
+def _write_batch(records):
+    """Append a batch of visits to the log"""
+    store.append_many(records)
+
+
+# Background writer so tracking never waits on disk (None = write inline)
+writer = WriteBehindQueue(
+    _write_batch,
+    max_size=Config.VISITOR_QUEUE_SIZE,
+    batch_size=Config.VISITOR_BATCH_SIZE,
+    flush_interval=Config.VISITOR_FLUSH_INTERVAL,
+    policy=Config.VISITOR_QUEUE_POLICY
+) if Config.VISITOR_WRITE_BEHIND else None
 
 
 # ==================== DATA PERSISTENCE ====================
 
 def load_visitors():
-    """Load visitors data from JSON file"""
-    if not os.path.exists(VISITORS_FILE):
-        return []
-    
+    """Load visitors data from the visitor log"""
     try:
-        with open(VISITORS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        logger.error("Invalid JSON in visitors file")
-        return []
+        return store.load()
     except Exception as e:
         logger.error(f"Error loading visitors: {e}")
         return []
 
 
 def save_visitors(visitors):
-    """Save visitors data to JSON file"""
+    """Replace the visitor log with the given records"""
     try:
-        os.makedirs(os.path.dirname(VISITORS_FILE), exist_ok=True)
-        with open(VISITORS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(visitors, f, indent=2, ensure_ascii=False)
-        return True
+        return store.replace(visitors)
     except Exception as e:
         logger.error(f"Error saving visitors: {e}")
         return False
@@ -59,27 +97,27 @@ def track_visitor(ip_address, user_agent, page="/"):
         page (str): Page visited
     
     Returns:
-        bool: True if tracked successfully
+        bool: True if tracked (or queued for the background writer)
     """
     try:
-        visitors = load_visitors()
+        now = datetime.utcnow()
         
         # Create visitor record
         visitor_data = {
             "ip": ip_address,
             "user_agent": user_agent,
             "page": page,
-            "timestamp": datetime.utcnow().isoformat(),
-            "date": datetime.utcnow().date().isoformat()
+            "timestamp": now.isoformat(),
+            "date": now.date().isoformat()
         }
         
-        visitors.append(visitor_data)
-        
-        # Keep only last 10,000 visitors to prevent file from getting too large
-        if len(visitors) > 10000:
-            visitors = visitors[-10000:]
+        if writer is not None:
+            return writer.put(visitor_data)
         
-        return save_visitors(visitors)
+        # Append one line; the log compacts itself back to the newest
+        # VISITOR_MAX_RECORDS visitors once it grows past its slack
+        _write_batch([visitor_data])
+        return True
         
     except Exception as e:
         logger.error(f"Error tracking visitor: {e}")
@@ -88,72 +126,55 @@ def track_visitor(ip_address, user_agent, page="/"):
 
 # ==================== STATISTICS ====================
 
+def _reports():
+    """
+    Bring the aggregates up to date with the log
+    
+    Every report below is a view over the same single-pass counters, so a
+    dashboard showing all of them reads and parses each record only once.
+    
+    Returns:
+        VisitorAggregates: Synced aggregates
+    """
+    aggregates.sync(store)
+    return aggregates
+
+
+def get_stats_version():
+    """
+    Get a validator for the visitor statistics without computing them
+    
+    The token covers the stored records and today's date (the today/week/
+    month windows move at midnight), so it is usable as an ETag for any
+    response built from the statistics.
+    
+    Returns:
+        tuple: (version token, last modified datetime) or (None, None)
+    """
+    try:
+        token, last_modified = store.version()
+        return f"{token}-{datetime.utcnow().date().isoformat()}", last_modified
+    except Exception as e:
+        logger.error(f"Error reading visitor stats version: {e}")
+        return None, None
+
+
+@metrics.timed('stats')
 def get_visitor_stats():
     """
     Get visitor statistics
     
+    Reads the incrementally maintained aggregates, so the cost does not
+    grow with the size of the visitor history.
+    
     Returns:
         dict: Statistics including total, today, this week, this month
     """
     try:
-        visitors = load_visitors()
-        
-        if not visitors:
-            return {
-                'total': 0,
-                'today': 0,
-                'this_week': 0,
-                'this_month': 0,
-                'unique_ips': 0,
-                'pages': {},
-                'recent': []
-            }
-        
-        now = datetime.utcnow()
-        today = now.date()
-        week_ago = (now - timedelta(days=7)).date()
-        month_ago = (now - timedelta(days=30)).date()
-        
-        # Calculate stats
-        total = len(visitors)
-        today_count = 0
-        week_count = 0
-        month_count = 0
-        unique_ips = set()
-        page_counts = defaultdict(int)
+        if USE_SQLITE:
+            return store.visitor_stats()
         
-        for visitor in visitors:
-            try:
-                visitor_date = datetime.fromisoformat(visitor['date']).date()
-                
-                unique_ips.add(visitor['ip'])
-                page_counts[visitor.get('page', '/')] += 1
-                
-                if visitor_date == today:
-                    today_count += 1
-                
-                if visitor_date >= week_ago:
-                    week_count += 1
-                
-                if visitor_date >= month_ago:
-                    month_count += 1
-                    
-            except (KeyError, ValueError) as e:
-                logger.warning(f"Invalid visitor record: {e}")
-                continue
-        
-        # Get recent visitors
-        recent = visitors[-10:][::-1]  # Last 10, most recent first
-        
-        return {
-            'total': total,
-            'today': today_count,
-            'this_week': week_count,
-            'this_month': month_count,
-            'unique_ips': len(unique_ips),
-            'pages': dict(page_counts),
-            'recent': recent
-        }
+        return _reports().summary()
         
     except Exception as e:
         logger.error(f"Error calculating statistics: {e}")
@@ -179,27 +200,10 @@ def get_daily_stats(days=30):
         dict: Daily visitor counts
     """
     try:
-        visitors = load_visitors()
-        
-        if not visitors:
-            return {}
-        
-        now = datetime.utcnow()
-        start_date = (now - timedelta(days=days)).date()
+        if USE_SQLITE:
+            return store.daily_stats(days)
         
-        daily_counts = defaultdict(int)
-        
-        for visitor in visitors:
-            try:
-                visitor_date = datetime.fromisoformat(visitor['date']).date()
-                
-                if visitor_date >= start_date:
-                    daily_counts[visitor_date.isoformat()] += 1
-                    
-            except (KeyError, ValueError):
-                continue
-        
-        return dict(daily_counts)
+        return _reports().daily(days)
         
     except Exception as e:
         logger.error(f"Error calculating daily stats: {e}")
@@ -214,22 +218,11 @@ def get_page_stats():
         dict: Page visit counts
     """
     try:
-        visitors = load_visitors()
-        
-        page_counts = defaultdict(int)
-        
-        for visitor in visitors:
-            page = visitor.get('page', '/')
-            page_counts[page] += 1
-        
-        # Sort by count (descending)
-        sorted_pages = dict(sorted(
-            page_counts.items(),
-            key=lambda x: x[1],
-            reverse=True
-        ))
+        if USE_SQLITE:
+            return store.page_stats()
         
-        return sorted_pages
+        # Sorted by count (descending)
+        return _reports().pages()
         
     except Exception as e:
         logger.error(f"Error calculating page stats: {e}")
@@ -244,24 +237,10 @@ def get_hourly_distribution():
         dict: Visitor counts per hour (0-23)
     """
     try:
-        visitors = load_visitors()
+        if USE_SQLITE:
+            return store.hourly_distribution()
         
-        hourly_counts = defaultdict(int)
-        
-        for visitor in visitors:
-            try:
-                timestamp = datetime.fromisoformat(visitor['timestamp'])
-                hour = timestamp.hour
-                hourly_counts[hour] += 1
-            except (KeyError, ValueError):
-                continue
-        
-        # Ensure all hours are present
-        for hour in range(24):
-            if hour not in hourly_counts:
-                hourly_counts[hour] = 0
-        
-        return dict(sorted(hourly_counts.items()))
+        return _reports().hourly()
         
     except Exception as e:
         logger.error(f"Error calculating hourly distribution: {e}")
@@ -281,24 +260,16 @@ def cleanup_old_visitors(days=90):
         int: Number of records removed
     """
     try:
-        visitors = load_visitors()
-        
-        if not visitors:
-            return 0
-        
         cutoff_date = (datetime.utcnow() - timedelta(days=days)).date()
         
-        original_count = len(visitors)
+        def is_recent(visitor):
+            try:
+                return datetime.fromisoformat(visitor['date']).date() >= cutoff_date
+            except (KeyError, ValueError):
+                return False
         
         # Keep only recent visitors
-        visitors = [
-            v for v in visitors
-            if datetime.fromisoformat(v['date']).date() >= cutoff_date
-        ]
-        
-        save_visitors(visitors)
-        
-        removed = original_count - len(visitors)
+        removed = store.compact(keep=is_recent)
         logger.info(f"Cleaned up {removed} old visitor records")
         
         return removed
@@ -310,6 +281,92 @@ def cleanup_old_visitors(days=90):
 
 # ==================== EXPORT ====================
 
+# Export columns; records missing a field get an empty cell, extra keys are
+# left out of the CSV
+EXPORT_FIELDS = ['ip', 'user_agent', 'page', 'timestamp', 'date']
+
+
+def _visit_day(visitor):
+    """ISO date of a visit (from ``date``, else ``timestamp``), or None"""
+    for field in ('date', 'timestamp'):
+        try:
+            return datetime.fromisoformat(visitor[field]).date()
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+def iter_visitors(start=None, end=None, page=None):
+    """
+    Iterate over stored visits, oldest first, without loading them all
+    
+    Args:
+        start (date): Earliest visit day to include
+        end (date): Latest visit day to include
+        page (str): Only visits to this page
+    
+    Yields:
+        dict: Visitor record (visits without a day are skipped when a
+        date range is given)
+    """
+    if writer is not None:
+        writer.flush()  # include visits still waiting in the queue
+    
+    for visitor in store.iter_records():
+        if not isinstance(visitor, dict):
+            continue
+        if page is not None and visitor.get('page') != page:
+            continue
+        if start is not None or end is not None:
+            day = _visit_day(visitor)
+            if day is None or (start and day < start) or (end and day > end):
+                continue
+        yield visitor
+
+
+def iter_visitors_csv(visitors):
+    """
+    Encode visits as CSV, one chunk per row
+    
+    Args:
+        visitors (iterable): Visitor records
+    
+    Yields:
+        str: Header line, then one line per visit
+    """
+    import csv
+    import io
+    
+    buffer = io.StringIO()
+    csv_writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, restval='', extrasaction='ignore')
+    
+    def flush():
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+    
+    csv_writer.writeheader()
+    yield flush()
+    for visitor in visitors:
+        csv_writer.writerow(visitor)
+        yield flush()
+
+
+def iter_visitors_ndjson(visitors):
+    """
+    Encode visits as newline-delimited JSON, one chunk per line
+    
+    Args:
+        visitors (iterable): Visitor records
+    
+    Yields:
+        str: One compact JSON object per visit
+    """
+    for visitor in visitors:
+        yield json.dumps(visitor, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
 def export_visitors_csv(filepath="exports/visitors.csv"):
     """
     Export visitors data to CSV file
@@ -321,24 +378,21 @@ def export_visitors_csv(filepath="exports/visitors.csv"):
         bool: True if successful
     """
     try:
-        import csv
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
         
-        visitors = load_visitors()
+        count = -1  # header row
+        with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
+            for row in iter_visitors_csv(iter_visitors()):
+                csvfile.write(row)
+                count += 1
         
-        if not visitors:
+        if count <= 0:
+            os.remove(filepath)
             return False
         
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        
-        with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['ip', 'user_agent', 'page', 'timestamp', 'date']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            writer.writeheader()
-            for visitor in visitors:
-                writer.writerow(visitor)
-        
-        logger.info(f"Exported {len(visitors)} visitor records to {filepath}")
+        logger.info(f"Exported {count} visitor records to {filepath}")
         return True
         
     except Exception as e:
@@ -359,26 +413,37 @@ def get_unique_visitors(days=7):
         int: Number of unique visitors
     """
     try:
-        visitors = load_visitors()
-        
-        cutoff_date = (datetime.utcnow() - timedelta(days=days)).date()
-        unique_ips = set()
-        
-        for visitor in visitors:
-            try:
-                visitor_date = datetime.fromisoformat(visitor['date']).date()
-                if visitor_date >= cutoff_date:
-                    unique_ips.add(visitor['ip'])
-            except (KeyError, ValueError):
-                continue
+        if USE_SQLITE:
+            return store.unique_visitors(days)
         
-        return len(unique_ips)
+        return _reports().unique(days)
         
     except Exception as e:
         logger.error(f"Error calculating unique visitors: {e}")
         return 0
 
 
+def get_page_unique_visitors(days=7):
+    """
+    Get unique visitor count per page for the last N days
+    
+    Args:
+        days (int): Number of days to check
+    
+    Returns:
+        dict: Page -> unique visitors, most visitors first
+    """
+    try:
+        if USE_SQLITE:
+            return store.page_unique_visitors(days)
+        
+        return _reports().page_unique(days)
+        
+    except Exception as e:
+        logger.error(f"Error calculating page unique visitors: {e}")
+        return {}
+
+
 def get_top_pages(limit=10):
     """
     Get most visited pages